@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+VAR Benchmark Suite
+
+Throughput and latency of each stage, and of the full pipeline, on
+deterministic synthetic matches (see synthetic_match.py). Runs offline on
+CPU: the pipeline benchmark uses ColorBlobDetector instead of YOLO.
+
+Benchmarks:
+    tracker     MultiObjectTracker.update on noisy ground-truth detections
+    team        TeamClassifier.classify on rendered frames
+    homography  FieldHomography.estimate on rendered frames
+    var         VARDecisionEngine.process_frame on position/team streams
+    pipeline    VARPipeline.process_video on a rendered video
+
+Results are keyed by (benchmark, players, resolution), so JSON files from
+two commits can be compared with --compare.
+
+Usage:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --players 10 22 40 --resolutions 640x360 1920x1080
+    python scripts/benchmark.py --only tracker var --json after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tracking import MultiObjectTracker
+from src.team_classifier import TeamClassifier
+from src.homography import FieldHomography
+from src.var_detection import VARDecisionEngine
+from src.pipeline import VARPipeline
+
+from synthetic_match import SyntheticMatch, ColorBlobDetector, parse_size
+
+
+BENCHMARKS = ("tracker", "team", "homography", "var", "pipeline")
+
+
+def latency_stats(durations: List[float]) -> Dict[str, float]:
+    """Mean/p50/p95/p99 (ms) and calls per second of per-call durations (s)."""
+    ms = np.asarray(durations) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'calls': len(ms),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'per_second': round(1000 / max(float(ms.mean()), 1e-9), 1)
+    }
+
+
+def time_each(fn: Callable, items: list) -> List[float]:
+    """Wall time (s) of fn(item) for every item, in order."""
+    durations = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_tracker(players: int, size: Tuple[int, int], frames: int, seed: int) -> Dict:
+    match = SyntheticMatch(players, *size, seed=seed)
+    detections = [
+        match.detections(truth, jitter=1.0, miss_rate=0.05)
+        for truth in match.stream(frames)
+    ]
+
+    tracker = MultiObjectTracker()
+    return latency_stats(time_each(tracker.update, detections))
+
+
+def bench_team(players: int, size: Tuple[int, int], frames: int, seed: int) -> Dict:
+    match = SyntheticMatch(players, *size, seed=seed)
+    inputs = [
+        (frame, list(truth.player_boxes.values()), list(truth.player_boxes))
+        for frame, truth in match.frames(frames)
+    ]
+
+    classifier = TeamClassifier()
+    return latency_stats(time_each(lambda args: classifier.classify(*args), inputs))
+
+
+def bench_homography(players: int, size: Tuple[int, int], frames: int, seed: int) -> Dict:
+    match = SyntheticMatch(players, *size, seed=seed)
+    rendered = [frame for frame, _ in match.frames(frames)]
+
+    homography = FieldHomography()
+    return latency_stats(time_each(homography.estimate, rendered))
+
+
+def bench_var(players: int, size: Tuple[int, int], frames: int, seed: int) -> Dict:
+    match = SyntheticMatch(players, *size, seed=seed)
+    stream = match.stream(frames)
+
+    # The engine keeps a replay buffer of frames; one blank frame stands in
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    engine = VARDecisionEngine(fps=match.fps)
+
+    def step(truth):
+        engine.process_frame(
+            frame=frame,
+            frame_number=truth.frame_number,
+            player_bboxes=truth.player_boxes,
+            player_positions=truth.player_positions,
+            team_assignments=truth.team_assignments,
+            ball_position=truth.ball_position
+        )
+
+    return latency_stats(time_each(step, stream))
+
+
+def bench_pipeline(
+    players: int,
+    size: Tuple[int, int],
+    frames: int,
+    seed: int,
+    config: Optional[Dict] = None
+) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        video = SyntheticMatch(players, *size, seed=seed).write_video(
+            Path(tmp) / "match.mp4", frames
+        )
+        pipeline = VARPipeline(
+            config={'export_clips': False, **(config or {})},
+            detector=ColorBlobDetector()
+        )
+        result = pipeline.process_video(video, save_video=False, save_pitch_view=False)
+
+    stats = {
+        'frames': result.processed_frames,
+        'fps': round(result.processed_frames / max(result.processing_time, 1e-9), 2),
+        'incidents': result.incident_summary,
+        'stages': {
+            stage: {k: s[k] for k in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms')}
+            for stage, s in result.stage_timings.items()
+        }
+    }
+    if pipeline.keyframes is not None:
+        stats['keyframes'] = pipeline.keyframes.stats()
+    return stats
+
+
+RUNNERS = {
+    "tracker": bench_tracker,
+    "team": bench_team,
+    "homography": bench_homography,
+    "var": bench_var,
+    "pipeline": bench_pipeline,
+}
+
+
+def run_benchmarks(args) -> List[Dict]:
+    """Run the selected benchmarks over the player/resolution grid."""
+    results = []
+    for name in args.only:
+        # Tracker and VAR engine ignore the image; homography ignores players
+        sizes = args.resolutions if name in ("team", "homography", "pipeline") else args.resolutions[:1]
+        players = args.players if name != "homography" else args.players[:1]
+        frames = args.frames if name != "homography" else max(1, args.frames // 10)
+
+        for size in sizes:
+            for n in players:
+                kwargs = {}
+                if name == "pipeline":
+                    kwargs['config'] = {
+                        'pipelined': args.pipelined,
+                        'keyframe_interval': args.keyframe_interval
+                    }
+
+                start = time.perf_counter()
+                stats = RUNNERS[name](n, size, frames, args.seed, **kwargs)
+                results.append({
+                    'benchmark': name,
+                    'players': n,
+                    'resolution': f"{size[0]}x{size[1]}",
+                    'wall_s': round(time.perf_counter() - start, 3),
+                    **stats
+                })
+                print(f"  {_describe(results[-1])}", flush=True)
+    return results
+
+
+def _describe(r: Dict) -> str:
+    head = f"{r['benchmark']:<10} {r['players']:>3} players {r['resolution']:>9}"
+    if r['benchmark'] == "pipeline":
+        if 'keyframes' in r:
+            k = r['keyframes']
+            return (
+                f"{head}  {r['fps']:>8.1f} fps  detector on {k['detection_ratio']:.0%} "
+                f"of frames ({k['forced_frames']} forced)"
+            )
+        return f"{head}  {r['fps']:>8.1f} fps"
+    return (
+        f"{head}  p50 {r['p50_ms']:>8.3f}ms  p95 {r['p95_ms']:>8.3f}ms  "
+        f"p99 {r['p99_ms']:>8.3f}ms  {r['per_second']:>9.1f}/s"
+    )
+
+
+def _key(r: Dict) -> Tuple[str, int, str]:
+    return (r['benchmark'], r['players'], r['resolution'])
+
+
+def compare(results: List[Dict], baseline: List[Dict], max_regression: Optional[float]) -> bool:
+    """
+    Print p50 (or fps) changes against a baseline run.
+
+    Args:
+        results: Current results
+        baseline: Results loaded from an earlier --json file
+        max_regression: Fraction of slowdown that counts as a regression
+
+    Returns:
+        True if no benchmark regressed beyond max_regression
+    """
+    previous = {_key(r): r for r in baseline}
+    ok = True
+
+    print(f"\n{'='*72}")
+    print(" Comparison with baseline (ratio > 1 is slower)")
+    print(f"{'='*72}")
+    for r in results:
+        old = previous.get(_key(r))
+        if old is None:
+            continue
+        if r['benchmark'] == "pipeline":
+            ratio = old['fps'] / max(r['fps'], 1e-9)
+        else:
+            ratio = r['p50_ms'] / max(old['p50_ms'], 1e-9)
+
+        flag = ""
+        if max_regression is not None and ratio > 1 + max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {r['benchmark']:<10} {r['players']:>3} players {r['resolution']:>9}  {ratio:>6.2f}x{flag}")
+    print(f"{'='*72}\n")
+
+    return ok
+
+
+def environment() -> Dict[str, str]:
+    """Versions and commit the results were measured with."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VAR stages on synthetic matches")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="Benchmarks to run")
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 22, 40],
+                        help="Players on the pitch")
+    parser.add_argument("--resolutions", type=parse_size, nargs="+",
+                        default=[(1280, 720), (1920, 1080)], help="Frame sizes as WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per run")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic match")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run the pipeline benchmark in pipelined mode")
+    parser.add_argument("--keyframe-interval", type=int, default=1,
+                        help="Run the pipeline benchmark's detector at most every N frames")
+    parser.add_argument("--json", type=str, help="Write results to JSON file")
+    parser.add_argument("--compare", type=str, help="Baseline JSON file to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="Exit with 1 if a benchmark is slower than baseline by this fraction")
+
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # Synthetic kits are flat colors, so k-means often finds fewer clusters
+    warnings.filterwarnings("ignore", message="Number of distinct clusters")
+
+    print(f"\n{'='*72}")
+    print(" VAR benchmark suite")
+    print(f"{'='*72}")
+    results = run_benchmarks(args)
+    print(f"{'='*72}\n")
+
+    report = {
+        'environment': environment(),
+        'settings': {
+            'frames': args.frames,
+            'seed': args.seed,
+            'pipelined': args.pipelined,
+            'keyframe_interval': args.keyframe_interval
+        },
+        'results': results
+    }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline['results'], args.max_regression):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
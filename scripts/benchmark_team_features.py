@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Team Feature Micro-Benchmark
+
+Compares the per-bbox jersey feature extractor with the batched one
+used by TeamClassifier.classify, and checks that both agree.
+
+Usage:
+    python scripts/benchmark_team_features.py
+    python scripts/benchmark_team_features.py --players 11 22 40 --repeats 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.team_classifier import TeamClassifier
+
+
+def make_frame(n_players: int, width: int = 1920, height: int = 1080, seed: int = 0):
+    """Generate a pitch-like frame with colored player boxes."""
+    rng = np.random.default_rng(seed)
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = (40, 140, 40)
+    frame += rng.integers(0, 20, size=frame.shape, dtype=np.uint8)
+
+    kits = [(0, 0, 200), (230, 230, 230), (0, 220, 220)]
+    bboxes = []
+    for i in range(n_players):
+        x = rng.uniform(0, width - 40)
+        y = rng.uniform(0, height - 100)
+        box = np.array([x, y, x + rng.uniform(25, 40), y + rng.uniform(70, 100)])
+        x1, y1, x2, y2 = box.astype(int)
+        frame[y1:y2, x1:x2] = kits[i % len(kits)]
+        bboxes.append(box.astype(np.float32))
+
+    return frame, bboxes
+
+
+def time_calls(fn, repeats: int) -> float:
+    """Mean wall time of fn() in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def benchmark(n_players: int, repeats: int, color_space: str) -> dict:
+    """Benchmark both extractors for one player count."""
+    frame, bboxes = make_frame(n_players)
+    classifier = TeamClassifier(color_space=color_space)
+
+    def per_bbox():
+        return np.array([classifier.extract_color_features(frame, b) for b in bboxes])
+
+    def batched():
+        return classifier.extract_color_features_batch(frame, bboxes)
+
+    max_diff = float(np.abs(per_bbox() - batched()).max())
+    loop_ms = time_calls(per_bbox, repeats)
+    batch_ms = time_calls(batched, repeats)
+
+    return {
+        'players': n_players,
+        'color_space': color_space,
+        'per_bbox_ms': round(loop_ms, 4),
+        'batched_ms': round(batch_ms, 4),
+        'speedup': round(loop_ms / max(batch_ms, 1e-9), 1),
+        'max_abs_diff': max_diff
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jersey feature extraction")
+    parser.add_argument("--players", type=int, nargs="+", default=[11, 22, 40],
+                        help="Number of players per frame")
+    parser.add_argument("--repeats", type=int, default=200, help="Calls per measurement")
+    parser.add_argument("--color-space", default="hsv", help="Color space (hsv/lab/rgb)")
+    parser.add_argument("--json", type=str, help="Write results to JSON file")
+
+    args = parser.parse_args()
+
+    results = [benchmark(n, args.repeats, args.color_space) for n in args.players]
+
+    print(f"\n{'='*66}")
+    print(" Team feature extraction benchmark")
+    print(f"{'='*66}")
+    print(f"  {'players':>7}  {'per-bbox ms':>12}  {'batched ms':>11}  {'speedup':>8}  {'max diff':>10}")
+    for r in results:
+        print(
+            f"  {r['players']:>7}  {r['per_bbox_ms']:>12.3f}  {r['batched_ms']:>11.3f}  "
+            f"{r['speedup']:>7.1f}x  {r['max_abs_diff']:>10.2e}"
+        )
+    print(f"{'='*66}\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
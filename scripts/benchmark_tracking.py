@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tracker Micro-Benchmark
+
+Measures per-frame cost of MultiObjectTracker.update and of the IoU
+matrix it builds, at several crowd sizes.
+
+Usage:
+    python scripts/benchmark_tracking.py
+    python scripts/benchmark_tracking.py --tracks 20 50 200 --frames 300
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.detection import Detection
+from src.tracking import MultiObjectTracker, box_iou_matrix
+
+
+def make_sequence(n_objects: int, n_frames: int, seed: int = 0) -> list:
+    """Generate player detections moving with small jitter."""
+    rng = np.random.default_rng(seed)
+
+    positions = rng.uniform([0, 0], [1800, 1000], size=(n_objects, 2))
+    velocities = rng.normal(0, 3, size=(n_objects, 2))
+    size = np.array([30.0, 80.0])
+
+    frames = []
+    for _ in range(n_frames):
+        positions += velocities + rng.normal(0, 0.5, size=positions.shape)
+        boxes = np.hstack([positions, positions + size]).astype(np.float32)
+        frames.append([
+            Detection(bbox=box, confidence=0.9, class_id=0, class_name="player")
+            for box in boxes
+        ])
+
+    return frames
+
+
+def pair_iou(box1: np.ndarray, box2: np.ndarray) -> float:
+    """IoU between two boxes (previous scalar implementation)."""
+    x1 = max(box1[0], box2[0])
+    y1 = max(box1[1], box2[1])
+    x2 = min(box1[2], box2[2])
+    y2 = min(box1[3], box2[3])
+
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+
+    union = area1 + area2 - intersection
+
+    return intersection / union if union > 0 else 0
+
+
+def loop_iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """Reference nested-loop IoU matrix (previous implementation)."""
+    iou_matrix = np.zeros((len(boxes1), len(boxes2)))
+    for i in range(len(boxes1)):
+        for j in range(len(boxes2)):
+            iou_matrix[i, j] = pair_iou(boxes1[i], boxes2[j])
+    return iou_matrix
+
+
+def time_calls(fn, repeats: int) -> float:
+    """Mean wall time of fn() in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def benchmark(n_tracks: int, n_frames: int, metric: str) -> dict:
+    """Benchmark tracker update and IoU matrix for one crowd size."""
+    frames = make_sequence(n_tracks, n_frames)
+
+    tracker = MultiObjectTracker(iou_metric=metric)
+    start = time.perf_counter()
+    for detections in frames:
+        tracker.update(detections)
+    update_ms = (time.perf_counter() - start) * 1000 / n_frames
+
+    boxes = np.array([d.bbox for d in frames[-1]])
+    shifted = boxes + 2.0
+    repeats = max(1, 2000 // n_tracks)
+
+    loop_ms = time_calls(lambda: loop_iou_matrix(boxes, shifted), max(1, repeats // 10))
+    vector_ms = time_calls(lambda: box_iou_matrix(boxes, shifted, metric), repeats)
+
+    return {
+        'tracks': n_tracks,
+        'metric': metric,
+        'update_ms_per_frame': round(update_ms, 4),
+        'iou_loop_ms': round(loop_ms, 4),
+        'iou_vectorized_ms': round(vector_ms, 4),
+        'iou_speedup': round(loop_ms / max(vector_ms, 1e-9), 1),
+        'active_tracks': len(tracker.tracks)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MultiObjectTracker")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[20, 50, 200],
+                        help="Number of simultaneous tracks")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per run")
+    parser.add_argument("--metric", default="iou", help="IoU metric (iou/giou/diou)")
+    parser.add_argument("--json", type=str, help="Write results to JSON file")
+
+    args = parser.parse_args()
+
+    results = [benchmark(n, args.frames, args.metric) for n in args.tracks]
+
+    print(f"\n{'='*72}")
+    print(" Tracker benchmark")
+    print(f"{'='*72}")
+    print(f"  {'tracks':>6}  {'update ms/frame':>16}  {'IoU loop ms':>12}  {'IoU vec ms':>11}  {'speedup':>8}")
+    for r in results:
+        print(
+            f"  {r['tracks']:>6}  {r['update_ms_per_frame']:>16.3f}  "
+            f"{r['iou_loop_ms']:>12.3f}  {r['iou_vectorized_ms']:>11.3f}  {r['iou_speedup']:>7.1f}x"
+        )
+    print(f"{'='*72}\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -162,6 +162,84 @@ def test_models():
     return tests
 
 
+def _recorded_detection_sequence():
+    """
+    Recorded 14-frame detection sequence for tracker regression checks.
+    
+    Five players drift across the frame: player 1 leaves for good at
+    frame 5, player 2 drops out for frame 6 only, player 4 enters at
+    frame 9. Every frame also has a low-confidence false positive and
+    a ball detection, neither of which may create a player track.
+    """
+    import numpy as np
+    from src.detection import Detection
+    
+    frames = []
+    for f in range(14):
+        detections = []
+        for p in range(5):
+            if (p == 1 and f >= 5) or (p == 2 and f == 6) or (p == 4 and f < 9):
+                continue
+            x = 100 + 150 * p + 4 * f
+            y = 300 + (2 * f if p % 2 else -2 * f)
+            detections.append(Detection(
+                bbox=np.array([x, y, x + 40, y + 100], dtype=np.float32),
+                confidence=0.9, class_id=0, class_name="player"
+            ))
+        detections.append(Detection(
+            bbox=np.array([1500, 50, 1540, 150], dtype=np.float32),
+            confidence=0.3, class_id=0, class_name="player"
+        ))
+        detections.append(Detection(
+            bbox=np.array([600, 500, 606, 506], dtype=np.float32),
+            confidence=0.7, class_id=32, class_name="ball"
+        ))
+        frames.append(detections)
+    
+    return frames
+
+
+# Confirmed track IDs per frame for the recorded sequence
+EXPECTED_TRACK_IDS = (
+    [[1, 2, 3, 4]] * 7 +
+    [[1, 3, 4]] * 3 +
+    [[1, 3, 4, 5]] * 4
+)
+
+
+def test_tracking():
+    """Regression check: tracker must reproduce the recorded track IDs."""
+    print("Testing tracking...")
+    
+    tests = []
+    
+    try:
+        from src.tracking import MultiObjectTracker
+        
+        tracker = MultiObjectTracker(max_age=3, min_hits=2)
+        track_ids = [
+            [t.track_id for t in tracker.update(detections)]
+            for detections in _recorded_detection_sequence()
+        ]
+        
+        if track_ids == EXPECTED_TRACK_IDS:
+            tests.append(("Track ID regression", True, "IDs match recording"))
+        else:
+            first_diff = next(
+                i for i, (got, want) in enumerate(zip(track_ids, EXPECTED_TRACK_IDS))
+                if got != want
+            )
+            tests.append((
+                "Track ID regression", False,
+                f"Frame {first_diff}: got {track_ids[first_diff]}, "
+                f"expected {EXPECTED_TRACK_IDS[first_diff]}"
+            ))
+    except Exception as e:
+        tests.append(("Track ID regression", False, str(e)))
+    
+    return tests
+
+
 def test_roboflow():
     """Test Roboflow connection."""
     print("Testing Roboflow...")
@@ -226,6 +304,7 @@ def main():
         ("Dependencies", test_dependencies()),
         ("Compute Devices", test_device()),
         ("Models", test_models()),
+        ("Tracking", test_tracking()),
         ("Roboflow", test_roboflow()),
     ]
     
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Synthetic Match Generator
+
+Deterministic inputs for benchmarks, no footage or model weights needed.
+SyntheticMatch simulates two teams and a ball passed between players on a
+pitch that fills the frame (so the automatic homography maps the frame
+corners to the pitch corners). It yields rendered frames with
+player/ball blobs, the matching detections, and pitch-space
+position/team streams for the analytics layer. ColorBlobDetector is a
+stub detector that finds the blobs by color on rendered frames.
+
+Usage:
+    python scripts/synthetic_match.py --output data/synthetic.mp4
+    python scripts/synthetic_match.py --output data/synthetic.mp4 --players 30 --size 1920x1080
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.detection import Detection, DetectionArrays
+
+
+# BGR colors of the rendered scene
+PITCH_COLOR = (40, 140, 40)
+LINE_COLOR = (255, 255, 255)
+KIT_COLORS = {'team_a': (0, 0, 200), 'team_b': (200, 60, 0)}
+BALL_COLOR = (0, 220, 255)
+
+PLAYER_CLASS = (DetectionArrays.PLAYER_CLASS_ID, "player")
+BALL_CLASS = (DetectionArrays.BALL_CLASS_ID, "ball")
+
+
+@dataclass
+class MatchFrame:
+    """Ground truth for one frame."""
+    frame_number: int
+    player_positions: Dict[int, Tuple[float, float]]  # pitch meters
+    team_assignments: Dict[int, str]
+    ball_position: Tuple[float, float]  # pitch meters
+    player_boxes: Dict[int, np.ndarray]  # image [x1, y1, x2, y2]
+    ball_box: np.ndarray  # image [x1, y1, x2, y2]
+
+
+class SyntheticMatch:
+    """
+    Players drifting around formation spots and a ball passed between them.
+
+    Everything is driven by one seeded generator, so the same arguments
+    always produce the same match.
+    """
+
+    def __init__(
+        self,
+        n_players: int = 22,
+        width: int = 1280,
+        height: int = 720,
+        fps: float = 25.0,
+        pitch_length: float = 105.0,
+        pitch_width: float = 68.0,
+        seed: int = 0
+    ):
+        """
+        Initialize match.
+
+        Args:
+            n_players: Players on the pitch, split evenly between teams
+            width: Frame width in pixels
+            height: Frame height in pixels
+            fps: Frame rate (sets speeds per frame)
+            pitch_length: Pitch length in meters
+            pitch_width: Pitch width in meters
+            seed: Random seed
+        """
+        self.n_players = n_players
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pitch_length = pitch_length
+        self.pitch_width = pitch_width
+        self.rng = np.random.default_rng(seed)
+
+        # Team A defends the left goal, team B the right one; formation
+        # spots overlap in midfield so attackers can be caught offside
+        self.teams = ['team_a' if i % 2 == 0 else 'team_b' for i in range(n_players)]
+        sides = np.array([-1.0 if t == 'team_a' else 1.0 for t in self.teams])
+        self.home = np.column_stack([
+            sides * self.rng.uniform(-pitch_length / 4, pitch_length / 2 - 5, n_players),
+            self.rng.uniform(-pitch_width / 2 + 3, pitch_width / 2 - 3, n_players)
+        ])
+        self.positions = self.home.copy()
+        self.velocities = np.zeros((n_players, 2))
+
+        self.owner: Optional[int] = 0
+        self.ball = self.positions[0].copy()
+        self.ball_target: Optional[int] = None
+        self.next_pass = self._pass_delay()
+
+        self.frame_number = 0
+        self._background: Optional[np.ndarray] = None
+
+        # Blob sizes in pixels: a player is 1/12 of the frame tall, about
+        # what a wide broadcast shot shows
+        player_height = height / 12
+        self.player_size = np.array([player_height / 3, player_height])
+        self.ball_radius = max(2, int(round(player_height / 12)))
+
+    def to_image(self, points: np.ndarray) -> np.ndarray:
+        """Pitch meters to image pixels (the pitch fills the frame)."""
+        points = np.asarray(points, dtype=np.float64)
+        offset = np.array([self.pitch_length / 2, self.pitch_width / 2])
+        return (points + offset) * np.array([
+            self.width / self.pitch_length, self.height / self.pitch_width
+        ])
+
+    def step(self) -> MatchFrame:
+        """Advance one frame and return its ground truth."""
+        dt = 1.0 / self.fps
+        rng = self.rng
+
+        # Players: jittered velocity pulled towards their spot, shifted
+        # towards the ball; capped at 8 m/s
+        target = self.home + 0.4 * (self.ball - self.home)
+        self.velocities = (
+            0.9 * self.velocities +
+            0.1 * (target - self.positions) +
+            rng.normal(0, 0.6, self.velocities.shape)
+        )
+        speed = np.linalg.norm(self.velocities, axis=1, keepdims=True)
+        self.velocities *= np.minimum(1.0, 8.0 / np.maximum(speed, 1e-9))
+        self.positions += self.velocities * dt
+        limits = np.array([self.pitch_length / 2 - 1, self.pitch_width / 2 - 1])
+        np.clip(self.positions, -limits, limits, out=self.positions)
+
+        # Ball: at the owner's feet until the next pass, then 18 m/s
+        # towards a (mostly same-team) receiver
+        if self.owner is not None:
+            self.ball = self.positions[self.owner] + np.array([0.5, 0.0])
+            self.next_pass -= 1
+            if self.next_pass <= 0:
+                self.ball_target = self._pick_receiver(self.owner)
+                self.owner = None
+        else:
+            delta = self.positions[self.ball_target] - self.ball
+            distance = float(np.linalg.norm(delta))
+            if distance < 18.0 * dt:
+                self.owner, self.ball_target = self.ball_target, None
+                self.next_pass = self._pass_delay()
+            else:
+                self.ball = self.ball + delta / distance * 18.0 * dt
+
+        frame = self._ground_truth()
+        self.frame_number += 1
+        return frame
+
+    def frames(self, n_frames: int) -> Iterator[Tuple[np.ndarray, MatchFrame]]:
+        """Yield (rendered frame, ground truth) for n_frames frames."""
+        for _ in range(n_frames):
+            truth = self.step()
+            yield self.render(truth), truth
+
+    def stream(self, n_frames: int) -> List[MatchFrame]:
+        """Ground truth only, for benchmarks that skip rendering."""
+        return [self.step() for _ in range(n_frames)]
+
+    def render(self, truth: MatchFrame) -> np.ndarray:
+        """Draw players and ball over the pitch background."""
+        if self._background is None:
+            self._background = self._draw_pitch()
+        frame = self._background.copy()
+
+        for player_id, box in truth.player_boxes.items():
+            x1, y1, x2, y2 = box.astype(int)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), KIT_COLORS[self.teams[player_id]], -1)
+
+        x1, y1, x2, y2 = truth.ball_box
+        center = (int(round((x1 + x2) / 2)), int(round((y1 + y2) / 2)))
+        cv2.circle(frame, center, self.ball_radius, BALL_COLOR, -1)
+
+        return frame
+
+    def detections(
+        self,
+        truth: MatchFrame,
+        jitter: float = 1.0,
+        miss_rate: float = 0.0
+    ) -> List[Detection]:
+        """
+        Detector-like output derived from the ground truth.
+
+        Args:
+            truth: Frame ground truth
+            jitter: Box noise standard deviation (pixels)
+            miss_rate: Probability of dropping each detection
+
+        Returns:
+            Player and ball detections with scores in [0.3, 0.95]
+        """
+        rng = self.rng
+        detections = []
+        for box, (class_id, class_name) in (
+            [(b, PLAYER_CLASS) for b in truth.player_boxes.values()] +
+            [(truth.ball_box, BALL_CLASS)]
+        ):
+            if miss_rate and rng.random() < miss_rate:
+                continue
+            detections.append(Detection(
+                bbox=(box + rng.normal(0, jitter, 4)).astype(np.float32),
+                confidence=float(rng.uniform(0.3, 0.95)),
+                class_id=class_id,
+                class_name=class_name
+            ))
+        return detections
+
+    def write_video(self, path: str, n_frames: int) -> str:
+        """Render n_frames frames to an MP4 file."""
+        writer = cv2.VideoWriter(
+            str(path), cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (self.width, self.height)
+        )
+        try:
+            for frame, _ in self.frames(n_frames):
+                writer.write(frame)
+        finally:
+            writer.release()
+        return str(path)
+
+    def _ground_truth(self) -> MatchFrame:
+        feet = self.to_image(self.positions)
+        w, h = self.player_size
+        boxes = np.column_stack([feet[:, 0] - w / 2, feet[:, 1] - h, feet[:, 0] + w / 2, feet[:, 1]])
+
+        bx, by = self.to_image(self.ball)
+        r = self.ball_radius
+
+        return MatchFrame(
+            frame_number=self.frame_number,
+            player_positions={i: (float(x), float(y)) for i, (x, y) in enumerate(self.positions)},
+            team_assignments=dict(enumerate(self.teams)),
+            ball_position=(float(self.ball[0]), float(self.ball[1])),
+            player_boxes={i: box for i, box in enumerate(boxes)},
+            ball_box=np.array([bx - r, by - r, bx + r, by + r])
+        )
+
+    def _draw_pitch(self) -> np.ndarray:
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = PITCH_COLOR
+        thickness = max(1, self.width // 640)
+        half_l, half_w = self.pitch_length / 2, self.pitch_width / 2
+
+        def line(a, b):
+            (x1, y1), (x2, y2) = self.to_image([a, b]).astype(int)
+            cv2.line(frame, (x1, y1), (x2, y2), LINE_COLOR, thickness)
+
+        # Touchlines and goal lines drawn just inside the frame
+        inset_l, inset_w = half_l - 0.5, half_w - 0.5
+        for a, b in [
+            ((-inset_l, -inset_w), (inset_l, -inset_w)),
+            ((-inset_l, inset_w), (inset_l, inset_w)),
+            ((-inset_l, -inset_w), (-inset_l, inset_w)),
+            ((inset_l, -inset_w), (inset_l, inset_w)),
+            ((0, -inset_w), (0, inset_w)),
+        ]:
+            line(a, b)
+
+        # Penalty areas
+        for side in (-1, 1):
+            x_goal, x_box = side * inset_l, side * (half_l - 16.5)
+            line((x_goal, -20.16), (x_box, -20.16))
+            line((x_goal, 20.16), (x_box, 20.16))
+            line((x_box, -20.16), (x_box, 20.16))
+
+        center = tuple(self.to_image([0.0, 0.0]).astype(int))
+        cv2.circle(frame, center, int(9.15 * self.width / self.pitch_length), LINE_COLOR, thickness)
+        return frame
+
+    def _pass_delay(self) -> int:
+        return int(self.rng.uniform(1.0, 3.0) * self.fps)
+
+    def _pick_receiver(self, owner: int) -> int:
+        same_team = self.rng.random() < 0.8
+        candidates = [
+            i for i in range(self.n_players)
+            if i != owner and (self.teams[i] == self.teams[owner]) == same_team
+        ]
+        return int(self.rng.choice(candidates)) if candidates else owner
+
+
+class ColorBlobDetector:
+    """
+    Stub detector for SyntheticMatch frames.
+
+    Finds kit-colored and ball-colored blobs with a color threshold: far
+    cheaper than a model on CPU, and needs no weights.
+    Interface-compatible with PlayerBallDetector for VARPipeline.
+    """
+
+    confidence_threshold = 0.5
+
+    def __init__(self, tolerance: int = 40):
+        """
+        Initialize detector.
+
+        Args:
+            tolerance: Per-channel color distance still matched
+        """
+        self.tolerance = tolerance
+
+    def detect(self, frame: np.ndarray) -> List[Detection]:
+        return self.detect_arrays(frame).to_detections()
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        return [self.detect(frame) for frame in frames]
+
+    def detect_arrays(self, frame: np.ndarray) -> DetectionArrays:
+        boxes, scores, class_ids = [], [], []
+        for color, class_id, score in (
+            [(c, DetectionArrays.PLAYER_CLASS_ID, 0.9) for c in KIT_COLORS.values()] +
+            [(BALL_COLOR, DetectionArrays.BALL_CLASS_ID, 0.6)]
+        ):
+            for box in self._blobs(frame, color):
+                boxes.append(box)
+                scores.append(score)
+                class_ids.append(class_id)
+
+        if not boxes:
+            return DetectionArrays.empty()
+        return DetectionArrays(
+            boxes=np.array(boxes, dtype=np.float32),
+            scores=np.array(scores, dtype=np.float32),
+            class_ids=np.array(class_ids, dtype=np.int64)
+        )
+
+    def detect_ball_arrays(self, crops: List[np.ndarray], imgsz: int) -> List[DetectionArrays]:
+        """Ball-only detection on crops (see ball_search.BallCropSearch)."""
+        results = []
+        for crop in crops:
+            boxes = self._blobs(np.ascontiguousarray(crop), BALL_COLOR)
+            results.append(DetectionArrays(
+                boxes=np.array(boxes, dtype=np.float32).reshape(-1, 4),
+                scores=np.full(len(boxes), 0.6, dtype=np.float32),
+                class_ids=np.full(len(boxes), DetectionArrays.BALL_CLASS_ID, dtype=np.int64)
+            ))
+        return results
+
+    def _blobs(self, frame: np.ndarray, color: Tuple[int, int, int]) -> List[List[int]]:
+        color = np.array(color)
+        mask = cv2.inRange(
+            frame,
+            np.clip(color - self.tolerance, 0, 255),
+            np.clip(color + self.tolerance, 0, 255)
+        )
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        return [
+            [x, y, x + w, y + h]
+            for x, y, w, h, area in stats[1:n]
+            if area >= 4
+        ]
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    """Parse 'WIDTHxHEIGHT'."""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a synthetic match video")
+    parser.add_argument("--output", required=True, help="Output MP4 path")
+    parser.add_argument("--frames", type=int, default=750, help="Frames to render")
+    parser.add_argument("--players", type=int, default=22, help="Players on the pitch")
+    parser.add_argument("--size", type=parse_size, default=(1280, 720), help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=25.0, help="Frame rate")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    match = SyntheticMatch(
+        n_players=args.players, width=args.size[0], height=args.size[1],
+        fps=args.fps, seed=args.seed
+    )
+    match.write_video(args.output, args.frames)
+    print(f"Wrote {args.frames} frames to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,6 +38,9 @@ setup(
             "roboflow>=1.1.0",
             "inference-sdk>=0.9.0",
         ],
+        "parquet": [
+            "pyarrow>=12.0.0",
+        ],
         "dev": [
             "pytest>=7.3.0",
             "pytest-cov>=4.0.0",
@@ -49,6 +52,8 @@ setup(
     entry_points={
         "console_scripts": [
             "var-analyze=src.pipeline:main",
+            "var-clips=src.clip_export:main",
+            "var-live=src.live:main",
             "var-train=training.train_detection:main",
         ],
     },
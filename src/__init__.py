@@ -13,7 +13,7 @@ Features:
 - PENALTY detection
 """
 
-from .detection import PlayerBallDetector, Detection
+from .detection import PlayerBallDetector, Detection, DetectionArrays
 from .tracking import MultiObjectTracker, BallTracker, TrackedObject
 from .team_classifier import TeamClassifier, get_team_colors
 from .homography import FieldHomography, PitchDimensions
@@ -58,6 +58,7 @@ __author__ = "Automated VAR Team"
 __all__ = [
     'PlayerBallDetector',
     'Detection',
+    'DetectionArrays',
     'MultiObjectTracker',
     'BallTracker',
     'TrackedObject',
@@ -0,0 +1,196 @@
+"""
+Ball Search Module
+
+A second, ball-only detection pass on full-resolution crops. At the main
+detector's input size the ball is a few pixels wide and often missed, so
+the crop is centred on the ball tracker's prediction and grows with every
+missed frame. Once the ball is lost the frame is swept tile by tile,
+a few tiles per frame. A ball found this way is merged into the main
+detections, which lets the main pass run at a lower resolution.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .detection import Detection, DetectionArrays
+
+
+Window = Tuple[int, int, int, int]  # x1, y1, x2, y2 in frame pixels
+
+# Runs the detector on crops at the given input size, one result per crop
+BallDetectFn = Callable[[List[np.ndarray], int], List[DetectionArrays]]
+
+
+class BallCropSearch:
+    """
+    Ball detection on crops around the predicted ball position.
+
+    Call ``search`` with each frame's main-pass detections before the ball
+    tracker is updated. The crop pass is skipped when the main pass
+    already found a ball inside the search area.
+    """
+
+    def __init__(
+        self,
+        crop_size: int = 320,
+        growth: float = 1.5,
+        max_crop_size: int = 960,
+        tile_after: int = 10,
+        tiles_per_frame: int = 2,
+        tile_overlap: int = 32
+    ):
+        """
+        Initialize ball search.
+
+        Args:
+            crop_size: Side (pixels) of the crop while the ball is tracked
+            growth: Factor the crop grows by per consecutive missed frame
+            max_crop_size: Largest crop side, also the tile size
+            tile_after: Missed frames after which the frame is tiled
+            tiles_per_frame: Tiles searched per frame while the ball is lost
+            tile_overlap: Minimum overlap (pixels) between adjacent tiles
+        """
+        self.crop_size = crop_size
+        self.growth = growth
+        self.max_crop_size = max(crop_size, max_crop_size)
+        self.tile_after = tile_after
+        self.tiles_per_frame = max(1, tiles_per_frame)
+        self.tile_overlap = tile_overlap
+
+        self._next_tile = 0
+
+        self.crop_passes = 0
+        self.tile_passes = 0
+        self.balls_found = 0
+
+    def windows(
+        self,
+        frame_shape: Sequence[int],
+        predicted: Optional[Tuple[float, float]],
+        missing_frames: int
+    ) -> List[Window]:
+        """
+        Crops to search on the next frame.
+
+        Args:
+            frame_shape: Shape of the frame (height, width, ...)
+            predicted: Predicted ball position, None if the ball is lost
+            missing_frames: Consecutive frames without a ball detection
+
+        Returns:
+            One crop around the prediction, or the next tiles of the sweep
+        """
+        height, width = frame_shape[:2]
+
+        if predicted is not None and missing_frames <= self.tile_after:
+            size = min(self.crop_size * self.growth ** missing_frames, self.max_crop_size)
+            return [_window_at(predicted, int(size), width, height)]
+
+        tiles = self.tiles(width, height)
+        count = min(self.tiles_per_frame, len(tiles))
+        start = self._next_tile % len(tiles)
+        self._next_tile = start + count
+        return [tiles[(start + i) % len(tiles)] for i in range(count)]
+
+    def tiles(self, width: int, height: int) -> List[Window]:
+        """Tiles of max_crop_size covering the frame, row by row."""
+        size = self.max_crop_size
+        xs = _tile_starts(width, size, self.tile_overlap)
+        ys = _tile_starts(height, size, self.tile_overlap)
+        return [
+            (x, y, min(x + size, width), min(y + size, height))
+            for y in ys for x in xs
+        ]
+
+    def search(
+        self,
+        frame: np.ndarray,
+        detections: List[Detection],
+        predicted: Optional[Tuple[float, float]],
+        missing_frames: int,
+        detect: BallDetectFn
+    ) -> List[Detection]:
+        """
+        Search for the ball and merge it into the main detections.
+
+        Args:
+            frame: BGR image
+            detections: Main-pass detections for the frame
+            predicted: Predicted ball position, None if the ball is lost
+            missing_frames: Consecutive frames without a ball detection
+            detect: Ball detector run on the crops
+
+        Returns:
+            Detections with the crop ball (if any) first among the balls
+        """
+        balls = [d for d in detections if d.class_name == 'ball']
+
+        # Lost: any main-pass ball re-acquires the track.
+        # Tracking: a main-pass ball inside the crop is good enough.
+        tiled = predicted is None or missing_frames > self.tile_after
+        if tiled and balls:
+            return detections
+        windows = self.windows(frame.shape, predicted, missing_frames)
+        if not tiled and any(_contains(windows[0], d.center) for d in balls):
+            return detections
+
+        if tiled:
+            self.tile_passes += 1
+        else:
+            self.crop_passes += 1
+
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        imgsz = _round_up(max(max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in windows), 32)
+
+        best: Optional[Detection] = None
+        for (x1, y1, _, _), result in zip(windows, detect(crops, imgsz)):
+            is_ball = result.class_ids == DetectionArrays.BALL_CLASS_ID
+            if not is_ball.any():
+                continue
+            i = int(np.argmax(np.where(is_ball, result.scores, -1.0)))
+            if best is None or result.scores[i] > best.confidence:
+                best = Detection(
+                    bbox=result.boxes[i] + np.array([x1, y1, x1, y1], dtype=np.float32),
+                    confidence=float(result.scores[i]),
+                    class_id=DetectionArrays.BALL_CLASS_ID,
+                    class_name='ball'
+                )
+
+        if best is None:
+            return detections
+
+        self.balls_found += 1
+        return [best] + detections
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'crop_passes': self.crop_passes,
+            'tile_passes': self.tile_passes,
+            'balls_found': self.balls_found
+        }
+
+
+def _window_at(center: Tuple[float, float], size: int, width: int, height: int) -> Window:
+    """Square window centred on a point, shifted to lie inside the frame."""
+    w, h = min(size, width), min(size, height)
+    x1 = int(np.clip(round(center[0] - w / 2), 0, width - w))
+    y1 = int(np.clip(round(center[1] - h / 2), 0, height - h))
+    return (x1, y1, x1 + w, y1 + h)
+
+
+def _tile_starts(length: int, size: int, overlap: int) -> List[int]:
+    """Evenly spaced tile offsets covering [0, length) with some overlap."""
+    if length <= size:
+        return [0]
+    n = int(np.ceil((length - overlap) / (size - overlap)))
+    return [int(round(s)) for s in np.linspace(0, length - size, n)]
+
+
+def _contains(window: Window, point: Tuple[float, float]) -> bool:
+    x1, y1, x2, y2 = window
+    return x1 <= point[0] < x2 and y1 <= point[1] < y2
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return -(-value // multiple) * multiple
@@ -0,0 +1,105 @@
+"""
+Checkpoint Module
+
+Compact on-disk snapshots of pipeline state, so a long run can resume
+where it stopped instead of starting over. A checkpoint is a
+zlib-compressed pickle written atomically: a crash while saving leaves
+the previous checkpoint intact.
+"""
+
+import os
+import pickle
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Union
+
+
+CHECKPOINT_FILE = "checkpoint.ckpt"
+
+_MAGIC = b"VARCKPT"
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path: Union[str, Path], state: Dict[str, Any], level: int = 6) -> int:
+    """
+    Write a checkpoint atomically.
+
+    Args:
+        path: Checkpoint file
+        state: Picklable state
+        level: zlib compression level
+
+    Returns:
+        Size of the checkpoint in bytes
+    """
+    return write_checkpoint(path, snapshot_state(state), level)
+
+
+def snapshot_state(state: Dict[str, Any]) -> bytes:
+    """
+    Pickle the state as it is now.
+
+    The snapshot no longer changes with the live objects, so it can be
+    handed to write_checkpoint on another thread.
+
+    Args:
+        state: Picklable state
+
+    Returns:
+        Pickled state
+    """
+    return pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+
+def write_checkpoint(path: Union[str, Path], snapshot: bytes, level: int = 6) -> int:
+    """
+    Compress a snapshot and write it atomically.
+
+    Args:
+        path: Checkpoint file
+        snapshot: State pickled by snapshot_state
+        level: zlib compression level
+
+    Returns:
+        Size of the checkpoint in bytes
+    """
+    path = Path(path)
+    payload = zlib.compress(snapshot, level)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(bytes([CHECKPOINT_VERSION]))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return len(payload) + len(_MAGIC) + 1
+
+
+def load_checkpoint(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read a checkpoint written by save_checkpoint.
+
+    Args:
+        path: Checkpoint file
+
+    Returns:
+        The saved state
+
+    Raises:
+        ValueError: If the file is not a checkpoint of this version
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    header = len(_MAGIC) + 1
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"Not a VAR checkpoint: {path}")
+    if data[len(_MAGIC)] != CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Unsupported checkpoint version {data[len(_MAGIC)]} (expected {CHECKPOINT_VERSION})"
+        )
+
+    return pickle.loads(zlib.decompress(data[header:]))
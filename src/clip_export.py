@@ -0,0 +1,282 @@
+"""
+Incident Clip Export Module
+
+Cuts a short MP4 per VAR incident from the source video. Overlapping
+incident ranges are merged so a cluster of incidents produces one clip,
+and clips are encoded on a background thread that seeks the source
+file, so the analysis loop never waits on encoding.
+"""
+
+import json
+import queue
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+
+import cv2
+
+from loguru import logger
+
+
+@dataclass
+class ClipRange:
+    """A merged frame range and the incidents it covers."""
+    start: int
+    end: int
+    incidents: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def merge_clip_ranges(
+    ranges: Sequence[Tuple[int, int]],
+    incidents: Optional[Sequence[Dict[str, Any]]] = None,
+    gap: int = 0
+) -> List[ClipRange]:
+    """
+    Merge overlapping frame ranges.
+
+    Args:
+        ranges: (start, end) frame ranges, inclusive
+        incidents: Optional incident dicts, one per range
+        gap: Ranges separated by at most this many frames are merged too
+
+    Returns:
+        Merged ranges sorted by start frame
+    """
+    if incidents is None:
+        incidents = [None] * len(ranges)
+
+    merged: List[ClipRange] = []
+    for (start, end), incident in sorted(
+        zip(ranges, incidents), key=lambda item: (item[0][0], item[0][1])
+    ):
+        start, end = max(0, int(start)), int(end)
+        if merged and start <= merged[-1].end + gap + 1:
+            merged[-1].end = max(merged[-1].end, end)
+        else:
+            merged.append(ClipRange(start, end))
+        if incident is not None:
+            merged[-1].incidents.append(incident)
+
+    return merged
+
+
+class ClipExporter:
+    """
+    Collects incident ranges during a run and writes one clip per cluster.
+
+    Call ``add`` for each incident and ``advance`` once per processed
+    frame; clusters that no later incident can extend are handed to the
+    background encoder. ``close`` flushes the rest and waits for encoding.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        output_dir: str,
+        lookbehind: int = 0,
+        gap: int = 0,
+        codec: str = "mp4v"
+    ):
+        """
+        Initialize exporter.
+
+        Args:
+            video_path: Source video to cut clips from
+            output_dir: Directory for clip files and clips.json
+            lookbehind: Largest distance (frames) an incident's clip can
+                        start before the incident frame
+            gap: Merge clusters separated by at most this many frames
+            codec: FourCC of the clip files
+        """
+        self.video_path = str(video_path)
+        self.output_dir = Path(output_dir)
+        self.lookbehind = lookbehind
+        self.gap = gap
+        self.codec = codec
+
+        self.open_clip: Optional[ClipRange] = None
+        self.clips: List[Dict[str, Any]] = []
+
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def add(self, start: int, end: int, incident: Optional[Dict[str, Any]] = None):
+        """
+        Add an incident's clip range.
+
+        Args:
+            start: First frame of the range (inclusive)
+            end: Last frame of the range (inclusive)
+            incident: Optional incident dict recorded in clips.json
+        """
+        start = max(0, int(start))
+        clip = self.open_clip
+
+        if clip is not None and start <= clip.end + self.gap + 1:
+            clip.start = min(clip.start, start)
+            clip.end = max(clip.end, int(end))
+        else:
+            if clip is not None:
+                self.submit(clip)
+            clip = self.open_clip = ClipRange(start, int(end))
+
+        if incident is not None:
+            clip.incidents.append(incident)
+
+    def advance(self, frame_number: int):
+        """Submit the open cluster once no later incident can reach it."""
+        clip = self.open_clip
+        if clip is not None and frame_number - self.lookbehind > clip.end + self.gap + 1:
+            self.submit(clip)
+            self.open_clip = None
+
+    def close(self, flush_open: bool = True) -> List[Dict[str, Any]]:
+        """
+        Flush the open cluster, wait for encoding and write clips.json.
+
+        Args:
+            flush_open: Encode the open cluster and write clips.json;
+                        False when the run failed and will be resumed,
+                        since later incidents may still extend the cluster
+
+        Returns:
+            One entry per written clip (file, frame range, incidents)
+        """
+        if self.open_clip is not None and flush_open:
+            self.submit(self.open_clip)
+        self.open_clip = None
+
+        if self._worker is not None:
+            self._jobs.put(None)
+            self._worker.join()
+            self._worker = None
+
+        if self.clips and flush_open:
+            with open(self.output_dir / "clips.json", 'w') as f:
+                json.dump(self.clips, f, indent=2, default=str)
+
+        return self.clips
+
+    def submit(self, clip: ClipRange):
+        """Queue a finished clip range for encoding (never blocks)."""
+        if self._worker is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._worker = threading.Thread(
+                target=self._run, name="var-clips", daemon=True
+            )
+            self._worker.start()
+        self._jobs.put(clip)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            while True:
+                clip = self._jobs.get()
+                if clip is None:
+                    break
+                try:
+                    self._write_clip(cap, clip)
+                except Exception as e:
+                    logger.error(f"Clip export failed for frames {clip.start}-{clip.end}: {e}")
+        finally:
+            cap.release()
+
+    def _write_clip(self, cap: cv2.VideoCapture, clip: ClipRange):
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {self.video_path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        end = min(clip.end, frame_count - 1) if frame_count > 0 else clip.end
+        if end < clip.start:
+            return
+
+        path = self.output_dir / f"clip_{clip.start:06d}_{end:06d}.mp4"
+        writer = cv2.VideoWriter(
+            str(path), cv2.VideoWriter_fourcc(*self.codec), fps, (width, height)
+        )
+
+        cap.set(cv2.CAP_PROP_POS_FRAMES, clip.start)
+        written = 0
+        try:
+            for _ in range(end - clip.start + 1):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+                written += 1
+        finally:
+            writer.release()
+
+        self.clips.append({
+            'file': path.name,
+            'start_frame': clip.start,
+            'end_frame': clip.start + written - 1,
+            'incidents': clip.incidents
+        })
+        logger.info(f"   Clip: {path.name} ({written} frames, {len(clip.incidents)} incidents)")
+
+
+def export_incident_clips(
+    video_path: str,
+    incidents: List[Dict[str, Any]],
+    output_dir: str,
+    gap: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Write clips for a list of saved incidents.
+
+    Args:
+        video_path: Source video
+        incidents: Incident dicts with a 'clip_range' entry
+        output_dir: Directory for clip files and clips.json
+        gap: Merge ranges separated by at most this many frames
+
+    Returns:
+        One entry per written clip
+    """
+    incidents = [i for i in incidents if i.get('clip_range')]
+    exporter = ClipExporter(video_path, output_dir, gap=gap)
+
+    for clip in merge_clip_ranges(
+        [tuple(i['clip_range']) for i in incidents], incidents, gap
+    ):
+        exporter.submit(clip)
+
+    return exporter.close()
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(
+        description='Export VAR incident clips from a processed video'
+    )
+    parser.add_argument('--video', required=True, help='Path to the source video')
+    parser.add_argument('--incidents', required=True, help='incidents.json from var-analyze')
+    parser.add_argument('--output', default='output/clips', help='Output directory')
+    parser.add_argument('--gap', type=int, default=0,
+                        help='Merge clips separated by at most this many frames')
+
+    args = parser.parse_args()
+
+    with open(args.incidents) as f:
+        saved = json.load(f)
+
+    # Penalties are listed under both fouls and penalties
+    incidents = (
+        saved.get('offside_incidents', []) +
+        [i for i in saved.get('foul_incidents', []) if i.get('type') != 'penalty'] +
+        saved.get('penalty_incidents', [])
+    )
+
+    clips = export_incident_clips(args.video, incidents, args.output, args.gap)
+    print(f"Wrote {len(clips)} clips for {len(incidents)} incidents to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Configuration Module
+
+Loads configs/config.yaml into the flat dictionary VARPipeline reads.
+The YAML file groups settings by section (tracking, offside, ...) with
+short key names; SECTION_KEYS maps each (section, key) pair onto the
+pipeline key it sets.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import yaml
+
+
+# Section -> {YAML key: pipeline config key}
+SECTION_KEYS: Dict[str, Dict[str, str]] = {
+    'roboflow': {
+        'api_key': 'roboflow_api_key',
+        'model_id': 'roboflow_model_id',
+    },
+    'detection': {
+        'model': 'detection_model',
+        'confidence_threshold': 'detection_confidence',
+    },
+    'tracking': {
+        'track_thresh': 'track_thresh',
+        'low_thresh': 'track_low_thresh',
+        'match_thresh': 'match_thresh',
+        'iou_metric': 'iou_metric',
+    },
+    'team_classification': {
+        'method': 'team_method',
+        'warmup_frames': 'team_warmup_frames',
+        'adapt_rate': 'team_adapt_rate',
+        'drift_threshold': 'team_drift_threshold',
+        'cache_tracks': 'team_cache_tracks',
+        'reverify_interval': 'team_reverify_interval',
+    },
+    'pitch': {
+        'length': 'pitch_length',
+        'width': 'pitch_width',
+    },
+    'homography': {
+        'reestimate_interval': 'homography_interval',
+        'motion_threshold': 'homography_motion_threshold',
+    },
+    'offside': {
+        'tolerance_cm': 'offside_tolerance_cm',
+    },
+    'foul': {
+        'contact_threshold': 'contact_threshold',
+        'fall_threshold': 'fall_threshold',
+        'min_contact_frames': 'min_contact_frames',
+    },
+    'replay_buffer': {
+        'frames': 'replay_buffer_frames',
+        'mode': 'replay_buffer_mode',
+        'scale': 'replay_buffer_scale',
+        'jpeg_quality': 'replay_jpeg_quality',
+    },
+    'output': {
+        'save_video': 'save_video',
+        'save_pitch_view': 'save_pitch_view',
+        'export_clips': 'export_clips',
+        'clip_merge_gap': 'clip_merge_gap',
+    },
+    'live': {
+        'drop_policy': 'live_drop_policy',
+        'queue_size': 'live_queue_size',
+        'latency_budget_ms': 'live_latency_budget_ms',
+    },
+    'processing': {
+        'batch_size': 'detection_batch_size',
+    },
+}
+
+# Sections whose other keys already carry their pipeline names
+FLAT_SECTIONS = ('processing',)
+
+
+def load_config(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read a YAML configuration file into a VARPipeline config.
+
+    Keys that configure other tools (training, augmentation, drawing)
+    are skipped.
+
+    Args:
+        path: YAML file laid out like configs/config.yaml
+
+    Returns:
+        Flat configuration dictionary for VARPipeline(config=...); it may
+        also hold the run options 'device', 'max_frames', 'save_video'
+        and 'save_pitch_view', and the live_* options of var-live
+    """
+    with open(path) as f:
+        sections = yaml.safe_load(f) or {}
+
+    config = {}
+    for section, values in sections.items():
+        if not isinstance(values, dict):
+            continue
+        names = SECTION_KEYS.get(section, {})
+        for key, value in values.items():
+            if key in names:
+                config[names[key]] = value
+            elif section in FLAT_SECTIONS:
+                config[key] = value
+
+    return config
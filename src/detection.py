@@ -55,6 +55,74 @@ class Detection:
         return self.width * self.height
 
 
+@dataclass
+class DetectionArrays:
+    """
+    Detections for one frame stored as contiguous arrays.
+    
+    Row i of each array describes the same detection, so consumers can
+    filter and batch-process detections without per-object dataclasses.
+    """
+    boxes: np.ndarray  # (N, 4) [x1, y1, x2, y2]
+    scores: np.ndarray  # (N,)
+    class_ids: np.ndarray  # (N,)
+    
+    # Class ID to name mapping shared with Detection.class_name
+    PLAYER_CLASS_ID = 0
+    BALL_CLASS_ID = 32
+    CLASS_NAMES = {PLAYER_CLASS_ID: "player", BALL_CLASS_ID: "ball"}
+    
+    def __len__(self) -> int:
+        return len(self.scores)
+    
+    @classmethod
+    def empty(cls) -> 'DetectionArrays':
+        return cls(
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            scores=np.zeros(0, dtype=np.float32),
+            class_ids=np.zeros(0, dtype=np.int64)
+        )
+    
+    @classmethod
+    def from_detections(cls, detections: List[Detection]) -> 'DetectionArrays':
+        """Pack a list of Detection objects into arrays."""
+        if not detections:
+            return cls.empty()
+        
+        return cls(
+            boxes=np.array([d.bbox for d in detections], dtype=np.float32),
+            scores=np.array([d.confidence for d in detections], dtype=np.float32),
+            class_ids=np.array([d.class_id for d in detections], dtype=np.int64)
+        )
+    
+    @property
+    def class_names(self) -> List[str]:
+        return [self.CLASS_NAMES.get(int(c), "unknown") for c in self.class_ids]
+    
+    def select(self, mask: np.ndarray) -> 'DetectionArrays':
+        """Subset by boolean mask or index array."""
+        return DetectionArrays(
+            boxes=self.boxes[mask],
+            scores=self.scores[mask],
+            class_ids=self.class_ids[mask]
+        )
+    
+    def to_detections(self) -> List[Detection]:
+        """Unpack into Detection objects (one per row)."""
+        scores = self.scores.tolist()
+        class_ids = self.class_ids.tolist()
+        
+        return [
+            Detection(
+                bbox=self.boxes[i],
+                confidence=scores[i],
+                class_id=class_ids[i],
+                class_name=self.CLASS_NAMES.get(class_ids[i], "unknown")
+            )
+            for i in range(len(scores))
+        ]
+
+
 class PlayerBallDetector:
     """
     Detects players and ball using YOLOv8.
@@ -71,7 +139,9 @@ class PlayerBallDetector:
         model_path: str = "yolov8x.pt",
         device: str = None,
         confidence_threshold: float = 0.5,
-        iou_threshold: float = 0.45
+        iou_threshold: float = 0.45,
+        imgsz: int = 640,
+        ball_confidence_threshold: float = 0.25
     ):
         """
         Initialize detector.
@@ -81,9 +151,14 @@ class PlayerBallDetector:
             device: Device for inference (cuda/mps/cpu/None for auto)
             confidence_threshold: Minimum confidence for detections
             iou_threshold: IoU threshold for NMS
+            imgsz: Model input size of the full-frame pass
+            ball_confidence_threshold: Minimum confidence for detect_ball_arrays
         """
+        self.model_path = model_path
         self.confidence_threshold = confidence_threshold
         self.iou_threshold = iou_threshold
+        self.imgsz = imgsz
+        self.ball_confidence_threshold = ball_confidence_threshold
         
         # Auto-detect device
         if device is None:
@@ -113,41 +188,7 @@ class PlayerBallDetector:
         Returns:
             List of Detection objects
         """
-        # Run inference
-        results = self.model(
-            frame,
-            conf=self.confidence_threshold,
-            iou=self.iou_threshold,
-            classes=[self.PERSON_CLASS_ID, self.SPORTS_BALL_CLASS_ID],
-            verbose=False
-        )
-        
-        detections = []
-        
-        for result in results:
-            boxes = result.boxes
-            
-            for i in range(len(boxes)):
-                bbox = boxes.xyxy[i].cpu().numpy()
-                conf = float(boxes.conf[i].cpu().numpy())
-                class_id = int(boxes.cls[i].cpu().numpy())
-                
-                # Map class ID to name
-                if class_id == self.PERSON_CLASS_ID:
-                    class_name = "player"
-                elif class_id == self.SPORTS_BALL_CLASS_ID:
-                    class_name = "ball"
-                else:
-                    class_name = "unknown"
-                
-                detections.append(Detection(
-                    bbox=bbox,
-                    confidence=conf,
-                    class_id=class_id,
-                    class_name=class_name
-                ))
-        
-        return detections
+        return self.detect_arrays(frame).to_detections()
     
     def detect_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
         """
@@ -159,42 +200,87 @@ class PlayerBallDetector:
         Returns:
             List of detection lists for each frame
         """
+        return [d.to_detections() for d in self.detect_batch_arrays(frames)]
+    
+    def detect_arrays(self, frame: np.ndarray) -> DetectionArrays:
+        """
+        Detect players and ball, returning contiguous arrays.
+        
+        Args:
+            frame: BGR image from OpenCV
+        
+        Returns:
+            DetectionArrays for the frame
+        """
+        results = self._infer(frame)
+        
+        if not results:
+            return DetectionArrays.empty()
+        
+        return self._decode(results[0])
+    
+    def detect_batch_arrays(self, frames: List[np.ndarray]) -> List[DetectionArrays]:
+        """
+        Detect in multiple frames, returning one DetectionArrays per frame.
+        
+        Args:
+            frames: List of BGR images
+        
+        Returns:
+            List of DetectionArrays in frame order
+        """
+        return [self._decode(result) for result in self._infer(frames)]
+    
+    def detect_ball_arrays(self, crops: List[np.ndarray], imgsz: int) -> List[DetectionArrays]:
+        """
+        Detect only the ball in image crops (see ball_search.BallCropSearch).
+        
+        Args:
+            crops: List of BGR crops, boxes are relative to each crop
+            imgsz: Model input size, the crop side keeps full resolution
+        
+        Returns:
+            List of DetectionArrays in crop order
+        """
         results = self.model(
-            frames,
+            crops,
+            conf=self.ball_confidence_threshold,
+            iou=self.iou_threshold,
+            classes=[self.SPORTS_BALL_CLASS_ID],
+            imgsz=imgsz,
+            verbose=False
+        )
+        return [self._decode(result) for result in results]
+    
+    def _infer(self, source):
+        """Run the model on one frame or a list of frames."""
+        return self.model(
+            source,
             conf=self.confidence_threshold,
             iou=self.iou_threshold,
             classes=[self.PERSON_CLASS_ID, self.SPORTS_BALL_CLASS_ID],
+            imgsz=self.imgsz,
             verbose=False
         )
+    
+    def _decode(self, result) -> DetectionArrays:
+        """
+        Convert one Ultralytics result to arrays.
         
-        all_detections = []
+        ``boxes.data`` holds [x1, y1, x2, y2, (track_id), conf, cls] per
+        row, so a single device-to-host copy covers the whole frame.
+        """
+        data = result.boxes.data
+        if len(data) == 0:
+            return DetectionArrays.empty()
         
-        for result in results:
-            frame_detections = []
-            boxes = result.boxes
-            
-            for i in range(len(boxes)):
-                bbox = boxes.xyxy[i].cpu().numpy()
-                conf = float(boxes.conf[i].cpu().numpy())
-                class_id = int(boxes.cls[i].cpu().numpy())
-                
-                if class_id == self.PERSON_CLASS_ID:
-                    class_name = "player"
-                elif class_id == self.SPORTS_BALL_CLASS_ID:
-                    class_name = "ball"
-                else:
-                    class_name = "unknown"
-                
-                frame_detections.append(Detection(
-                    bbox=bbox,
-                    confidence=conf,
-                    class_id=class_id,
-                    class_name=class_name
-                ))
-            
-            all_detections.append(frame_detections)
+        data = data.cpu().numpy()
         
-        return all_detections
+        return DetectionArrays(
+            boxes=np.ascontiguousarray(data[:, :4], dtype=np.float32),
+            scores=np.ascontiguousarray(data[:, -2], dtype=np.float32),
+            class_ids=data[:, -1].astype(np.int64)
+        )
     
     def get_players(self, detections: List[Detection]) -> List[Detection]:
         """Filter detections to only players."""
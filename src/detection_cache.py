@@ -0,0 +1,567 @@
+"""
+Detection Cache Module
+
+Persistent per-frame detections, so a video is run through the detector
+once. Entries are keyed by the video's content hash, the detector's
+weights and its settings; inside an entry, rows are keyed by frame
+index. Each flush writes one segment of .npy columns (frames, offsets
+into the rows, boxes, scores, class IDs) that later runs memory-map.
+
+An entry can also hold the tracks, teams and pitch positions of a run,
+which is everything the VAR engine consumes. Replaying those re-runs the
+decisions with new thresholds without decoding a single frame.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from .detection import DetectionArrays
+from .trajectory_store import ColumnTable
+
+
+# Bump when the layout or the meaning of cached values changes
+CACHE_VERSION = 2
+
+VIDEO_DIGESTS_FILE = "videos.json"
+
+DETECTION_COLUMNS = {
+    'boxes': (np.float32, (4,)),
+    'scores': (np.float32, ()),
+    'class_ids': (np.int16, ()),
+}
+
+# VAR engine inputs per tracked player. Boxes keep their dtype (detector
+# float32 or Kalman float64) so a replay sees bit-identical inputs.
+TRACK_COLUMNS = {
+    'frame': (np.int32, ()),
+    'track_id': (np.int32, ()),
+    'bbox': (np.float64, (4,)),
+    'bbox_single': (np.bool_, ()),
+    'pitch_x': (np.float64, ()),
+    'pitch_y': (np.float64, ()),
+    'team': (np.int16, ()),
+    'confidence': (np.float32, ()),
+}
+
+BALL_COLUMNS = {
+    'frame': (np.int32, ()),
+    'ball_x': (np.float64, ()),
+    'ball_y': (np.float64, ()),
+    'ball_pitch_x': (np.float64, ()),
+    'ball_pitch_y': (np.float64, ()),
+    'ball_estimated': (np.bool_, ()),
+}
+
+# One replayed frame, in TrackTable.add_frame argument order
+CachedFrame = Tuple[
+    int, List[int], List[np.ndarray], List[float],
+    Dict[int, Tuple[float, float]], Dict[int, str],
+    Optional[Tuple[float, float]], Optional[Tuple[float, float]], bool
+]
+
+
+def file_digest(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """BLAKE2b hex digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_digest(settings: Dict[str, Any]) -> str:
+    """Stable hex digest of a JSON-serializable settings dict."""
+    payload = json.dumps(settings, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def video_digest(cache_dir: Union[str, Path], video_path: Union[str, Path]) -> str:
+    """
+    Content digest of a video, remembered per path, size and mtime.
+
+    Hashing a full match takes a few seconds, so the result is kept in
+    cache_dir/videos.json and recomputed only when the file changes.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    video_path = Path(video_path).resolve()
+    stat = video_path.stat()
+    memo_path = cache_dir / VIDEO_DIGESTS_FILE
+
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+    except (OSError, ValueError):
+        memo = {}
+
+    entry = memo.get(str(video_path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['digest']
+
+    digest = file_digest(video_path)
+    memo[str(video_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    _write_json(memo_path, memo)
+    return digest
+
+
+def detector_fingerprint(detector: Any) -> Dict[str, Any]:
+    """
+    Identity and settings of a detector, for cache keys.
+
+    Weights are identified by the content hash of model_path when that
+    file exists, otherwise by name (e.g. a hosted model ID).
+    """
+    model = getattr(detector, 'model_path', None) or getattr(detector, 'model_id', None)
+    if model is not None and Path(str(model)).is_file():
+        model = file_digest(model)
+
+    fingerprint = {
+        'detector': f"{type(detector).__module__}.{type(detector).__qualname__}",
+        'model': model
+    }
+    for name in ('confidence_threshold', 'iou_threshold', 'imgsz'):
+        if hasattr(detector, name):
+            fingerprint[name] = getattr(detector, name)
+    return fingerprint
+
+
+class DetectionCache:
+    """
+    Detections of one video under one detector configuration.
+
+    Lookups check rows added since the last flush, then the flushed
+    segments. Safe to share between the inference and analytics threads
+    of a pipelined run, and between processes writing the same entry
+    (each flush creates its own segment).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (or create) a cache entry.
+
+        Args:
+            path: Entry directory
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, DetectionArrays] = {}
+        self._segments: List[Dict[str, np.ndarray]] = []
+        self._load()
+
+    @classmethod
+    def open(
+        cls,
+        cache_dir: Union[str, Path],
+        video_path: Union[str, Path],
+        detector_key: Dict[str, Any]
+    ) -> 'DetectionCache':
+        """
+        Open the entry for a video and detector configuration.
+
+        Args:
+            cache_dir: Root directory shared by all entries
+            video_path: Video the detections belong to
+            detector_key: Detector identity and settings
+                          (see detector_fingerprint)
+
+        Returns:
+            DetectionCache for cache_dir/<video digest>-<settings digest>
+        """
+        digest = video_digest(cache_dir, video_path)
+        key = {'version': CACHE_VERSION, **detector_key}
+        cache = cls(Path(cache_dir) / f"{digest[:16]}-{settings_digest(key)[:16]}")
+
+        meta_path = cache.path / "meta.json"
+        if not meta_path.exists():
+            _write_json(meta_path, {'video': Path(video_path).name, 'video_digest': digest, **key})
+        return cache
+
+    def __len__(self) -> int:
+        """Cached frames, unflushed ones included."""
+        with self._lock:
+            flushed = self._index_frames
+            pending = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            return len(flushed) + int((~np.isin(pending, flushed)).sum())
+
+    def __contains__(self, frame_number: int) -> bool:
+        with self._lock:
+            return frame_number in self._pending or self._find(frame_number) is not None
+
+    def get(self, frame_number: int) -> Optional[DetectionArrays]:
+        """
+        Cached detections of a frame.
+
+        Returns:
+            DetectionArrays (in-memory copies), or None on a miss
+        """
+        with self._lock:
+            arrays = self._pending.get(frame_number)
+            if arrays is None:
+                found = self._find(frame_number)
+                if found is not None:
+                    segment, start, end = found
+                    arrays = DetectionArrays(
+                        boxes=np.array(segment['boxes'][start:end]),
+                        scores=np.array(segment['scores'][start:end]),
+                        class_ids=segment['class_ids'][start:end].astype(np.int64)
+                    )
+
+            if arrays is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return arrays
+
+    def put(self, frame_number: int, arrays: DetectionArrays):
+        """Add a frame's detections; written to disk by the next flush."""
+        with self._lock:
+            self._pending[frame_number] = arrays
+
+    def flush(self) -> int:
+        """
+        Write the rows added since the last flush as a new segment.
+
+        Returns:
+            Frames written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending = sorted(self._pending.items())
+            self._pending = {}
+
+            frames = np.array([f for f, _ in pending], dtype=np.int32)
+            offsets = np.zeros(len(pending) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(a) for _, a in pending])
+            columns = {
+                'frames': frames,
+                'offsets': offsets,
+                'boxes': _stack([a.boxes for _, a in pending], DETECTION_COLUMNS['boxes']),
+                'scores': _stack([a.scores for _, a in pending], DETECTION_COLUMNS['scores']),
+                'class_ids': _stack([a.class_ids for _, a in pending], DETECTION_COLUMNS['class_ids'])
+            }
+
+            self._write_segment(columns)
+            self._load()
+            return len(frames)
+
+    def track_path(self, key: Dict[str, Any], start_frame: int) -> Path:
+        """Directory of the tracks cached under these settings and start frame."""
+        return self.path / f"tracks-{settings_digest(key)[:16]}-{start_frame:06d}"
+
+    def load_tracks(
+        self,
+        key: Dict[str, Any],
+        start_frame: int,
+        end_frame: int
+    ) -> Optional['TrackTable']:
+        """
+        Cached tracks covering [start_frame, end_frame).
+
+        Tracker and classifier state depend on where a run started, so
+        only tracks recorded from the same start frame are used.
+
+        Args:
+            key: Tracking, team and homography settings of the run
+            start_frame: First frame of the run
+            end_frame: One past the last frame needed
+
+        Returns:
+            TrackTable, or None if no cached run covers the range
+        """
+        path = self.track_path(key, start_frame)
+        if not (path / "meta.json").exists():
+            return None
+
+        tracks = TrackTable.load(path)
+        if tracks.covered_end < end_frame:
+            return None
+        return tracks
+
+    def save_tracks(self, key: Dict[str, Any], tracks: 'TrackTable'):
+        """Store a run's tracks unless a longer run from the same start is cached."""
+        path = self.track_path(key, tracks.start_frame)
+        if (path / "meta.json").exists() and \
+                TrackTable.load(path).covered_end >= max(tracks.covered_end, tracks.end_frame):
+            return
+        tracks.save(path)
+
+    def _find(self, frame_number: int) -> Optional[Tuple[Dict[str, np.ndarray], int, int]]:
+        i = int(np.searchsorted(self._index_frames, frame_number))
+        if i == len(self._index_frames) or self._index_frames[i] != frame_number:
+            return None
+        segment = self._segments[self._index_segment[i]]
+        row = self._index_row[i]
+        return segment, int(segment['offsets'][row]), int(segment['offsets'][row + 1])
+
+    def _load(self):
+        """Memory-map all segments and index them by frame (latest segment wins)."""
+        self._segments = []
+        frames, segment_ids, rows = [], [], []
+
+        for path in sorted(self.path.glob("segment-*")):
+            try:
+                segment = {
+                    name: np.load(path / f"{name}.npy", mmap_mode='r')
+                    for name in ('frames', 'offsets', *DETECTION_COLUMNS)
+                }
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable cache segment {path}: {e}")
+                continue
+            if len(segment['offsets']) != len(segment['frames']) + 1 or \
+                    segment['offsets'][-1] != len(segment['scores']):
+                logger.warning(f"Skipping inconsistent cache segment {path}")
+                continue
+
+            frames.append(np.asarray(segment['frames'], dtype=np.int64))
+            segment_ids.append(np.full(len(segment['frames']), len(self._segments), dtype=np.int32))
+            rows.append(np.arange(len(segment['frames'])))
+            self._segments.append(segment)
+
+        if not frames:
+            self._index_frames = np.empty(0, dtype=np.int64)
+            self._index_segment = np.empty(0, dtype=np.int32)
+            self._index_row = np.empty(0, dtype=np.int64)
+            return
+
+        frames = np.concatenate(frames)
+        segment_ids = np.concatenate(segment_ids)
+        rows = np.concatenate(rows)
+
+        order = np.lexsort((segment_ids, frames))
+        frames, segment_ids, rows = frames[order], segment_ids[order], rows[order]
+        last = np.append(frames[1:] != frames[:-1], True)
+
+        self._index_frames = frames[last]
+        self._index_segment = segment_ids[last]
+        self._index_row = rows[last]
+
+    def _write_segment(self, columns: Dict[str, np.ndarray]):
+        """Write to a temporary directory, then rename it to the next free segment name."""
+        tmp = Path(tempfile.mkdtemp(prefix=".segment-", dir=self.path))
+        for name, column in columns.items():
+            np.save(tmp / f"{name}.npy", column)
+
+        number = len(list(self.path.glob("segment-*")))
+        while True:
+            try:
+                os.rename(tmp, self.path / f"segment-{number:05d}")
+                return
+            except OSError:
+                # Taken by another writer
+                if not tmp.exists():
+                    raise
+                number += 1
+
+
+class TrackTable:
+    """
+    Per-frame VAR engine inputs of one run: tracked players with their
+    boxes, teams and pitch positions, and the ball.
+
+    Rows are appended in frame order during a run and saved as .npy
+    columns; a loaded table is memory-mapped and replayed with ``frames``.
+    """
+
+    def __init__(self, start_frame: int = 0):
+        self.start_frame = start_frame
+        self.end_frame = start_frame
+        # One past the last frame the recording run was asked for; frames
+        # between end_frame and here were past the end of the video
+        self.covered_end = start_frame
+        self.team_labels: List[str] = []
+
+        self.players = ColumnTable(TRACK_COLUMNS)
+        self.balls = ColumnTable(BALL_COLUMNS)
+        self._columns: Optional[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        """Frames in the table."""
+        return self.end_frame - self.start_frame
+
+    @property
+    def nbytes(self) -> int:
+        return self.players.nbytes + self.balls.nbytes
+
+    def add_frame(
+        self,
+        frame_number: int,
+        track_ids: Sequence[int],
+        bboxes: Sequence[np.ndarray],
+        confidences: Sequence[float],
+        pitch_positions: Dict[int, Tuple[float, float]],
+        team_assignments: Dict[int, str],
+        ball_position: Optional[Tuple[float, float]] = None,
+        ball_pitch_position: Optional[Tuple[float, float]] = None,
+        ball_estimated: bool = False
+    ):
+        """
+        Append one frame (frames must be consecutive).
+
+        Args:
+            frame_number: Index of the frame in the video
+            track_ids: Tracked player IDs
+            bboxes: Image boxes [x1, y1, x2, y2], one per track
+            confidences: Track confidences, one per track
+            pitch_positions: Pitch coordinates by track ID
+            team_assignments: Team label by track ID
+            ball_position: Ball image position, if any
+            ball_pitch_position: Ball pitch position, if any
+            ball_estimated: The ball was propagated, not detected
+        """
+        n = len(track_ids)
+        if n:
+            nan = (np.nan, np.nan)
+            pitch = np.array([pitch_positions.get(t, nan) for t in track_ids], dtype=np.float64)
+            self.players.append(
+                n,
+                frame=frame_number,
+                track_id=track_ids,
+                bbox=np.array(bboxes, dtype=np.float64).reshape(n, 4),
+                bbox_single=[np.asarray(b).dtype == np.float32 for b in bboxes],
+                pitch_x=pitch[:, 0],
+                pitch_y=pitch[:, 1],
+                team=[self._team_code(team_assignments.get(t)) for t in track_ids],
+                confidence=confidences
+            )
+
+        ball = ball_position or (np.nan, np.nan)
+        ball_pitch = ball_pitch_position or (np.nan, np.nan)
+        self.balls.append(
+            1,
+            frame=frame_number,
+            ball_x=ball[0],
+            ball_y=ball[1],
+            ball_pitch_x=ball_pitch[0],
+            ball_pitch_y=ball_pitch[1],
+            ball_estimated=ball_estimated
+        )
+        self.end_frame = frame_number + 1
+
+    def frames(self, end: Optional[int] = None) -> Iterator[CachedFrame]:
+        """
+        Replay the table frame by frame.
+
+        Args:
+            end: Stop before this frame (None = all frames)
+
+        Yields:
+            (frame_number, track_ids, bboxes, confidences, pitch_positions,
+            team_assignments, ball_position, ball_pitch_position, ball_estimated)
+        """
+        players, balls = self._columns or (self.players.view(), self.balls.view())
+        if end is not None:
+            balls = {name: column[:np.searchsorted(balls['frame'], end)] for name, column in balls.items()}
+
+        frame_numbers = balls['frame'].tolist()
+        if not frame_numbers:
+            return
+        # Player rows of frame i are bounds[i]:bounds[i + 1]
+        bounds = np.searchsorted(players['frame'], frame_numbers + [frame_numbers[-1] + 1]).tolist()
+        track_ids = players['track_id'].tolist()
+        pitch_x = players['pitch_x'].tolist()
+        pitch_y = players['pitch_y'].tolist()
+        teams = players['team'].tolist()
+        confidences = players['confidence'].tolist()
+        single = players['bbox_single']
+
+        for i, frame_number in enumerate(frame_numbers):
+            lo, hi = bounds[i], bounds[i + 1]
+            ids = track_ids[lo:hi]
+            pitch_positions = {
+                t: (pitch_x[j], pitch_y[j])
+                for t, j in zip(ids, range(lo, hi)) if not math.isnan(pitch_x[j])
+            }
+            team_assignments = {
+                t: self.team_labels[teams[j]]
+                for t, j in zip(ids, range(lo, hi)) if teams[j] >= 0
+            }
+            bboxes = [
+                np.array(bbox, dtype=np.float32 if s else np.float64)
+                for bbox, s in zip(players['bbox'][lo:hi], single[lo:hi])
+            ]
+            yield (
+                frame_number, ids, bboxes, confidences[lo:hi],
+                pitch_positions, team_assignments,
+                _point(balls['ball_x'][i], balls['ball_y'][i]),
+                _point(balls['ball_pitch_x'][i], balls['ball_pitch_y'][i]),
+                bool(balls['ball_estimated'][i])
+            )
+
+    def save(self, path: Union[str, Path]):
+        """Write the table as .npy columns plus meta.json, replacing any earlier one."""
+        path = Path(path)
+        tmp = Path(tempfile.mkdtemp(prefix=".tracks-", dir=path.parent))
+        for prefix, columns in (("players", self.players.view()), ("balls", self.balls.view())):
+            for name, column in columns.items():
+                np.save(tmp / f"{prefix}_{name}.npy", column)
+        _write_json(tmp / "meta.json", {
+            'start_frame': self.start_frame,
+            'end_frame': self.end_frame,
+            'covered_end': max(self.covered_end, self.end_frame),
+            'team_labels': self.team_labels
+        })
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'TrackTable':
+        """Memory-map a table written by save."""
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+
+        table = cls(meta['start_frame'])
+        table.end_frame = meta['end_frame']
+        table.covered_end = meta['covered_end']
+        table.team_labels = meta['team_labels']
+        table._columns = (
+            {name: np.load(path / f"players_{name}.npy", mmap_mode='r') for name in TRACK_COLUMNS},
+            {name: np.load(path / f"balls_{name}.npy", mmap_mode='r') for name in BALL_COLUMNS}
+        )
+        return table
+
+    def _team_code(self, label: Optional[str]) -> int:
+        if label is None:
+            return -1
+        if label not in self.team_labels:
+            self.team_labels.append(label)
+        return self.team_labels.index(label)
+
+
+def _stack(arrays: List[np.ndarray], spec: Tuple[type, tuple]) -> np.ndarray:
+    dtype, shape = spec
+    if not arrays:
+        return np.empty((0,) + shape, dtype=dtype)
+    return np.concatenate([np.asarray(a, dtype=dtype).reshape((-1,) + shape) for a in arrays])
+
+
+def _point(x: float, y: float) -> Optional[Tuple[float, float]]:
+    """(x, y) as floats, None for the NaN placeholder."""
+    if np.isnan(x):
+        return None
+    return (float(x), float(y))
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    """Write JSON through a temporary file so readers never see half a file."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
@@ -14,6 +14,8 @@ import cv2
 
 from loguru import logger
 
+from .spatial import contact_candidates, broken_contacts
+
 
 class FoulSeverity(Enum):
     """Severity level of foul."""
@@ -156,6 +158,11 @@ class FallDetector:
         """
         return self.update(player_bboxes)
     
+    def forget(self, player_id: int):
+        """Drop state for a player whose track has ended."""
+        self.player_heights.pop(player_id, None)
+        self.fall_state.pop(player_id, None)
+    
     def reset(self):
         """Reset detector state."""
         self.player_heights.clear()
@@ -203,48 +210,43 @@ class ContactDetector:
             List of contact events
         """
         contacts = []
-        player_ids = list(player_positions.keys())
+        player_ids, positions, pairs, distances = contact_candidates(
+            player_positions, team_assignments, self.contact_threshold
+        )
         
-        for i, p1_id in enumerate(player_ids):
-            for p2_id in player_ids[i + 1:]:
-                # Skip same team
-                team1 = team_assignments.get(p1_id, "unknown")
-                team2 = team_assignments.get(p2_id, "unknown")
-                
-                if team1 == team2:
-                    continue
-                if "referee" in [team1, team2]:
-                    continue
-                if "unknown" in [team1, team2]:
-                    continue
-                
-                # Check distance
-                pos1 = np.array(player_positions[p1_id])
-                pos2 = np.array(player_positions[p2_id])
-                distance = np.linalg.norm(pos1 - pos2)
-                
-                pair_key = (min(p1_id, p2_id), max(p1_id, p2_id))
+        in_contact = set()
+        for (i, j), distance in zip(pairs, distances):
+            p1_id, p2_id = player_ids[i], player_ids[j]
+            pair_key = (min(p1_id, p2_id), max(p1_id, p2_id))
+            in_contact.add(pair_key)
+            self.contact_history[pair_key] = \
+                self.contact_history.get(pair_key, 0) + 1
+            
+            if self.contact_history[pair_key] >= self.min_contact_frames:
+                contact_pos = tuple((positions[i] + positions[j]) / 2)
                 
-                if distance < self.contact_threshold:
-                    self.contact_history[pair_key] = \
-                        self.contact_history.get(pair_key, 0) + 1
-                    
-                    if self.contact_history[pair_key] >= self.min_contact_frames:
-                        contact_pos = tuple((pos1 + pos2) / 2)
-                        
-                        contacts.append(ContactEvent(
-                            player1_id=p1_id,
-                            player2_id=p2_id,
-                            position=contact_pos,
-                            distance=distance,
-                            frame_number=0,  # Set by caller
-                            duration=self.contact_history[pair_key]
-                        ))
-                else:
-                    self.contact_history[pair_key] = 0
+                contacts.append(ContactEvent(
+                    player1_id=p1_id,
+                    player2_id=p2_id,
+                    position=contact_pos,
+                    distance=distance,
+                    frame_number=0,  # Set by caller
+                    duration=self.contact_history[pair_key]
+                ))
+        
+        # Opposing pairs checked this frame but no longer touching
+        for pair_key in broken_contacts(
+            list(self.contact_history), in_contact, player_positions, team_assignments
+        ):
+            del self.contact_history[pair_key]
         
         return contacts
     
+    def forget(self, player_id: int):
+        """Drop contact counters involving a player whose track has ended."""
+        for pair_key in [k for k in self.contact_history if player_id in k]:
+            del self.contact_history[pair_key]
+    
     def reset(self):
         """Reset detector state."""
         self.contact_history.clear()
@@ -450,6 +452,11 @@ class FoulDetector:
         else:
             return f"Minor foul {location}"
     
+    def forget(self, player_id: int):
+        """Drop per-player state for a track that has ended."""
+        self.fall_detector.forget(player_id)
+        self.contact_detector.forget(player_id)
+    
     def reset(self):
         """Reset detector state."""
         self.fall_detector.reset()
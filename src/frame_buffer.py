@@ -0,0 +1,203 @@
+"""
+Frame Buffer Module
+
+Fixed-size ring buffer of recent frames used to cut replay clips for
+VAR incidents. Raw mode writes into one preallocated array, so no
+memory is allocated per frame; JPEG mode trades CPU for a much smaller
+footprint.
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+import cv2
+
+from loguru import logger
+
+
+BUFFER_MODES = ("raw", "jpeg")
+
+
+class FrameRingBuffer:
+    """
+    Keeps the most recent ``capacity`` frames, indexed by frame number.
+
+    Frames can be downscaled on the way in (``scale`` < 1); they are
+    returned at the stored resolution.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 150,
+        mode: str = "raw",
+        scale: float = 1.0,
+        jpeg_quality: int = 85
+    ):
+        """
+        Initialize buffer.
+
+        Args:
+            capacity: Number of frames retained
+            mode: "raw" (preallocated uint8 array) or "jpeg" (encoded)
+            scale: Resize factor applied before storing (0 < scale <= 1)
+            jpeg_quality: JPEG quality for "jpeg" mode
+        """
+        if mode not in BUFFER_MODES:
+            raise ValueError(f"Unknown frame buffer mode: {mode}")
+        if not 0 < scale <= 1:
+            raise ValueError(f"Frame buffer scale must be in (0, 1], got {scale}")
+
+        self.capacity = max(1, capacity)
+        self.mode = mode
+        self.scale = scale
+        self.jpeg_quality = jpeg_quality
+
+        self._frame_numbers = np.full(self.capacity, -1, dtype=np.int64)
+        self._next = 0
+        self._count = 0
+
+        # Raw storage, allocated on the first frame once the size is known
+        self._frames: Optional[np.ndarray] = None
+
+        # Encoded storage
+        self._encoded: List[Optional[np.ndarray]] = [None] * self.capacity
+        self._encoded_bytes = 0
+
+    def __getstate__(self):
+        # Pickled buffers (checkpoints) keep their settings but not their frames
+        state = self.__dict__.copy()
+        state.update(
+            _frame_numbers=np.full(self.capacity, -1, dtype=np.int64),
+            _next=0,
+            _count=0,
+            _frames=None,
+            _encoded=[None] * self.capacity,
+            _encoded_bytes=0
+        )
+        return state
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by stored frames."""
+        if self.mode == "raw":
+            return 0 if self._frames is None else self._frames.nbytes
+        return self._encoded_bytes
+
+    def append(self, frame_number: int, frame: np.ndarray):
+        """
+        Store a frame, overwriting the oldest one when full.
+
+        Args:
+            frame_number: Frame index in the video
+            frame: BGR image (copied into the buffer)
+        """
+        if self.mode == "raw":
+            self._ensure_raw_storage(frame)
+
+        slot = self._next
+
+        if self.mode == "raw":
+            self._store_raw(slot, frame)
+        else:
+            self._store_encoded(slot, frame)
+
+        self._frame_numbers[slot] = frame_number
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def get(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Get a stored frame.
+
+        Args:
+            frame_number: Frame index in the video
+
+        Returns:
+            Copy of the frame, or None if it is no longer buffered
+        """
+        slots = np.flatnonzero(self._frame_numbers == frame_number)
+        if len(slots) == 0:
+            return None
+        return self._load(slots[0])
+
+    def get_range(self, start: int, end: int) -> List[Tuple[int, np.ndarray]]:
+        """
+        Get all buffered frames in a frame range.
+
+        Args:
+            start: First frame number (inclusive)
+            end: Last frame number (inclusive)
+
+        Returns:
+            List of (frame_number, frame) in frame order; frames that
+            were never buffered or have been overwritten are skipped
+        """
+        numbers = self._frame_numbers
+        slots = np.flatnonzero((numbers >= start) & (numbers <= end))
+        slots = slots[np.argsort(numbers[slots], kind="stable")]
+        return [(int(numbers[slot]), self._load(slot)) for slot in slots]
+
+    def frame_range(self) -> Optional[Tuple[int, int]]:
+        """(oldest, newest) buffered frame numbers, or None if empty."""
+        if self._count == 0:
+            return None
+        valid = self._frame_numbers[self._frame_numbers >= 0]
+        return int(valid.min()), int(valid.max())
+
+    def clear(self):
+        """Drop all frames (raw storage is kept for reuse)."""
+        self._frame_numbers.fill(-1)
+        self._encoded = [None] * self.capacity
+        self._encoded_bytes = 0
+        self._next = 0
+        self._count = 0
+
+    def _stored_size(self, frame: np.ndarray) -> Tuple[int, int]:
+        h, w = frame.shape[:2]
+        if self.scale == 1.0:
+            return w, h
+        return max(1, int(round(w * self.scale))), max(1, int(round(h * self.scale)))
+
+    def _ensure_raw_storage(self, frame: np.ndarray):
+        """Allocate the raw array, or reallocate if the frame size changed."""
+        w, h = self._stored_size(frame)
+        shape = (h, w) + frame.shape[2:]
+
+        if self._frames is not None and self._frames.shape[1:] == shape:
+            return
+
+        if self._frames is not None:
+            logger.warning("Frame size changed; clearing frame buffer")
+            self.clear()
+        self._frames = np.empty((self.capacity,) + shape, dtype=np.uint8)
+
+    def _store_raw(self, slot: int, frame: np.ndarray):
+        w, h = self._stored_size(frame)
+        if (w, h) == (frame.shape[1], frame.shape[0]):
+            np.copyto(self._frames[slot], frame)
+        else:
+            cv2.resize(frame, (w, h), dst=self._frames[slot], interpolation=cv2.INTER_AREA)
+
+    def _store_encoded(self, slot: int, frame: np.ndarray):
+        w, h = self._stored_size(frame)
+        if (w, h) != (frame.shape[1], frame.shape[0]):
+            frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+
+        ok, encoded = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+
+        old = self._encoded[slot]
+        if old is not None:
+            self._encoded_bytes -= old.nbytes
+        self._encoded[slot] = encoded
+        self._encoded_bytes += encoded.nbytes
+
+    def _load(self, slot: int) -> np.ndarray:
+        if self.mode == "raw":
+            return self._frames[slot].copy()
+        return cv2.imdecode(self._encoded[slot], cv2.IMREAD_UNCHANGED)
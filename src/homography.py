@@ -6,7 +6,7 @@ Uses field line detection and perspective transformation.
 """
 
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 import cv2
 
@@ -299,31 +299,47 @@ class FieldHomography:
         Returns:
             Pitch coordinates (x, y) in meters or None
         """
-        if H is None:
-            H = self.H
+        pitch_x, pitch_y = self.transform_points([[x, y]], H)[0]
         
-        if H is None:
+        if np.isnan(pitch_x):
             return None
         
-        # Transform point
-        point = np.array([[[x, y]]], dtype=np.float32)
-        transformed = cv2.perspectiveTransform(point, H)
-        
-        # Convert from template to pitch coordinates
-        tx, ty = transformed[0][0]
-        
-        pitch_x = tx / self.template_scale - self.pitch.length / 2
-        pitch_y = ty / self.template_scale - self.pitch.width / 2
-        
-        return (pitch_x, pitch_y)
+        return (float(pitch_x), float(pitch_y))
     
     def transform_points(
         self,
-        points: List[Tuple[float, float]],
+        points: Union[np.ndarray, List[Tuple[float, float]]],
         H: np.ndarray = None
-    ) -> List[Optional[Tuple[float, float]]]:
-        """Transform multiple points."""
-        return [self.transform_point(p[0], p[1], H) for p in points]
+    ) -> np.ndarray:
+        """
+        Transform image points to pitch coordinates in one pass.
+        
+        Args:
+            points: Nx2 array (or list of (x, y)) of image coordinates
+            H: Optional homography matrix
+        
+        Returns:
+            Nx2 array of pitch coordinates in meters; rows are NaN when no
+            homography is available or the point maps to infinity
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        
+        if H is None:
+            H = self.H
+        
+        if H is None:
+            return np.full_like(points, np.nan)
+        
+        # Homogeneous projection: [x', y', w] = H @ [x, y, 1]
+        projected = points @ H[:, :2].T + H[:, 2]
+        w = projected[:, 2:3]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            template = np.where(np.abs(w) > 1e-12, projected[:, :2] / w, np.nan)
+        
+        # Convert from template to pitch coordinates
+        offset = np.array([self.pitch.length / 2, self.pitch.width / 2])
+        return template / self.template_scale - offset
     
     def is_in_penalty_area(
         self,
@@ -434,6 +450,125 @@ class FieldHomography:
         )
 
 
+class HomographyScheduler:
+    """
+    Decides when the homography has to be re-estimated.
+    
+    Broadcast cameras move slowly, so the cached matrix is reused until
+    either the camera has drifted by more than ``motion_threshold``
+    pixels since the last estimate, or ``interval`` frames have passed.
+    Camera motion is measured by phase correlation between small
+    grayscale thumbnails, which costs far less than line detection.
+    """
+    
+    def __init__(
+        self,
+        homography: FieldHomography,
+        interval: int = 30,
+        motion_threshold: float = 4.0,
+        probe_width: int = 160
+    ):
+        """
+        Initialize scheduler.
+        
+        Args:
+            homography: FieldHomography whose H/H_inv are cached
+            interval: Re-estimate at least every N frames (1 = every frame)
+            motion_threshold: Camera shift in full-resolution pixels that
+                              triggers re-estimation
+            probe_width: Width of the thumbnail used for motion probing
+        """
+        self.homography = homography
+        self.interval = max(1, interval)
+        self.motion_threshold = motion_threshold
+        self.probe_width = probe_width
+        
+        self.reference: Optional[np.ndarray] = None
+        self.frames_since_estimate = 0
+        self.last_motion = 0.0
+        self.frames_seen = 0
+        self.estimates = 0
+        self._window: Optional[np.ndarray] = None
+    
+    def update(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Return the homography for this frame, re-estimating if needed.
+        
+        Args:
+            frame: BGR image
+        
+        Returns:
+            3x3 homography matrix or None
+        """
+        self.frames_seen += 1
+        self.frames_since_estimate += 1
+        
+        if self.interval == 1:
+            return self._estimate(frame, None)
+        
+        probe = self._make_probe(frame)
+        
+        if self.homography.H is None or self.reference is None:
+            return self._estimate(frame, probe)
+        
+        if self.frames_since_estimate >= self.interval:
+            return self._estimate(frame, probe)
+        
+        (dx, dy), _ = cv2.phaseCorrelate(self.reference, probe)
+        scale = frame.shape[1] / self.probe_width
+        self.last_motion = float(np.hypot(dx, dy) * scale)
+        
+        if self.last_motion > self.motion_threshold:
+            return self._estimate(frame, probe)
+        
+        return self.homography.H
+    
+    def _estimate(self, frame: np.ndarray, probe: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        H = self.homography.estimate(frame)
+        self.reference = probe
+        self.frames_since_estimate = 0
+        self.last_motion = 0.0
+        self.estimates += 1
+        return H
+    
+    def _make_probe(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Small windowed float32 grayscale thumbnail for phase correlation.
+        
+        The Hanning window is applied here rather than passed to
+        cv2.phaseCorrelate, which would apply it to the cached reference
+        in place on every call.
+        """
+        h, w = frame.shape[:2]
+        probe_height = max(1, int(round(h * self.probe_width / w)))
+        
+        small = cv2.resize(frame, (self.probe_width, probe_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        
+        if self._window is None or self._window.shape != small.shape:
+            self._window = cv2.createHanningWindow(
+                (self.probe_width, probe_height), cv2.CV_32F
+            )
+        
+        return small.astype(np.float32) * self._window
+    
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of frames that reused the cached matrix."""
+        if self.frames_seen == 0:
+            return 0.0
+        return 1.0 - self.estimates / self.frames_seen
+    
+    def reset(self):
+        """Forget the reference thumbnail and counters."""
+        self.reference = None
+        self.frames_since_estimate = 0
+        self.last_motion = 0.0
+        self.frames_seen = 0
+        self.estimates = 0
+
+
 if __name__ == "__main__":
     # Test homography
     homography = FieldHomography()
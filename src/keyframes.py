@@ -0,0 +1,144 @@
+"""
+Keyframe Scheduling Module
+
+Decides on which frames the detector runs when tracks are propagated in
+between. The interval adapts to player motion: association by IoU only
+works while a box moves less than a fraction of its own height between
+detections, so fast play shortens the interval and slow play stretches
+it up to the configured maximum. The detector also runs every frame
+while the ball does not follow its prediction (a kick or a deflection),
+since a propagated ball would hide the change of velocity.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .tracking import TrackedObject
+
+
+class KeyframeScheduler:
+    """
+    Adaptive detect-every-k-frames schedule.
+
+    Call ``due`` before each frame, then ``detected`` or ``propagated``
+    depending on what ran. Frames the caller forces to be detected (pass
+    or contact candidates) are counted separately.
+    """
+
+    def __init__(
+        self,
+        max_interval: int = 4,
+        max_displacement: float = 0.5,
+        max_lost_ratio: float = 0.2,
+        ball_tolerance: float = 0.1,
+        ball_settle_frames: int = 3
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_interval: Longest gap between detections (1 = every frame)
+            max_displacement: Largest move (in box heights) a player may
+                              make between two detections
+            max_lost_ratio: Detect every frame while more than this
+                            fraction of tracks missed the last detection
+            ball_tolerance: Detect every frame while the detected ball is
+                            further than this (in box heights) from its
+                            prediction, or a tracked ball was missed
+            ball_settle_frames: Consecutive agreeing ball detections
+                                needed before frames are skipped again
+        """
+        self.max_interval = max(1, max_interval)
+        self.max_displacement = max_displacement
+        self.max_lost_ratio = max_lost_ratio
+        self.ball_tolerance = ball_tolerance
+        self.ball_settle_frames = ball_settle_frames
+        self._ball_unsettled = 0
+
+        self.interval = 1
+        self.frames_since_detection = 0
+
+        self.detected_frames = 0
+        self.propagated_frames = 0
+        self.forced_frames = 0
+
+    def due(self) -> bool:
+        """Whether the schedule calls for detection on the next frame."""
+        return self.frames_since_detection + 1 >= self.interval
+
+    def detected(
+        self,
+        tracks: List[TrackedObject],
+        forced: bool = False,
+        ball_innovation: Optional[float] = None,
+        ball_missed: bool = False
+    ):
+        """
+        Record a detected frame and choose the next interval.
+
+        Args:
+            tracks: Live tracks after correction
+            forced: Detection was requested outside the schedule
+            ball_innovation: Distance (pixels) between the detected ball
+                             and its prediction, if both exist
+            ball_missed: A tracked ball was not detected
+        """
+        self.detected_frames += 1
+        self.forced_frames += int(forced)
+        self.frames_since_detection = 0
+        self.interval = self._next_interval(tracks, ball_innovation, ball_missed)
+
+    def propagated(self):
+        """Record a frame analyzed on propagated tracks."""
+        self.propagated_frames += 1
+        self.frames_since_detection += 1
+
+    @property
+    def detection_ratio(self) -> float:
+        """Fraction of frames the detector ran on."""
+        total = self.detected_frames + self.propagated_frames
+        return self.detected_frames / total if total else 1.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'detected_frames': self.detected_frames,
+            'propagated_frames': self.propagated_frames,
+            'forced_frames': self.forced_frames,
+            'detection_ratio': round(self.detection_ratio, 3),
+            'interval': self.interval
+        }
+
+    def _next_interval(
+        self,
+        tracks: List[TrackedObject],
+        ball_innovation: Optional[float],
+        ball_missed: bool
+    ) -> int:
+        if self.max_interval == 1 or not tracks:
+            return 1
+
+        # A surprising (or missing) ball needs a few agreeing detections
+        # before its velocity can be trusted for propagation again
+        heights = np.array([max(t.bbox[3] - t.bbox[1], 1.0) for t in tracks])
+        if ball_missed or (
+            ball_innovation is not None and
+            ball_innovation > self.ball_tolerance * float(np.median(heights))
+        ):
+            self._ball_unsettled = self.ball_settle_frames
+        elif self._ball_unsettled > 0:
+            self._ball_unsettled -= 1
+        if self._ball_unsettled > 0:
+            return 1
+
+        lost = sum(1 for t in tracks if t.time_since_update > 0)
+        if lost > self.max_lost_ratio * len(tracks):
+            return 1
+
+        speeds = np.array([np.hypot(*t.velocity) for t in tracks]) / heights
+
+        # The fastest players (90th percentile) set the pace
+        speed = float(np.percentile(speeds, 90))
+        if speed <= 0:
+            return self.max_interval
+        return int(np.clip(self.max_displacement // speed, 1, self.max_interval))
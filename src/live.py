@@ -0,0 +1,460 @@
+"""
+Live Stream Module
+
+Real-time VAR analysis of a live feed: a capture URL (RTSP/HTTP/UDP), a
+camera index, a named pipe, or raw BGR frames on stdin. A grabber thread
+keeps reading the source while frames are analyzed; when analysis falls
+behind, the drop policy decides which frames are skipped, so decisions
+are made on recent frames instead of an ever-growing backlog.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Callable, Deque, Dict, Optional, Tuple
+import argparse
+
+import cv2
+import numpy as np
+from loguru import logger
+
+
+# "latest": drop the oldest queued frame to make room (bounded latency)
+# "block": stop reading until there is room (no drops, latency can grow)
+DROP_POLICIES = ("latest", "block")
+
+
+class RawFrameReader:
+    """
+    Reads fixed-size raw BGR frames from a binary stream.
+
+    Mirrors the ``read``/``release`` interface of cv2.VideoCapture, e.g.
+    for ``ffmpeg -i <feed> -f rawvideo -pix_fmt bgr24 -`` piped to stdin
+    or written to a named pipe.
+    """
+
+    def __init__(self, stream: BinaryIO, width: int, height: int, channels: int = 3):
+        """
+        Initialize reader.
+
+        Args:
+            stream: Binary stream to read from
+            width: Frame width in pixels
+            height: Frame height in pixels
+            channels: Bytes per pixel (3 for bgr24)
+        """
+        self.stream = stream
+        self.shape = (height, width, channels)
+        self.frame_bytes = width * height * channels
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Read the next frame; returns (False, None) at end of stream."""
+        buffer = bytearray(self.frame_bytes)
+        view = memoryview(buffer)
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.stream.readinto(view[filled:])
+            if not n:
+                return False, None
+            filled += n
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.shape)
+
+    def get(self, prop: int) -> float:
+        return 0.0
+
+    def release(self):
+        if self.stream is not sys.stdin.buffer:
+            self.stream.close()
+
+
+def open_source(source: str, frame_size: Optional[Tuple[int, int]] = None):
+    """
+    Open a live source.
+
+    Args:
+        source: Capture URL, camera index, file/named pipe path, or "-"
+                for stdin
+        frame_size: (width, height) of raw BGR frames; required for "-"
+                    and selects raw reading for a path
+
+    Returns:
+        Object with cv2.VideoCapture-style read()/get()/release()
+    """
+    if source == "-" or frame_size is not None:
+        if frame_size is None:
+            raise ValueError("Raw frames on stdin need a frame size")
+        stream = sys.stdin.buffer if source == "-" else open(source, 'rb', buffering=0)
+        return RawFrameReader(stream, *frame_size)
+
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open source: {source}")
+    return capture
+
+
+@dataclass
+class LiveFrame:
+    """A frame taken from the source, stamped when it was read."""
+    frame_number: int
+    frame: np.ndarray
+    captured_at: float
+
+
+class FrameQueue:
+    """Bounded hand-off from the grabber to the analysis loop."""
+
+    def __init__(self, maxsize: int = 1, policy: str = "latest"):
+        """
+        Initialize queue.
+
+        Args:
+            maxsize: Frames held while analysis is busy
+            policy: One of DROP_POLICIES
+        """
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+
+        self._items: Deque[LiveFrame] = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item: LiveFrame) -> bool:
+        """Add a frame; returns False once the queue is closed."""
+        with self._cond:
+            if self.policy == "block":
+                while len(self._items) >= self.maxsize and not self.closed:
+                    self._cond.wait()
+            elif len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+
+            if self.closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self) -> Optional[LiveFrame]:
+        """Oldest queued frame; None once closed and drained."""
+        with self._cond:
+            while not self._items and not self.closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self, drain: bool = True):
+        """Stop accepting frames (and drop queued ones unless drain)."""
+        with self._cond:
+            self.closed = True
+            if not drain:
+                self._items.clear()
+            self._cond.notify_all()
+
+
+class LatencyStats:
+    """End-to-end latency over a sliding window of recent frames."""
+
+    def __init__(self, budget_ms: Optional[float] = None, window: int = 1000):
+        """
+        Initialize stats.
+
+        Args:
+            budget_ms: Latency budget; frames above it are counted
+            window: Number of recent frames the percentiles cover
+        """
+        self.budget_ms = budget_ms
+        self.frames = 0
+        self.over_budget = 0
+        self._latency: Deque[float] = deque(maxlen=window)
+        self._processing: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float, processing_ms: float):
+        self.frames += 1
+        self._latency.append(latency_ms)
+        self._processing.append(processing_ms)
+        if self.budget_ms is not None and latency_ms > self.budget_ms:
+            self.over_budget += 1
+
+    def summary(self) -> Dict[str, float]:
+        """Frame count, latency percentiles and mean processing time (ms)."""
+        if not self._latency:
+            return {'frames': self.frames}
+
+        latency = np.fromiter(self._latency, dtype=np.float64)
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        summary = {
+            'frames': self.frames,
+            'latency_p50_ms': round(float(p50), 2),
+            'latency_p95_ms': round(float(p95), 2),
+            'latency_p99_ms': round(float(p99), 2),
+            'latency_max_ms': round(float(latency.max()), 2),
+            'processing_mean_ms': round(float(np.mean(self._processing)), 2)
+        }
+        if self.budget_ms is not None:
+            summary['over_budget'] = self.over_budget
+        return summary
+
+
+class LiveProcessor:
+    """
+    Runs a VARPipeline on a live source with bounded latency.
+
+    Frames are numbered in source order, including dropped ones, so
+    incident timestamps follow the stream clock. Latency is measured from
+    the moment a frame is read from the source to the moment its
+    decision is available.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        source: str,
+        frame_size: Optional[Tuple[int, int]] = None,
+        fps: Optional[float] = None,
+        drop_policy: str = "latest",
+        queue_size: int = 1,
+        latency_budget_ms: Optional[float] = None,
+        on_incident: Optional[Callable[[Dict[str, Any]], None]] = None,
+        log_interval: int = 300
+    ):
+        """
+        Initialize processor.
+
+        Args:
+            pipeline: VARPipeline used for analysis
+            source: See open_source
+            frame_size: (width, height) for raw frame sources
+            fps: Stream frame rate (read from the source if omitted)
+            drop_policy: One of DROP_POLICIES
+            queue_size: Frames held while analysis is busy
+            latency_budget_ms: Budget reported against in the stats
+            on_incident: Called with each incident dict as it is decided
+            log_interval: Frames between latency log lines (0 = off)
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.pipeline = pipeline
+        self.source = source
+        self.frame_size = frame_size
+        self.fps = fps
+        self.drop_policy = drop_policy
+        self.queue_size = queue_size
+        self.on_incident = on_incident
+        self.log_interval = log_interval
+
+        self.stats = LatencyStats(latency_budget_ms)
+        self.dropped_frames = 0
+
+        self._stop = threading.Event()
+        self._frames: Optional[FrameQueue] = None
+        self._grab_error: Optional[BaseException] = None
+
+    def run(self) -> Dict[str, float]:
+        """
+        Analyze the source until it ends or stop() is called.
+
+        Returns:
+            Latency summary (see LatencyStats.summary) plus dropped frames
+        """
+        capture = open_source(self.source, self.frame_size)
+        fps = self.fps or capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pipeline.fps = fps
+        if self.pipeline.use_var_engine:
+            self.pipeline.var_engine.fps = fps
+
+        self._stop.clear()
+        self._grab_error = None
+        self._frames = FrameQueue(self.queue_size, self.drop_policy)
+
+        grabber = threading.Thread(
+            target=self._grab, args=(capture, self._frames),
+            name="var-grab", daemon=True
+        )
+
+        logger.info(f"Live: {self.source} @ {fps:.1f} fps, drop policy '{self.drop_policy}'")
+        grabber.start()
+        try:
+            while not self._stop.is_set():
+                item = self._frames.get()
+                if item is None:
+                    break
+                self._analyze(item)
+        finally:
+            self._stop.set()
+            self._frames.close(drain=False)
+            # A blocked read on a stalled feed must not hang shutdown
+            grabber.join(timeout=1.0)
+            capture.release()
+
+        if self._grab_error is not None:
+            raise self._grab_error
+
+        summary = self.summary()
+        logger.info(f"Live session ended: {summary}")
+        return summary
+
+    def stop(self):
+        """Stop after the frame being analyzed (safe from any thread)."""
+        self._stop.set()
+        if self._frames is not None:
+            self._frames.close(drain=False)
+
+    def summary(self) -> Dict[str, float]:
+        summary = self.stats.summary()
+        summary['dropped_frames'] = self._frames.dropped if self._frames else 0
+        return summary
+
+    async def incidents(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run on a worker thread and yield incidents as they are decided.
+
+        Leaving the loop early stops the processor.
+        """
+        loop = asyncio.get_running_loop()
+        pending: "asyncio.Queue" = asyncio.Queue()
+        end = object()
+        callback = self.on_incident
+
+        def forward(incident: Dict[str, Any]):
+            if callback:
+                callback(incident)
+            loop.call_soon_threadsafe(pending.put_nowait, incident)
+
+        self.on_incident = forward
+        runner = loop.run_in_executor(None, self.run)
+        runner.add_done_callback(lambda _: pending.put_nowait(end))
+
+        try:
+            while True:
+                incident = await pending.get()
+                if incident is end:
+                    break
+                yield incident
+        finally:
+            self.stop()
+            self.on_incident = callback
+            await runner
+
+    def _grab(self, capture, frames: FrameQueue):
+        frame_number = 0
+        try:
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if not frames.put(LiveFrame(frame_number, frame, time.perf_counter())):
+                    break
+                frame_number += 1
+        except BaseException as e:
+            logger.error(f"Live source failed: {e}")
+            self._grab_error = e
+        finally:
+            frames.close()
+
+    def _analyze(self, item: LiveFrame):
+        start = time.perf_counter()
+        result = self.pipeline.process_frame(item.frame, item.frame_number)
+        done = time.perf_counter()
+
+        # A live session has no end; only the incident lists are kept
+        self.pipeline.frame_results.clear()
+        if self.pipeline.trajectories is not None:
+            self.pipeline.trajectories.clear()
+
+        latency_ms = (done - item.captured_at) * 1000
+        self.stats.record(latency_ms, (done - start) * 1000)
+
+        if self.on_incident:
+            for incident in result.var_incidents:
+                incident_dict = incident.to_dict()
+                incident_dict['latency_ms'] = round(latency_ms, 2)
+                self.on_incident(incident_dict)
+
+        if self.log_interval and self.stats.frames % self.log_interval == 0:
+            logger.info(f"   Live @ {item.frame_number}: {self.summary()}")
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(
+        description='Real-time VAR analysis of a live feed'
+    )
+    parser.add_argument('--source', required=True,
+                        help='Capture URL, camera index, named pipe, or - for stdin')
+    parser.add_argument('--raw-size', type=_parse_size,
+                        help='WIDTHxHEIGHT of raw bgr24 frames (stdin / named pipe)')
+    parser.add_argument('--fps', type=float, help='Stream frame rate (default: from source)')
+    parser.add_argument('--drop-policy', choices=DROP_POLICIES,
+                        help='What to do when analysis falls behind (default: latest)')
+    parser.add_argument('--queue-size', type=int,
+                        help='Frames held while analysis is busy (default: 1)')
+    parser.add_argument('--latency-budget-ms', type=float,
+                        help='Latency budget reported in the stats (default: 30)')
+    parser.add_argument('--output', help='Append incidents to this JSON-lines file')
+    parser.add_argument('--use-roboflow', action='store_true', help='Use Roboflow API')
+    parser.add_argument('--device', help='Device: cuda, mps, cpu or auto (default: cpu)')
+    parser.add_argument('--config', metavar='YAML',
+                        help='Settings file laid out like configs/config.yaml (flags override it)')
+
+    args = parser.parse_args()
+
+    from .config import load_config
+    from .pipeline import VARPipeline
+
+    config = load_config(args.config) if args.config else {}
+    device = args.device or config.pop('device', None) or 'cpu'
+    if device == 'auto':
+        device = None
+
+    output = open(args.output, 'a') if args.output else None
+
+    def emit(incident: Dict[str, Any]):
+        line = json.dumps(incident, default=str)
+        print(line, flush=True)
+        if output:
+            output.write(line + "\n")
+            output.flush()
+
+    processor = LiveProcessor(
+        VARPipeline(config=config, use_roboflow=args.use_roboflow, device=device),
+        args.source,
+        frame_size=args.raw_size,
+        fps=args.fps,
+        drop_policy=args.drop_policy or config.get('live_drop_policy', 'latest'),
+        queue_size=args.queue_size if args.queue_size is not None
+        else config.get('live_queue_size', 1),
+        latency_budget_ms=args.latency_budget_ms if args.latency_budget_ms is not None
+        else config.get('live_latency_budget_ms', 30.0),
+        on_incident=emit
+    )
+
+    try:
+        processor.run()
+    except KeyboardInterrupt:
+        processor.stop()
+    finally:
+        if output:
+            output.close()
+
+    print(json.dumps(processor.summary()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
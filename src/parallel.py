@@ -0,0 +1,585 @@
+"""
+Parallel Video Processing Module
+
+Splits one match video into time chunks and analyzes them in separate
+processes, each with its own detector, tracker and VAR engine. Every
+chunk starts a little early (the warm-up overlap) so tracks, team colors
+and the homography are settled by the first frame it owns. The overlap
+frames, seen by both neighbouring chunks, are used to carry track IDs
+and team labels across the boundary before incidents are merged.
+"""
+
+import copy
+import math
+import multiprocessing
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+from scipy.optimize import linear_sum_assignment
+
+from .tracking import box_iou_matrix
+from .pipeline import (
+    VARPipeline, VideoResult, FrameResult, save_incidents, save_timings, export_trajectories
+)
+from .timing import LatencyHistogram, StageTimer
+from .trajectory_store import TrajectoryStore, TEAM_NAMES, TEAM_CODES
+from .clip_export import export_incident_clips
+from .detection_cache import video_digest
+
+
+# Labels that are renamed when team colors are matched across chunks
+TEAM_LABELS = ("team_a", "team_b")
+
+# Track observations on one frame: (track_id, bbox, team label)
+FrameTracks = List[Tuple[int, Tuple[float, float, float, float], str]]
+
+_PLAYER_REF = re.compile(r"\bPlayer (\d+)\b")
+
+
+@dataclass
+class ChunkSpec:
+    """A chunk of frames and the warm-up processed before it."""
+    index: int
+    start: int          # first owned frame
+    end: int            # one past the last owned frame
+    warmup_start: int   # first processed frame (<= start)
+
+    @property
+    def owned_frames(self) -> int:
+        return self.end - self.start
+
+    @property
+    def processed_frames(self) -> int:
+        return self.end - self.warmup_start
+
+
+@dataclass
+class ChunkResult:
+    """What a worker sends back for one chunk (all plain, picklable data)."""
+    spec: ChunkSpec
+    offside_incidents: List[Dict] = field(default_factory=list)
+    foul_incidents: List[Dict] = field(default_factory=list)
+    penalty_incidents: List[Dict] = field(default_factory=list)
+    head_tracks: Dict[int, FrameTracks] = field(default_factory=dict)
+    tail_tracks: Dict[int, FrameTracks] = field(default_factory=dict)
+    max_track_id: int = 0
+    processed_frames: int = 0
+    processing_time: float = 0.0
+    timings: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    # Trajectory columns (players, per-frame) of the owned frames, when exported
+    trajectories: Optional[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]] = None
+
+
+def plan_chunks(
+    total_frames: int,
+    chunk_frames: int,
+    overlap_frames: int,
+    start_frame: int = 0
+) -> List[ChunkSpec]:
+    """
+    Split a frame range into consecutive chunks.
+
+    Args:
+        total_frames: Number of frames to cover
+        chunk_frames: Frames owned by each chunk (the last may be shorter)
+        overlap_frames: Warm-up frames processed before each chunk's start
+        start_frame: First frame of the range
+
+    Returns:
+        Chunks in frame order
+    """
+    chunk_frames = max(1, int(chunk_frames))
+    overlap_frames = max(0, int(overlap_frames))
+    end_frame = start_frame + total_frames
+
+    chunks = []
+    for index, start in enumerate(range(start_frame, end_frame, chunk_frames)):
+        chunks.append(ChunkSpec(
+            index=index,
+            start=start,
+            end=min(start + chunk_frames, end_frame),
+            warmup_start=max(start_frame, start - overlap_frames)
+        ))
+    return chunks
+
+
+def _init_worker(threads: int):
+    """Keep each worker from spawning a thread per core."""
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def process_chunk(
+    video_path: str,
+    spec: ChunkSpec,
+    overlap_frames: int,
+    config: Dict[str, Any] = None,
+    use_roboflow: bool = False,
+    device: str = "cpu"
+) -> ChunkResult:
+    """
+    Analyze one chunk with a fresh pipeline (runs in a worker process).
+
+    Args:
+        video_path: Path to input video
+        spec: Chunk to process
+        overlap_frames: Frames recorded at the end of the chunk for
+                        stitching with the next one
+        config: Pipeline configuration
+        use_roboflow: Whether to use Roboflow for detection
+        device: Device for inference
+
+    Returns:
+        Incidents on the owned frames plus track observations on the
+        warm-up frames and on the frames the next chunk warms up on
+    """
+    result = ChunkResult(spec=spec)
+    tail_start = max(spec.start, spec.end - overlap_frames)
+
+    def record(frame_result: FrameResult):
+        frame_number = frame_result.frame_number
+        if frame_number < spec.start:
+            target = result.head_tracks
+        elif frame_number >= tail_start:
+            target = result.tail_tracks
+        else:
+            return
+        target[frame_number] = [
+            (
+                obj.track_id,
+                tuple(float(v) for v in obj.bbox),
+                frame_result.team_assignments.get(obj.track_id, "unknown")
+            )
+            for obj in frame_result.tracked_objects
+        ]
+
+    pipeline = VARPipeline(config=config, use_roboflow=use_roboflow, device=device)
+    video = pipeline.process_video(
+        video_path,
+        output_dir=None,
+        save_video=False,
+        save_pitch_view=False,
+        max_frames=spec.processed_frames,
+        export_clips=False,
+        start_frame=spec.warmup_start,
+        result_callback=record
+    )
+
+    def owned(incidents: List[Dict]) -> List[Dict]:
+        return [i for i in incidents if spec.start <= i['frame'] < spec.end]
+
+    result.offside_incidents = owned(video.offside_incidents)
+    result.foul_incidents = owned(video.foul_incidents)
+    result.penalty_incidents = owned(video.penalty_incidents)
+    result.max_track_id = pipeline.tracker.next_id - 1
+    result.processed_frames = max(0, video.processed_frames - (spec.start - spec.warmup_start))
+    result.processing_time = video.processing_time
+    result.timings = pipeline.timer.histograms
+
+    store = pipeline.trajectories
+    if store is not None and config and config.get('trajectory_export'):
+        result.trajectories = (store.players(spec.start, spec.end), store.ball(spec.start, spec.end))
+    if store is not None:
+        store.close()
+    return result
+
+
+def match_track_ids(
+    previous: Dict[int, FrameTracks],
+    current: Dict[int, FrameTracks],
+    min_iou: float = 0.5,
+    min_agreement: float = 0.5
+) -> Dict[int, int]:
+    """
+    Match track IDs of two chunks over the frames both processed.
+
+    Boxes are matched per frame by IoU; a track pair is accepted when it
+    was matched on at least ``min_agreement`` of the frames where both
+    tracks were present.
+
+    Args:
+        previous: Frame -> tracks of the earlier chunk
+        current: Frame -> tracks of the later chunk
+        min_iou: Minimum box IoU for a per-frame match
+        min_agreement: Minimum fraction of co-visible frames matched
+
+    Returns:
+        Mapping from current track ID to previous track ID
+    """
+    votes: Dict[Tuple[int, int], int] = defaultdict(int)
+    seen_prev: Dict[int, int] = defaultdict(int)
+    seen_cur: Dict[int, int] = defaultdict(int)
+
+    for frame_number, cur_tracks in current.items():
+        prev_tracks = previous.get(frame_number)
+        if not prev_tracks or not cur_tracks:
+            continue
+
+        for track_id, _, _ in prev_tracks:
+            seen_prev[track_id] += 1
+        for track_id, _, _ in cur_tracks:
+            seen_cur[track_id] += 1
+
+        iou = box_iou_matrix(
+            np.array([t[1] for t in cur_tracks], dtype=np.float32),
+            np.array([t[1] for t in prev_tracks], dtype=np.float32)
+        )
+        rows, cols = linear_sum_assignment(-iou)
+        for r, c in zip(rows, cols):
+            if iou[r, c] >= min_iou:
+                votes[(cur_tracks[r][0], prev_tracks[c][0])] += 1
+
+    if not votes:
+        return {}
+
+    # One-to-one assignment maximizing the number of agreeing frames
+    cur_ids = sorted({c for c, _ in votes})
+    prev_ids = sorted({p for _, p in votes})
+    counts = np.zeros((len(cur_ids), len(prev_ids)))
+    for (c, p), n in votes.items():
+        counts[cur_ids.index(c), prev_ids.index(p)] = n
+
+    mapping = {}
+    for r, c in zip(*linear_sum_assignment(-counts)):
+        cur_id, prev_id = cur_ids[r], prev_ids[c]
+        together = min(seen_cur[cur_id], seen_prev[prev_id])
+        if counts[r, c] > 0 and counts[r, c] >= min_agreement * together:
+            mapping[cur_id] = prev_id
+    return mapping
+
+
+def match_team_labels(
+    previous: Dict[int, FrameTracks],
+    current: Dict[int, FrameTracks],
+    id_map: Dict[int, int]
+) -> Dict[str, str]:
+    """
+    Match team labels of two chunks using the tracks matched between them.
+
+    Each chunk fits its own color model, so "team_a" in one chunk may be
+    "team_b" in the next.
+
+    Returns:
+        Mapping from current label to previous label (identity if the
+        overlap has no labelled players)
+    """
+    votes = np.zeros((len(TEAM_LABELS), len(TEAM_LABELS)))
+
+    for frame_number, cur_tracks in current.items():
+        prev_teams = {tid: team for tid, _, team in previous.get(frame_number, [])}
+        for track_id, _, team in cur_tracks:
+            prev_team = prev_teams.get(id_map.get(track_id))
+            if team in TEAM_LABELS and prev_team in TEAM_LABELS:
+                votes[TEAM_LABELS.index(team), TEAM_LABELS.index(prev_team)] += 1
+
+    rows, cols = linear_sum_assignment(-votes)
+    if votes[rows, cols].sum() < votes.sum() / 2:
+        logger.warning("Team labels disagree across chunk boundary; keeping them as is")
+        return {label: label for label in TEAM_LABELS}
+    return {TEAM_LABELS[r]: TEAM_LABELS[c] for r, c in zip(rows, cols)}
+
+
+class ChunkStitcher:
+    """
+    Renames chunk-local track IDs and team labels to match-wide ones.
+
+    Chunks must be added in frame order. The first chunk keeps its IDs;
+    later tracks continue a matched track from the previous chunk or get
+    a new ID.
+    """
+
+    def __init__(self, min_iou: float = 0.5):
+        self.min_iou = min_iou
+        self.next_id = 1
+        self.stitched_tracks = 0
+
+        self._prev_tail: Dict[int, FrameTracks] = {}
+        self._id_map: Dict[int, int] = {}
+        self._team_map: Dict[str, str] = {}
+
+    def add(self, chunk: ChunkResult):
+        """Set up the renaming for the next chunk."""
+        if chunk.spec.index == 0 or not self._prev_tail:
+            id_map = {tid: tid for tid in range(1, chunk.max_track_id + 1)}
+            team_map = {label: label for label in TEAM_LABELS}
+        else:
+            matches = match_track_ids(self._prev_tail, chunk.head_tracks, self.min_iou)
+            id_map = {cur: self._id_map[prev] for cur, prev in matches.items()}
+            labels = match_team_labels(self._prev_tail, chunk.head_tracks, matches)
+            team_map = {cur: self._team_map[prev] for cur, prev in labels.items()}
+            self.stitched_tracks += len(matches)
+
+        for track_id in range(1, chunk.max_track_id + 1):
+            if track_id not in id_map:
+                id_map[track_id] = self.next_id
+                self.next_id += 1
+            self.next_id = max(self.next_id, id_map[track_id] + 1)
+
+        self._id_map = id_map
+        self._team_map = team_map
+        self._prev_tail = chunk.tail_tracks
+
+    def track_id(self, track_id: int) -> int:
+        return self._id_map.get(track_id, track_id)
+
+    def team(self, label: Optional[str]) -> Optional[str]:
+        return self._team_map.get(label, label)
+
+    def players(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Trajectory player columns with match-wide IDs and team codes."""
+        columns = dict(columns)
+
+        unique, inverse = np.unique(columns['track_id'], return_inverse=True)
+        renamed = np.array([self.track_id(int(t)) for t in unique], dtype=np.int32)
+        columns['track_id'] = renamed[inverse]
+
+        # The last entry maps code -1 ("unknown") to itself
+        codes = [TEAM_CODES.get(self.team(name), -1) for name in TEAM_NAMES] + [-1]
+        columns['team'] = np.array(codes, dtype=np.int8)[columns['team']]
+        return columns
+
+    def incident(self, incident: Dict) -> Dict:
+        """Copy of an incident dict with match-wide IDs and labels."""
+        incident = copy.deepcopy(incident)
+
+        def rename(match) -> str:
+            return f"Player {self.track_id(int(match.group(1)))}"
+
+        incident['players'] = [self.track_id(p) for p in incident.get('players', [])]
+        incident['team_with_ball'] = self.team(incident.get('team_with_ball'))
+        if incident.get('description'):
+            incident['description'] = _PLAYER_REF.sub(rename, incident['description'])
+
+        declaration = incident.get('declaration')
+        if declaration:
+            for key in ('rationale', 'short_summary', 'recommendation'):
+                if isinstance(declaration.get(key), str):
+                    declaration[key] = _PLAYER_REF.sub(rename, declaration[key])
+            for analysis in declaration.get('position_analysis', []):
+                analysis['player_id'] = self.track_id(analysis['player_id'])
+
+        return incident
+
+
+def deduplicate_incidents(incidents: List[Dict]) -> List[Dict]:
+    """Drop repeated (type, frame, players) incidents, keeping frame order."""
+    seen = set()
+    unique = []
+    for incident in sorted(incidents, key=lambda i: i['frame']):
+        key = (incident['type'], incident['frame'], tuple(sorted(incident['players'])))
+        if key not in seen:
+            seen.add(key)
+            unique.append(incident)
+    return unique
+
+
+def process_video_parallel(
+    video_path: str,
+    output_dir: str = None,
+    config: Dict[str, Any] = None,
+    use_roboflow: bool = False,
+    device: str = "cpu",
+    workers: int = None,
+    chunk_seconds: float = None,
+    overlap_seconds: float = None,
+    max_frames: int = None,
+    export_clips: bool = None
+) -> VideoResult:
+    """
+    Process a video in time chunks on a pool of worker processes.
+
+    Annotated and pitch-view videos and the Chrome trace are not written
+    in this mode; JSON results, stage timings, trajectories and incident
+    clips are.
+
+    Args:
+        video_path: Path to input video
+        output_dir: Directory for JSON results and clips
+        config: Pipeline configuration (also read for the defaults below)
+        use_roboflow: Whether to use Roboflow for detection
+        device: Device for inference in every worker
+        workers: Worker processes (defaults to config 'parallel_workers',
+                 then the CPU count)
+        chunk_seconds: Video time owned by each chunk (defaults to config
+                       'chunk_seconds', then an even split across workers)
+        overlap_seconds: Warm-up processed before each chunk (defaults to
+                         config 'chunk_overlap_seconds', then 5s)
+        max_frames: Maximum number of frames to process
+        export_clips: Write one MP4 per incident cluster to output_dir/clips
+                      (defaults to config 'export_clips')
+
+    Returns:
+        VideoResult with the merged incidents of all chunks
+    """
+    config = config or {}
+    if workers is None:
+        workers = config.get('parallel_workers') or os.cpu_count() or 1
+    if chunk_seconds is None:
+        chunk_seconds = config.get('chunk_seconds')
+    if overlap_seconds is None:
+        overlap_seconds = config.get('chunk_overlap_seconds', 5.0)
+    if export_clips is None:
+        export_clips = config.get('export_clips', True)
+
+    start_time = time.time()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    if max_frames:
+        total_frames = min(total_frames, max_frames)
+
+    overlap_frames = int(round(overlap_seconds * fps))
+    if chunk_seconds:
+        chunk_frames = int(round(chunk_seconds * fps))
+    else:
+        chunk_frames = math.ceil(total_frames / max(1, workers))
+
+    chunks = plan_chunks(total_frames, chunk_frames, overlap_frames)
+    workers = max(1, min(workers, len(chunks)))
+
+    # Workers only return trajectory columns, so FrameResults are not kept
+    worker_config = {**config, 'retain_frame_results': False}
+    if config.get('detection_cache_dir'):
+        # Workers share cached detections; chunk tracks cannot be stitched
+        # from a replay, so tracks are neither cached nor replayed
+        video_digest(config['detection_cache_dir'], video_path)
+        worker_config.update(detection_cache_tracks=False, reanalyze_from_cache=False)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    logger.info(f"Processing in parallel: {video_path}")
+    logger.info(
+        f"   {len(chunks)} chunks of {chunk_frames} frames, "
+        f"{overlap_frames} warm-up frames, {workers} workers x {threads} threads"
+    )
+
+    results: Dict[int, ChunkResult] = {}
+    # spawn: a forked worker would inherit CUDA and model state from the parent
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,)
+    ) as pool:
+        futures = [
+            pool.submit(
+                process_chunk, video_path, spec, overlap_frames,
+                worker_config, use_roboflow, device
+            )
+            for spec in chunks
+        ]
+        for future in as_completed(futures):
+            chunk = future.result()
+            results[chunk.spec.index] = chunk
+            logger.info(
+                f"   Chunk {chunk.spec.index + 1}/{len(chunks)} done "
+                f"(frames {chunk.spec.start}-{chunk.spec.end - 1}, "
+                f"{chunk.processing_time:.1f}s)"
+            )
+
+    stitcher = ChunkStitcher()
+    offside_incidents, foul_incidents, penalty_incidents = [], [], []
+    trajectories = TrajectoryStore(
+        spill_rows=config.get('trajectory_spill_rows', 0),
+        spill_dir=config.get('trajectory_spill_dir')
+    )
+    for index in range(len(chunks)):
+        chunk = results[index]
+        stitcher.add(chunk)
+        if chunk.trajectories is not None:
+            players, frames = chunk.trajectories
+            trajectories.extend(stitcher.players(players), frames)
+        offside_incidents += [stitcher.incident(i) for i in chunk.offside_incidents]
+        foul_incidents += [stitcher.incident(i) for i in chunk.foul_incidents]
+        penalty_incidents += [stitcher.incident(i) for i in chunk.penalty_incidents]
+
+    offside_incidents = deduplicate_incidents(offside_incidents)
+    foul_incidents = deduplicate_incidents(foul_incidents)
+    penalty_incidents = deduplicate_incidents(penalty_incidents)
+
+    incident_summary = {
+        'total_offsides': len(offside_incidents),
+        'total_fouls': len(foul_incidents),
+        'total_penalties': len(penalty_incidents)
+    }
+
+    if output_dir:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        save_incidents(
+            output_dir, incident_summary,
+            offside_incidents, foul_incidents, penalty_incidents
+        )
+
+        if export_clips:
+            # Penalties are listed under both fouls and penalties
+            clips = export_incident_clips(
+                video_path,
+                offside_incidents +
+                [i for i in foul_incidents if i.get('type') != 'penalty'] +
+                penalty_incidents,
+                output_dir / "clips",
+                gap=config.get('clip_merge_gap', 0)
+            )
+            logger.info(f"   Clips: {len(clips)} written to {output_dir / 'clips'}")
+
+        if config.get('trajectory_export'):
+            export_trajectories(trajectories, output_dir, config['trajectory_export'])
+    trajectories.close()
+
+    processing_time = time.time() - start_time
+    busy_time = sum(chunk.processing_time for chunk in results.values())
+    processed_frames = sum(chunk.processed_frames for chunk in results.values())
+
+    # Stage timings cover every processed frame, warm-up included
+    timer = StageTimer()
+    for chunk in results.values():
+        timer.merge(chunk.timings)
+    stage_timings = timer.summary()
+    if output_dir and stage_timings:
+        save_timings(output_dir, stage_timings, processed_frames, processing_time)
+
+    logger.info("=" * 60)
+    logger.info("PARALLEL PROCESSING COMPLETE")
+    logger.info(
+        f"   Time: {processing_time:.1f}s wall, {busy_time:.1f}s in workers "
+        f"({busy_time / max(processing_time, 1e-9):.1f}x)"
+    )
+    logger.info(f"   Tracks stitched across boundaries: {stitcher.stitched_tracks}")
+    logger.info(f"   Offsides: {len(offside_incidents)}")
+    logger.info(f"   Fouls: {len(foul_incidents)}")
+    logger.info(f"   Penalties: {len(penalty_incidents)}")
+    logger.info("=" * 60)
+
+    return VideoResult(
+        video_path=video_path,
+        total_frames=total_frames,
+        processed_frames=processed_frames,
+        fps=fps,
+        resolution=(width, height),
+        offside_incidents=offside_incidents,
+        foul_incidents=foul_incidents,
+        penalty_incidents=penalty_incidents,
+        processing_time=processing_time,
+        incident_summary=incident_summary,
+        stage_timings=stage_timings
+    )
@@ -9,19 +9,30 @@ Integrates all modules to process soccer video for VAR decisions:
 
 import numpy as np
 from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 import json
+import os
 import time
 import cv2
 from loguru import logger
 import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Import core modules
-from .detection import PlayerBallDetector, Detection, draw_detections
+from .detection import PlayerBallDetector, Detection, DetectionArrays, draw_detections
 from .tracking import MultiObjectTracker, BallTracker, TrackedObject, draw_tracks
 from .team_classifier import TeamClassifier, get_team_colors
-from .homography import FieldHomography, PitchDimensions
+from .homography import FieldHomography, PitchDimensions, HomographyScheduler
+from .keyframes import KeyframeScheduler
+from .ball_search import BallCropSearch
+from .timing import StageTimer, format_timings
+from .trajectory_store import TrajectoryStore, OFFSIDE_FLAG, FOUL_FLAG, PENALTY_FLAG
+from .detection_cache import DetectionCache, TrackTable, detector_fingerprint
+from .stages import StagedRunner, StageSpec, batched
+from .clip_export import ClipExporter
+from .checkpoint import CHECKPOINT_FILE, snapshot_state, write_checkpoint, load_checkpoint
+from .config import load_config
 
 # Import VAR detection engine
 try:
@@ -72,6 +83,85 @@ class VideoResult:
     penalty_incidents: List[Dict]
     processing_time: float
     incident_summary: Dict[str, int] = field(default_factory=dict)
+    stage_timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+@dataclass
+class _FrameOutputs:
+    """Per-run output sinks shared by the sequential and pipelined loops."""
+    video_writer: Optional[cv2.VideoWriter]
+    pitch_writer: Optional[cv2.VideoWriter]
+    team_colors: Dict[str, Tuple[int, int, int]]
+    total_frames: int
+    progress_callback: Any = None
+    result_callback: Any = None
+    clip_exporter: Optional[ClipExporter] = None
+    processed_frames: int = 0
+
+
+def save_incidents(
+    output_dir: Path,
+    incident_summary: Dict,
+    offside_incidents: List[Dict],
+    foul_incidents: List[Dict],
+    penalty_incidents: List[Dict]
+):
+    """Write incidents.json and one JSON file per incident type."""
+    with open(output_dir / "incidents.json", 'w') as f:
+        json.dump({
+            'summary': incident_summary,
+            'offside_incidents': offside_incidents,
+            'foul_incidents': foul_incidents,
+            'penalty_incidents': penalty_incidents
+        }, f, indent=2, default=str)
+    
+    if offside_incidents:
+        with open(output_dir / "offsides.json", 'w') as f:
+            json.dump(offside_incidents, f, indent=2, default=str)
+    
+    if foul_incidents:
+        with open(output_dir / "fouls.json", 'w') as f:
+            json.dump(foul_incidents, f, indent=2, default=str)
+    
+    if penalty_incidents:
+        with open(output_dir / "penalties.json", 'w') as f:
+            json.dump(penalty_incidents, f, indent=2, default=str)
+    
+    logger.info(f"Results saved to {output_dir}")
+
+
+def export_trajectories(
+    store: TrajectoryStore,
+    output_dir: Path,
+    export_format: str,
+    suffix: str = ""
+):
+    """Write trajectories.npz or a trajectories/ directory of Parquet files."""
+    if export_format == 'npz':
+        path = output_dir / f"trajectories{suffix}.npz"
+        store.to_npz(path)
+    elif export_format == 'parquet':
+        path = output_dir / f"trajectories{suffix}"
+        store.to_parquet(path)
+    else:
+        raise ValueError(f"Unknown trajectory export format: {export_format}")
+    logger.info(f"   Trajectories: {len(store)} rows written to {path}")
+
+
+def save_timings(
+    output_dir: Path,
+    stage_timings: Dict[str, Dict[str, float]],
+    processed_frames: int,
+    processing_time: float
+):
+    """Write timings.json with per-stage latency statistics."""
+    with open(output_dir / "timings.json", 'w') as f:
+        json.dump({
+            'processed_frames': processed_frames,
+            'processing_time_s': round(processing_time, 3),
+            'fps': round(processed_frames / processing_time, 2) if processing_time else 0.0,
+            'stages': stage_timings
+        }, f, indent=2)
 
 
 class VARPipeline:
@@ -89,27 +179,61 @@ class VARPipeline:
         self,
         config: Dict[str, Any] = None,
         use_roboflow: bool = False,
-        device: str = "cpu"
+        device: str = "cpu",
+        detector: Any = None
     ):
         """
         Initialize VAR pipeline.
         
         Args:
-            config: Configuration dictionary
+            config: Configuration dictionary (load_config reads one from YAML)
             use_roboflow: Whether to use Roboflow for detection
             device: Device for inference (cuda/mps/cpu)
+            detector: Use this detector instead of building one; it must
+                      have PlayerBallDetector's detect() (and optionally
+                      detect_batch() / detect_ball_arrays())
         """
         self.config = config or {}
         self.device = device
-        self.use_roboflow = use_roboflow
+        self.use_roboflow = use_roboflow and detector is None
         self.fps = 30.0
         
+        # Staged execution (decode / inference / analytics / encode threads)
+        self.pipelined = self.config.get('pipelined', False)
+        self.queue_size = self.config.get('pipeline_queue_size', 8)
+        
+        # Micro-batched inference
+        self.detection_batch_size = max(1, self.config.get('detection_batch_size', 1))
+        self.max_batch_latency = self.config.get('max_batch_latency_ms', 50.0) / 1000.0
+        
+        # Keyframe detection: run the detector every k frames (adaptive)
+        # and propagate tracks in between
+        self.keyframes: Optional[KeyframeScheduler] = None
+        if self.config.get('keyframe_interval', 1) > 1:
+            self.keyframes = KeyframeScheduler(
+                max_interval=self.config['keyframe_interval'],
+                max_displacement=self.config.get('keyframe_max_displacement', 0.5),
+                max_lost_ratio=self.config.get('keyframe_max_lost_ratio', 0.2),
+                ball_tolerance=self.config.get('keyframe_ball_tolerance', 0.1)
+            )
+        self.keyframe_contact_margin = self.config.get('keyframe_contact_margin', 1.5)
+        self.keyframe_ball_radius = self.config.get('keyframe_ball_radius', 2.0)
+        
+        # Per-stage latency histograms (and a sampled Chrome trace)
+        self.timer = StageTimer(
+            enabled=self.config.get('stage_timing', True),
+            trace_interval=self.config.get('trace_interval', 0)
+        )
+        
         logger.info("=" * 60)
         logger.info("Initializing VAR Pipeline")
         logger.info("=" * 60)
         
         # Detection
-        if use_roboflow and ROBOFLOW_AVAILABLE:
+        if detector is not None:
+            logger.info(f"Detection: {type(detector).__name__}")
+            self.detector = detector
+        elif use_roboflow and ROBOFLOW_AVAILABLE:
             logger.info("Detection: Roboflow API")
             self.detector = RoboflowDetector(
                 api_key=self.config.get('roboflow_api_key', 'QEZ7CzEaDFxxXMCWMdLn'),
@@ -120,14 +244,33 @@ class VARPipeline:
             self.detector = PlayerBallDetector(
                 model_path=self.config.get('detection_model', 'yolov8x.pt'),
                 device=device,
-                confidence_threshold=self.config.get('detection_confidence', 0.5)
+                confidence_threshold=self.config.get('detection_confidence', 0.5),
+                imgsz=self.config.get('detection_imgsz', 640),
+                ball_confidence_threshold=self.config.get('ball_crop_confidence', 0.25)
             )
         
+        # Ball-only pass on full-resolution crops around the predicted ball
+        self.ball_search: Optional[BallCropSearch] = None
+        if self.config.get('ball_crop_search', False):
+            if hasattr(self.detector, 'detect_ball_arrays'):
+                logger.info("Detection: ball crop search")
+                self.ball_search = BallCropSearch(
+                    crop_size=self.config.get('ball_crop_size', 320),
+                    growth=self.config.get('ball_crop_growth', 1.5),
+                    max_crop_size=self.config.get('ball_crop_max_size', 960),
+                    tile_after=self.config.get('ball_tile_after', 10),
+                    tiles_per_frame=self.config.get('ball_tiles_per_frame', 2)
+                )
+            else:
+                logger.warning("Ball crop search needs the local detector, disabled")
+        
         # Tracking
         logger.info("Tracking: Multi-object tracker")
         self.tracker = MultiObjectTracker(
             track_thresh=self.config.get('track_thresh', 0.5),
-            match_thresh=self.config.get('match_thresh', 0.8)
+            match_thresh=self.config.get('match_thresh', 0.8),
+            iou_metric=self.config.get('iou_metric', 'iou'),
+            low_thresh=self.config.get('track_low_thresh', 0.1)
         )
         self.ball_tracker = BallTracker()
         
@@ -135,7 +278,12 @@ class VARPipeline:
         logger.info("Teams: Color-based classification")
         self.team_classifier = TeamClassifier(
             method=self.config.get('team_method', 'clustering'),
-            temporal_smoothing=True
+            temporal_smoothing=True,
+            warmup_frames=self.config.get('team_warmup_frames', 30),
+            adapt_rate=self.config.get('team_adapt_rate', 0.05),
+            drift_threshold=self.config.get('team_drift_threshold', 2.0),
+            cache_tracks=self.config.get('team_cache_tracks', True),
+            reverify_interval=self.config.get('team_reverify_interval', 30)
         )
         
         # Homography
@@ -146,6 +294,11 @@ class VARPipeline:
                 width=self.config.get('pitch_width', 68.0)
             )
         )
+        self.homography_scheduler = HomographyScheduler(
+            self.homography,
+            interval=self.config.get('homography_interval', 30),
+            motion_threshold=self.config.get('homography_motion_threshold', 4.0)
+        )
         
         # VAR Engine
         if VAR_ENGINE_AVAILABLE:
@@ -153,7 +306,15 @@ class VARPipeline:
             self.var_engine = VARDecisionEngine(
                 pitch_length=self.config.get('pitch_length', 105.0),
                 pitch_width=self.config.get('pitch_width', 68.0),
-                fps=self.fps
+                fps=self.fps,
+                buffer_frames=self.config.get('replay_buffer_frames', 150),
+                buffer_mode=self.config.get('replay_buffer_mode', 'raw'),
+                buffer_scale=self.config.get('replay_buffer_scale', 1.0),
+                buffer_jpeg_quality=self.config.get('replay_jpeg_quality', 85),
+                offside_tolerance_cm=self.config.get('offside_tolerance_cm', 15.0),
+                contact_threshold=self.config.get('contact_threshold', 1.5),
+                fall_threshold=self.config.get('fall_threshold', 0.3),
+                min_contact_frames=self.config.get('min_contact_frames', 2)
             )
             self.use_var_engine = True
         else:
@@ -161,7 +322,39 @@ class VARPipeline:
             self.use_var_engine = False
             self._init_basic_detectors()
         
-        # Results storage
+        self._connect_stages()
+        self.memory_report_interval = self.config.get('memory_report_interval', 0)
+        
+        # Periodic checkpoints (written by process_video when it has an output_dir):
+        # snapshotted on the analysis thread, compressed and written on a writer thread
+        self.checkpoint_interval = self.config.get('checkpoint_interval', 1800)
+        self._checkpoint_path: Optional[Path] = None
+        self._checkpoint_writer: Optional[ThreadPoolExecutor] = None
+        self._checkpoint_write: Optional[Future] = None
+        self._checkpoint_video: Dict[str, Any] = {}
+        self._checkpoint_first_frame = 0
+        
+        # Persistent detection cache (opened per video by process_video).
+        # With cached tracks, re-analysis runs only the VAR engine.
+        self.detection_cache_dir = self.config.get('detection_cache_dir')
+        self.cache_tracks = self.config.get('detection_cache_tracks', True)
+        self.reanalyze_from_cache = self.config.get('reanalyze_from_cache', False)
+        self.detection_cache: Optional[DetectionCache] = None
+        self._track_table: Optional[TrackTable] = None
+        if self.reanalyze_from_cache and not self.detection_cache_dir:
+            logger.warning("Re-analysis from cache needs detection_cache_dir, disabled")
+            self.reanalyze_from_cache = False
+        
+        # Results storage: per-frame results go to the columnar trajectory
+        # store; the FrameResult list is kept too unless it is turned off
+        # (it is the memory-heavy part of a long run)
+        self.retain_frame_results = self.config.get('retain_frame_results', True)
+        self.trajectories: Optional[TrajectoryStore] = None
+        if self.config.get('trajectory_store', True):
+            self.trajectories = TrajectoryStore(
+                spill_rows=self.config.get('trajectory_spill_rows', 0),
+                spill_dir=self.config.get('trajectory_spill_dir')
+            )
         self.frame_results: List[FrameResult] = []
         self.offside_incidents: List[Dict] = []
         self.foul_incidents: List[Dict] = []
@@ -171,6 +364,12 @@ class VARPipeline:
         logger.info(f"VAR Pipeline Ready | Device: {device}")
         logger.info("=" * 60)
     
+    def _connect_stages(self):
+        """Evict per-track state in every stage when the tracker drops a track."""
+        self.tracker.subscribe(MultiObjectTracker.TRACK_DELETED, self.team_classifier.forget)
+        if self.use_var_engine:
+            self.tracker.subscribe(MultiObjectTracker.TRACK_DELETED, self.var_engine.forget)
+    
     def _init_basic_detectors(self):
         """Initialize basic detection when VAR engine unavailable."""
         from collections import deque
@@ -178,18 +377,44 @@ class VARPipeline:
         self.contact_history: Dict[Tuple[int, int], int] = {}
         self.player_heights: Dict[int, deque] = {}
     
-    def process_frame(
+    def _detect(self, frame: np.ndarray, frame_number: Optional[int] = None) -> List[Detection]:
+        """Detections for a single frame, from the cache if it has them."""
+        cache = self.detection_cache
+        if cache is None or frame_number is None:
+            return self._run_detector(frame)
+        
+        cached = cache.get(frame_number)
+        if cached is not None:
+            return cached.to_detections()
+        
+        detections = self._run_detector(frame)
+        cache.put(frame_number, DetectionArrays.from_detections(detections))
+        return detections
+    
+    def _detect_batch(
         self,
-        frame: np.ndarray,
-        frame_number: int
-    ) -> FrameResult:
-        """Process a single frame for all VAR decisions."""
-        timestamp = frame_number / self.fps
+        frames: List[np.ndarray],
+        frame_numbers: Optional[List[int]] = None
+    ) -> List[List[Detection]]:
+        """Detections for a micro-batch; only cache misses go to the detector."""
+        cache = self.detection_cache
+        if cache is None or frame_numbers is None:
+            return self._run_detector_batch(frames)
         
-        # Detection
+        cached = [cache.get(n) for n in frame_numbers]
+        detections = [None if c is None else c.to_detections() for c in cached]
+        missing = [i for i, c in enumerate(cached) if c is None]
+        if missing:
+            for i, frame_detections in zip(missing, self._run_detector_batch([frames[i] for i in missing])):
+                cache.put(frame_numbers[i], DetectionArrays.from_detections(frame_detections))
+                detections[i] = frame_detections
+        return detections
+    
+    def _run_detector(self, frame: np.ndarray) -> List[Detection]:
+        """Run the configured detector on a single frame."""
         if self.use_roboflow and ROBOFLOW_AVAILABLE:
             raw_detections = self.detector.detect(frame)
-            detections = [
+            return [
                 Detection(
                     bbox=d.bbox,
                     confidence=d.confidence,
@@ -198,67 +423,176 @@ class VARPipeline:
                 )
                 for d in raw_detections
             ]
-        else:
-            detections = self.detector.detect(frame)
         
-        # Tracking
-        tracked_objects = self.tracker.update(detections, frame)
+        return self.detector.detect(frame)
+    
+    def _run_detector_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        """Run the detector once on a micro-batch of frames."""
+        if len(frames) > 1 and hasattr(self.detector, 'detect_batch') \
+                and not (self.use_roboflow and ROBOFLOW_AVAILABLE):
+            return self.detector.detect_batch(frames)
         
-        # Ball tracking
-        ball_dets = [d for d in detections if d.class_name == 'ball']
-        ball_det = ball_dets[0] if ball_dets else None
-        ball_position = self.ball_tracker.update(ball_det)
+        return [self._run_detector(frame) for frame in frames]
+    
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        detections: Optional[List[Detection]] = None
+    ) -> FrameResult:
+        """
+        Process a single frame for all VAR decisions.
+        
+        Args:
+            frame: BGR image
+            frame_number: Index of the frame in the video
+            detections: Precomputed detections (runs the detector if None)
+        
+        Returns:
+            FrameResult for this frame
+        """
+        timer = self.timer
+        
+        # Homography (re-estimated only on camera motion or every N frames)
+        start = time.perf_counter()
+        H = self.homography_scheduler.update(frame)
+        start = timer.record('homography', start, frame_number)
+        
+        ball_estimated = False
+        if detections is None and self.keyframes is not None:
+            detections, tracked_objects, ball_position, ball_estimated = self._track_keyframe(
+                frame, frame_number, H
+            )
+        else:
+            # Detection
+            if detections is None:
+                detections = self._detect(frame, frame_number)
+                start = timer.record('detect', start, frame_number)
+            
+            detections = self._search_ball(frame, detections, frame_number)
+            
+            # Tracking
+            start = time.perf_counter()
+            tracked_objects = self.tracker.update(detections, frame)
+            
+            # Ball tracking
+            ball_position = self.ball_tracker.update(self._ball_detection(detections))
+            timer.record('track', start, frame_number)
         
         # Team classification
         player_bboxes = []
         player_ids = []
-        player_bboxes_dict = {}
+        player_confidences = []
         
         for obj in tracked_objects:
             if obj.class_name == 'player':
                 player_bboxes.append(obj.bbox)
                 player_ids.append(obj.track_id)
-                player_bboxes_dict[obj.track_id] = obj.bbox
+                player_confidences.append(obj.confidence)
         
         team_assignments = {}
+        start = time.perf_counter()
         if player_bboxes:
             team_assignments = self.team_classifier.classify(
                 frame, player_bboxes, player_ids
             )
+        start = timer.record('team', start, frame_number)
         
-        # Homography
-        H = self.homography.estimate(frame)
-        
+        # Projection
         player_pitch_positions = {}
         ball_pitch_position = None
         
         if H is not None:
-            for obj in tracked_objects:
-                if obj.class_name == 'player':
-                    img_pos = obj.bottom_center
-                    pitch_pos = self.homography.transform_point(img_pos[0], img_pos[1], H)
-                    if pitch_pos is not None:
-                        player_pitch_positions[obj.track_id] = pitch_pos
-            
+            players = [obj for obj in tracked_objects if obj.class_name == 'player']
+            image_points = [obj.bottom_center for obj in players]
             if ball_position:
-                ball_pitch_position = self.homography.transform_point(
-                    ball_position[0], ball_position[1], H
-                )
+                image_points.append(ball_position)
+            
+            # Project all players and the ball with a single matrix product
+            pitch_points = self.homography.transform_points(image_points, H)
+            valid = ~np.isnan(pitch_points).any(axis=1)
+            
+            for obj, (px, py), ok in zip(players, pitch_points, valid):
+                if ok:
+                    player_pitch_positions[obj.track_id] = (float(px), float(py))
+            
+            if ball_position and valid[-1]:
+                ball_pitch_position = tuple(float(v) for v in pitch_points[-1])
+        
+        timer.record('project', start, frame_number)
+        
+        if self._track_table is not None:
+            self._track_table.add_frame(
+                frame_number, player_ids, player_bboxes, player_confidences,
+                player_pitch_positions, team_assignments, ball_position, ball_pitch_position,
+                ball_estimated
+            )
+        
+        result = self._decide(
+            frame, frame_number, detections, tracked_objects,
+            player_ids, player_bboxes, player_confidences,
+            team_assignments, player_pitch_positions, ball_position, ball_pitch_position,
+            ball_estimated
+        )
+        
+        if self._checkpoint_path and (frame_number + 1) % self.checkpoint_interval == 0:
+            start = time.perf_counter()
+            snapshot = self._snapshot_checkpoint(frame_number + 1)
+            timer.record('checkpoint_snapshot', start, frame_number)
+            self._submit_checkpoint(self._checkpoint_path, snapshot, frame_number + 1)
+        
+        return result
+    
+    def _decide(
+        self,
+        frame: Optional[np.ndarray],
+        frame_number: int,
+        detections: List[Detection],
+        tracked_objects: List[TrackedObject],
+        player_ids: List[int],
+        player_bboxes: List[np.ndarray],
+        player_confidences: List[float],
+        team_assignments: Dict[int, str],
+        player_pitch_positions: Dict[int, Tuple[float, float]],
+        ball_position: Optional[Tuple[float, float]],
+        ball_pitch_position: Optional[Tuple[float, float]],
+        ball_estimated: bool = False
+    ) -> FrameResult:
+        """
+        Run the VAR engine on one frame's tracks and store the result.
+        
+        Args:
+            frame: BGR image (None when replaying cached tracks)
+            frame_number: Index of the frame in the video
+            detections: Detections of the frame
+            tracked_objects: Tracks of the frame
+            player_ids: Tracked player IDs
+            player_bboxes: Image boxes, one per player ID
+            player_confidences: Track confidences, one per player ID
+            team_assignments: Team label by player ID
+            player_pitch_positions: Pitch coordinates by player ID
+            ball_position: Ball image position, if any
+            ball_pitch_position: Ball pitch position, if any
+            ball_estimated: The ball was propagated between keyframes
         
-        # VAR Detection
+        Returns:
+            FrameResult for this frame
+        """
         var_incidents = []
         offside_detected = False
         foul_detected = False
         penalty_detected = False
         
         if self.use_var_engine:
+            start = time.perf_counter()
             var_incidents = self.var_engine.process_frame(
                 frame=frame,
                 frame_number=frame_number,
-                player_bboxes=player_bboxes_dict,
+                player_bboxes=dict(zip(player_ids, player_bboxes)),
                 player_positions=player_pitch_positions,
                 team_assignments=team_assignments,
-                ball_position=ball_pitch_position
+                ball_position=ball_pitch_position,
+                ball_estimated=ball_estimated
             )
             
             for incident in var_incidents:
@@ -271,7 +605,10 @@ class VARPipeline:
                     foul_detected = True
                 elif incident.incident_type in [IncidentType.FOUL, IncidentType.YELLOW_CARD, IncidentType.RED_CARD]:
                     foul_detected = True
+            
+            self.timer.record('var', start, frame_number)
         
+        timestamp = frame_number / self.fps
         result = FrameResult(
             frame_number=frame_number,
             timestamp=timestamp,
@@ -286,9 +623,141 @@ class VARPipeline:
             penalty_detected=penalty_detected
         )
         
-        self.frame_results.append(result)
+        if self.retain_frame_results:
+            self.frame_results.append(result)
+        if self.trajectories is not None:
+            self.trajectories.add_frame(
+                frame_number, timestamp,
+                track_ids=player_ids,
+                bboxes=player_bboxes,
+                confidences=player_confidences,
+                pitch_positions=player_pitch_positions,
+                team_assignments=team_assignments,
+                ball_position=ball_position,
+                ball_pitch_position=ball_pitch_position,
+                flags=(
+                    OFFSIDE_FLAG * offside_detected |
+                    FOUL_FLAG * foul_detected |
+                    PENALTY_FLAG * penalty_detected
+                )
+            )
+        
         return result
     
+    def _search_ball(
+        self,
+        frame: np.ndarray,
+        detections: List[Detection],
+        frame_number: int
+    ) -> List[Detection]:
+        """Add a ball found by the crop search to the main-pass detections."""
+        if self.ball_search is None:
+            return detections
+        
+        start = time.perf_counter()
+        detections = self.ball_search.search(
+            frame, detections,
+            predicted=self.ball_tracker.predicted_position(),
+            missing_frames=self.ball_tracker.missing_frames,
+            detect=self.detector.detect_ball_arrays
+        )
+        self.timer.record('ball_search', start, frame_number)
+        return detections
+    
+    def _ball_detection(self, detections: List[Detection]) -> Optional[Detection]:
+        ball_dets = [d for d in detections if d.class_name == 'ball']
+        return ball_dets[0] if ball_dets else None
+    
+    def _track_keyframe(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        H: Optional[np.ndarray]
+    ) -> Tuple[List[Detection], List[TrackedObject], Optional[Tuple[float, float]], bool]:
+        """
+        Track one frame in keyframe mode.
+        
+        Tracks are always predicted first. The detector then runs if the
+        schedule calls for it, or if the predicted positions could be a
+        pass, a contact or a change of possession; otherwise the
+        predictions stand.
+        
+        Returns:
+            (detections, tracked_objects, ball_position, propagated) for the frame
+        """
+        start = time.perf_counter()
+        tracked_objects = self.tracker.predict()
+        
+        scheduled = self.keyframes.due()
+        forced = not scheduled and self._needs_detection(tracked_objects, frame_number, H)
+        
+        if not (scheduled or forced):
+            self.keyframes.propagated()
+            ball_position = self.ball_tracker.propagate()
+            self.timer.record('track', start, frame_number)
+            return [], tracked_objects, ball_position, True
+        
+        predict_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        detections = self._detect(frame, frame_number)
+        self.timer.record('detect', start, frame_number)
+        detections = self._search_ball(frame, detections, frame_number)
+        
+        start = time.perf_counter()
+        tracked_objects = self.tracker.correct(detections, frame)
+        
+        ball_det = self._ball_detection(detections)
+        ball_tracked = self.ball_tracker.position is not None
+        ball_position = self.ball_tracker.update(ball_det)
+        
+        self.keyframes.detected(
+            list(self.tracker.tracks.values()),
+            forced,
+            ball_innovation=self.ball_tracker.innovation if ball_det else None,
+            ball_missed=ball_tracked and ball_det is None
+        )
+        self.timer.add(
+            'track', predict_time + time.perf_counter() - start, start, frame_number
+        )
+        
+        return detections, tracked_objects, ball_position, False
+    
+    def _needs_detection(
+        self,
+        tracked_objects: List[TrackedObject],
+        frame_number: int,
+        H: Optional[np.ndarray]
+    ) -> bool:
+        """Whether the VAR engine could flag a pass, contact or possession change on predicted tracks."""
+        # Without a homography the engine gets no pitch positions to flag
+        if not self.use_var_engine or H is None:
+            return False
+        
+        players = [obj for obj in tracked_objects if obj.class_name == 'player']
+        image_points = [obj.bottom_center for obj in players]
+        n_players = len(image_points)
+        ball_position = self.ball_tracker.predicted_position()
+        if ball_position:
+            image_points.append(ball_position)
+        
+        pitch_points = self.homography.transform_points(image_points, H)
+        valid = ~np.isnan(pitch_points).any(axis=1)
+        
+        positions = pitch_points[:n_players][valid[:n_players]]
+        teams = [
+            self.team_classifier.last_team(obj.track_id)
+            for obj, ok in zip(players, valid[:n_players]) if ok
+        ]
+        ball = pitch_points[-1] if ball_position and valid[-1] else None
+        
+        return self.var_engine.needs_detection(
+            frame_number, positions, ball,
+            contact_margin=self.keyframe_contact_margin,
+            ball_radius=self.keyframe_ball_radius,
+            player_teams=teams
+        )
+    
     def _process_incident(self, incident: 'VARIncident', frame_number: int):
         """Process and store a VAR incident."""
         incident_dict = incident.to_dict()
@@ -321,23 +790,62 @@ class VARPipeline:
         save_video: bool = True,
         save_pitch_view: bool = True,
         max_frames: int = None,
-        progress_callback=None
+        progress_callback=None,
+        pipelined: bool = None,
+        export_clips: bool = None,
+        start_frame: int = 0,
+        result_callback=None,
+        resume: bool = False
     ) -> VideoResult:
-        """Process entire video for VAR analysis."""
+        """
+        Process entire video for VAR analysis.
+        
+        With config 'detection_cache_dir', detections are read from and
+        added to the cache. With 'reanalyze_from_cache' and tracks cached
+        by an earlier run over the same frames and tracking settings,
+        only the VAR decisions are re-run and no frame is decoded (so no
+        annotated video is written).
+        
+        Args:
+            video_path: Path to input video
+            output_dir: Directory for annotated videos and JSON results
+            save_video: Whether to write the annotated video
+            save_pitch_view: Whether to write the 2D pitch view video
+            max_frames: Maximum number of frames to process
+            progress_callback: Called as callback(frame_number, total_frames)
+            pipelined: Run decode, inference, analytics and encode on
+                       separate threads (defaults to config 'pipelined')
+            export_clips: Write one MP4 per incident cluster to
+                          output_dir/clips (defaults to config 'export_clips')
+            start_frame: First frame to process; frame numbers stay
+                         relative to the start of the video
+            result_callback: Called as callback(FrameResult) after each
+                             frame; tracks may be updated in place
+                             later, so copy what you keep
+            resume: Continue from the checkpoint in output_dir, if any
+                    (pass the same start_frame/max_frames as the first run)
+        
+        Returns:
+            VideoResult with all incidents
+        """
+        if pipelined is None:
+            pipelined = self.pipelined
+        if export_clips is None:
+            export_clips = self.config.get('export_clips', True)
+        
         start_time = time.time()
+        self.timer.reset()
         
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError(f"Could not open video: {video_path}")
         
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
-        if self.use_var_engine:
-            self.var_engine.fps = self.fps
-        
+        total_frames = max(0, video_frames - start_frame)
         if max_frames:
             total_frames = min(total_frames, max_frames)
         
@@ -348,57 +856,145 @@ class VARPipeline:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Resume from the last checkpoint: restore state, skip finished frames
+        first_frame = start_frame
+        checkpoint_path = output_dir / CHECKPOINT_FILE if output_dir else None
+        video_info = {'name': Path(video_path).name, 'frames': video_frames}
+        resumed = False
+        
+        if resume:
+            if checkpoint_path and checkpoint_path.exists():
+                start_frame = self.restore_checkpoint(checkpoint_path, video_info)
+                resumed = True
+                logger.info(f"   Resuming at frame {start_frame} from {checkpoint_path}")
+            else:
+                logger.warning(f"No checkpoint in {output_dir}; starting from frame {start_frame}")
+        
+        remaining = first_frame + total_frames - start_frame
+        if max_frames:
+            max_frames = remaining
+        
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        
+        # Cached detections; cached tracks replace the whole frame loop
+        cache = None
+        track_table = None
+        cached_tracks = None
+        if self.detection_cache_dir:
+            cache = DetectionCache.open(
+                self.detection_cache_dir, video_path, detector_fingerprint(self.detector)
+            )
+            track_key = self._track_settings()
+            if self.reanalyze_from_cache and not resumed:
+                cached_tracks = cache.load_tracks(track_key, first_frame, first_frame + total_frames)
+                if cached_tracks is None:
+                    logger.info("   No cached tracks for these frames and settings, running the full pipeline")
+                else:
+                    # Nothing is decoded, so there is nothing to annotate
+                    save_video = False
+            if cached_tracks is None and self.cache_tracks and not resumed:
+                track_table = TrackTable(first_frame)
+            self.detection_cache = cache
+            self._track_table = track_table
+        
+        if self.use_var_engine:
+            self.var_engine.fps = self.fps
+        
         video_writer = None
         pitch_writer = None
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        # A resumed run cannot append to the first run's videos
+        suffix = f"_from_{start_frame:06d}" if resumed else ""
         
         if save_video and output_dir:
             video_writer = cv2.VideoWriter(
-                str(output_dir / "annotated_video.mp4"),
+                str(output_dir / f"annotated_video{suffix}.mp4"),
                 fourcc, self.fps, (width, height)
             )
         
         if save_pitch_view and output_dir:
             pitch_size = (self.homography.template_width, self.homography.template_height)
             pitch_writer = cv2.VideoWriter(
-                str(output_dir / "pitch_view.mp4"),
+                str(output_dir / f"pitch_view{suffix}.mp4"),
                 fourcc, self.fps, pitch_size
             )
         
-        frame_number = 0
-        processed_frames = 0
-        team_colors = get_team_colors()
+        clip_exporter = None
+        if export_clips and output_dir:
+            # Incident clips start at most 2s before the incident frame
+            clip_exporter = ClipExporter(
+                video_path,
+                output_dir / "clips",
+                lookbehind=int(self.fps * 2),
+                gap=self.config.get('clip_merge_gap', 0)
+            )
+            if resumed:
+                self._add_restored_clips(clip_exporter)
         
-        while True:
-            ret, frame = cap.read()
-            if not ret or (max_frames and frame_number >= max_frames):
-                break
-            
-            result = self.process_frame(frame, frame_number)
-            processed_frames += 1
-            
+        outputs = _FrameOutputs(
+            video_writer=video_writer,
+            pitch_writer=pitch_writer,
+            team_colors=get_team_colors(),
+            total_frames=total_frames,
+            progress_callback=progress_callback,
+            result_callback=result_callback,
+            clip_exporter=clip_exporter,
+            processed_frames=start_frame - first_frame
+        )
+        
+        if checkpoint_path and self.checkpoint_interval:
+            self._checkpoint_path = checkpoint_path
+            self._checkpoint_video = video_info
+            self._checkpoint_first_frame = first_frame
+            self._checkpoint_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        
+        completed = False
+        try:
+            if self.keyframes is not None:
+                logger.info(f"   Keyframes: detector every <= {self.keyframes.max_interval} frames")
+            elif self.detection_batch_size > 1:
+                logger.info(
+                    f"   Detection batches: {self.detection_batch_size} frames, "
+                    f"max latency {self.max_batch_latency * 1000:.0f}ms"
+                )
+            if remaining <= 0:
+                pass
+            elif cached_tracks is not None:
+                logger.info(f"   Mode: re-analysis of cached tracks ({cache.path})")
+                self._run_cached(cached_tracks, first_frame + total_frames, outputs)
+            elif pipelined:
+                logger.info(f"   Mode: pipelined (queue size {self.queue_size})")
+                self._run_pipelined(cap, max_frames, outputs, start_frame)
+            else:
+                self._run_sequential(cap, max_frames, outputs, start_frame)
+            completed = True
+        finally:
+            self._checkpoint_path = None
+            self._finish_checkpoints()
+            if cache is not None:
+                cache.flush()
+                self.detection_cache = None
+                self._track_table = None
+            cap.release()
             if video_writer:
-                annotated = self._draw_frame_annotations(frame, result, team_colors)
-                video_writer.write(annotated)
-            
-            if pitch_writer and result.player_pitch_positions:
-                pitch_view = self._draw_pitch_view(result, team_colors)
-                if pitch_view is not None:
-                    pitch_writer.write(pitch_view)
-            
-            if progress_callback:
-                progress_callback(frame_number, total_frames)
-            
-            if frame_number % 100 == 0:
-                logger.info(f"   Processed: {frame_number}/{total_frames} frames")
-            
-            frame_number += 1
+                video_writer.release()
+            if clip_exporter:
+                # A crashed run leaves its open cluster to the resumed run
+                clips = clip_exporter.close(flush_open=completed)
+                logger.info(f"   Clips: {len(clips)} written to {output_dir / 'clips'}")
+            if pitch_writer:
+                pitch_writer.release()
+        
+        processed_frames = outputs.processed_frames
+        
+        if track_table is not None:
+            track_table.covered_end = first_frame + total_frames
+            cache.save_tracks(track_key, track_table)
         
-        cap.release()
-        if video_writer:
-            video_writer.release()
-        if pitch_writer:
-            pitch_writer.release()
+        # The run finished; its results supersede the checkpoint
+        if checkpoint_path and checkpoint_path.exists():
+            checkpoint_path.unlink()
         
         processing_time = time.time() - start_time
         
@@ -408,8 +1004,15 @@ class VARPipeline:
             'total_penalties': len(self.penalty_incidents)
         }
         
+        stage_timings = self.timer.summary()
+        
         if output_dir:
             self._save_results(output_dir, incident_summary)
+            if self.timer.enabled:
+                save_timings(output_dir, stage_timings, processed_frames, processing_time)
+            if self.timer.trace_interval:
+                self.timer.write_trace(output_dir / "trace.json")
+            self._export_trajectories(output_dir, suffix)
         
         logger.info("=" * 60)
         logger.info("PROCESSING COMPLETE")
@@ -417,6 +1020,35 @@ class VARPipeline:
         logger.info(f"   Offsides: {len(self.offside_incidents)}")
         logger.info(f"   Fouls: {len(self.foul_incidents)}")
         logger.info(f"   Penalties: {len(self.penalty_incidents)}")
+        logger.info(
+            f"   Team cache: {self.team_classifier.cache_hit_rate:.0%} of players served from cache"
+        )
+        logger.info(
+            f"   Homography: {self.homography_scheduler.estimates} estimates, "
+            f"{self.homography_scheduler.reuse_ratio:.0%} of frames reused"
+        )
+        if self.keyframes is not None:
+            stats = self.keyframes.stats()
+            logger.info(
+                f"   Keyframes: detector ran on {stats['detection_ratio']:.0%} of frames "
+                f"({stats['forced_frames']} forced by pass/contact candidates)"
+            )
+        if self.ball_search is not None:
+            stats = self.ball_search.stats()
+            logger.info(
+                f"   Ball search: {stats['balls_found']} balls from "
+                f"{stats['crop_passes']} crop and {stats['tile_passes']} tiled passes"
+            )
+        if cached_tracks is not None:
+            logger.info(f"   Cache: VAR decisions replayed on {processed_frames} cached frames")
+        elif cache is not None:
+            logger.info(
+                f"   Cache: {cache.hits} frames of detections from the cache, "
+                f"{cache.misses} detected{', tracks saved' if track_table is not None else ''}"
+            )
+        if stage_timings:
+            logger.info(f"   Stages (p50/p95): {format_timings(stage_timings)}")
+        logger.info(f"   Memory: {self._format_memory_report()}")
         logger.info("=" * 60)
         
         return VideoResult(
@@ -429,8 +1061,172 @@ class VARPipeline:
             foul_incidents=self.foul_incidents,
             penalty_incidents=self.penalty_incidents,
             processing_time=processing_time,
-            incident_summary=incident_summary
+            incident_summary=incident_summary,
+            stage_timings=stage_timings
+        )
+    
+    def _read_frames(self, cap: cv2.VideoCapture, max_frames: int = None, start_frame: int = 0):
+        """Yield (frame_number, frame) pairs from an open capture."""
+        frame_number = start_frame
+        while not (max_frames and frame_number - start_frame >= max_frames):
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            self.timer.record('decode', start, frame_number)
+            yield frame_number, frame
+            frame_number += 1
+    
+    def _run_sequential(
+        self,
+        cap: cv2.VideoCapture,
+        max_frames: int,
+        outputs: '_FrameOutputs',
+        start_frame: int = 0
+    ):
+        """Decode, analyze and encode every frame on the calling thread."""
+        # Keyframe mode decides per frame whether to detect, so it cannot batch
+        if self.detection_batch_size == 1 or self.keyframes is not None:
+            for frame_number, frame in self._read_frames(cap, max_frames, start_frame):
+                result = self.process_frame(frame, frame_number)
+                self._write_outputs(frame, result, outputs)
+            return
+        
+        batches = batched(
+            self._read_frames(cap, max_frames, start_frame),
+            self.detection_batch_size,
+            self.max_batch_latency
         )
+        for batch in batches:
+            start = time.perf_counter()
+            batch_detections = self._detect_batch(
+                [frame for _, frame in batch], [frame_number for frame_number, _ in batch]
+            )
+            self.timer.record('detect', start, batch[0][0], count=len(batch))
+            
+            # Tracking and analytics stay strictly frame by frame
+            for (frame_number, frame), detections in zip(batch, batch_detections):
+                result = self.process_frame(frame, frame_number, detections)
+                self._write_outputs(frame, result, outputs)
+    
+    def _run_pipelined(
+        self,
+        cap: cv2.VideoCapture,
+        max_frames: int,
+        outputs: '_FrameOutputs',
+        start_frame: int = 0
+    ):
+        """
+        Run decode, inference, analytics and encode as separate stages.
+        
+        Each stage is a single worker reading from a bounded FIFO queue,
+        so frames leave the pipeline in decode order and the stateful
+        analytics (tracking, teams, VAR engine) see the same sequence
+        as in sequential mode.
+        """
+        def inference(items):
+            if self.keyframes is not None:
+                # Detection happens in analytics, on keyframes only
+                return [(frame_number, frame, None) for frame_number, frame in items]
+            start = time.perf_counter()
+            batch_detections = self._detect_batch(
+                [frame for _, frame in items], [frame_number for frame_number, _ in items]
+            )
+            self.timer.record('detect', start, items[0][0], count=len(items))
+            return [
+                (frame_number, frame, detections)
+                for (frame_number, frame), detections in zip(items, batch_detections)
+            ]
+        
+        def analytics(item):
+            frame_number, frame, detections = item
+            result = self.process_frame(frame, frame_number, detections)
+            # Tracks are mutated in place by the next update, so the
+            # encoder gets its own copy to draw from
+            result = replace(
+                result,
+                tracked_objects=[t.snapshot() for t in result.tracked_objects]
+            )
+            return frame, result
+        
+        def encode(item):
+            frame, result = item
+            self._write_outputs(frame, result, outputs)
+        
+        StagedRunner(
+            source=self._read_frames(cap, max_frames, start_frame),
+            stages=[
+                StageSpec(
+                    "inference", inference,
+                    batch_size=self.detection_batch_size,
+                    max_latency=self.max_batch_latency
+                ),
+                StageSpec("analytics", analytics),
+                StageSpec("encode", encode),
+            ],
+            queue_size=self.queue_size
+        ).run()
+    
+    def _run_cached(self, tracks: TrackTable, end_frame: int, outputs: '_FrameOutputs'):
+        """
+        Re-run the VAR decisions on cached tracks, without decoding frames.
+        
+        Results carry no detections or tracked objects; the pitch view,
+        clips, trajectories and incident files are produced as usual.
+        """
+        for (frame_number, track_ids, bboxes, confidences, pitch_positions,
+                team_assignments, ball_position, ball_pitch_position,
+                ball_estimated) in tracks.frames(end_frame):
+            result = self._decide(
+                None, frame_number, [], [],
+                track_ids, bboxes, confidences,
+                team_assignments, pitch_positions, ball_position, ball_pitch_position,
+                ball_estimated
+            )
+            self._write_outputs(None, result, outputs)
+    
+    def _write_outputs(self, frame: Optional[np.ndarray], result: FrameResult, outputs: '_FrameOutputs'):
+        """Write annotated/pitch frames and report progress."""
+        timer = self.timer
+        frame_number = result.frame_number
+        
+        if outputs.video_writer:
+            start = time.perf_counter()
+            annotated = self._draw_frame_annotations(frame, result, outputs.team_colors)
+            start = timer.record('draw', start, frame_number)
+            outputs.video_writer.write(annotated)
+            timer.record('encode', start, frame_number)
+        
+        if outputs.pitch_writer and result.player_pitch_positions:
+            start = time.perf_counter()
+            pitch_view = self._draw_pitch_view(result, outputs.team_colors)
+            start = timer.record('draw_pitch', start, frame_number)
+            if pitch_view is not None:
+                outputs.pitch_writer.write(pitch_view)
+                timer.record('encode_pitch', start, frame_number)
+        
+        if outputs.clip_exporter:
+            for incident in result.var_incidents:
+                outputs.clip_exporter.add(*incident.video_clip_range, {
+                    'type': incident.incident_type.value,
+                    'frame': incident.frame_number,
+                    'players': incident.players_involved
+                })
+            outputs.clip_exporter.advance(result.frame_number)
+        
+        outputs.processed_frames += 1
+        
+        if outputs.result_callback:
+            outputs.result_callback(result)
+        
+        if outputs.progress_callback:
+            outputs.progress_callback(result.frame_number, outputs.total_frames)
+        
+        if result.frame_number % 100 == 0:
+            logger.info(f"   Processed: {result.frame_number}/{outputs.total_frames} frames")
+        
+        if self.memory_report_interval and result.frame_number % self.memory_report_interval == 0:
+            logger.info(f"   Memory @ {result.frame_number}: {self._format_memory_report()}")
     
     def _draw_frame_annotations(
         self,
@@ -483,41 +1279,236 @@ class VARPipeline:
         except Exception:
             return None
     
+    # Config keys that shape the tracks, teams and positions fed to the VAR engine
+    _TRACK_SETTINGS = (
+        'track_thresh', 'match_thresh', 'iou_metric', 'track_low_thresh',
+        'team_method', 'team_warmup_frames', 'team_adapt_rate', 'team_drift_threshold',
+        'team_cache_tracks', 'team_reverify_interval',
+        'pitch_length', 'pitch_width', 'homography_interval', 'homography_motion_threshold',
+        'ball_crop_search', 'ball_crop_size', 'ball_crop_growth', 'ball_crop_max_size',
+        'ball_crop_confidence', 'ball_tile_after', 'ball_tiles_per_frame',
+        'keyframe_interval', 'keyframe_max_displacement', 'keyframe_max_lost_ratio',
+        'keyframe_ball_tolerance', 'keyframe_contact_margin', 'keyframe_ball_radius'
+    )
+    
+    def _track_settings(self) -> Dict[str, Any]:
+        """Cache key of the tracks a run produces (VAR thresholds excluded)."""
+        settings = {name: self.config.get(name) for name in self._TRACK_SETTINGS}
+        if self.keyframes is not None:
+            # Candidate contacts force detections, so tracks depend on it
+            settings['contact_threshold'] = self.config.get('contact_threshold')
+        return settings
+    
     def _save_results(self, output_dir: Path, incident_summary: Dict):
-        with open(output_dir / "incidents.json", 'w') as f:
-            json.dump({
-                'summary': incident_summary,
-                'offside_incidents': self.offside_incidents,
-                'foul_incidents': self.foul_incidents,
-                'penalty_incidents': self.penalty_incidents
-            }, f, indent=2, default=str)
+        save_incidents(
+            output_dir, incident_summary,
+            self.offside_incidents, self.foul_incidents, self.penalty_incidents
+        )
+    
+    def _export_trajectories(self, output_dir: Path, suffix: str = ""):
+        """Write the trajectory store in the configured format, if any."""
+        export = self.config.get('trajectory_export')
+        if export and self.trajectories is not None:
+            export_trajectories(self.trajectories, output_dir, export, suffix)
+    
+    # Attributes that carry analysis state from one frame to the next
+    _CHECKPOINT_ATTRIBUTES = (
+        'tracker', 'ball_tracker', 'team_classifier',
+        'homography', 'homography_scheduler', 'var_engine', 'keyframes', 'ball_search',
+        'ball_history', 'contact_history', 'player_heights',
+        'offside_incidents', 'foul_incidents', 'penalty_incidents'
+    )
+    
+    def save_checkpoint(self, path: Path, next_frame: int) -> int:
+        """
+        Snapshot the analysis state so a run can resume at next_frame.
+        
+        Per-frame results and the replay frame buffer are not saved.
+        
+        Args:
+            path: Checkpoint file
+            next_frame: First frame not yet processed
+        
+        Returns:
+            Checkpoint size in bytes
+        """
+        return self._write_checkpoint(path, self._snapshot_checkpoint(next_frame), next_frame)
+    
+    def _snapshot_checkpoint(self, next_frame: int) -> bytes:
+        """Pickle the analysis state before the next frame changes it."""
+        return snapshot_state({
+            'video': self._checkpoint_video,
+            'first_frame': self._checkpoint_first_frame,
+            'next_frame': next_frame,
+            'fps': self.fps,
+            'state': {
+                name: getattr(self, name)
+                for name in self._CHECKPOINT_ATTRIBUTES if hasattr(self, name)
+            }
+        })
+    
+    def _submit_checkpoint(self, path: Path, snapshot: bytes, next_frame: int):
+        """Write a snapshot on the checkpoint writer thread (inline without one)."""
+        if self._checkpoint_writer is None:
+            self._write_checkpoint(path, snapshot, next_frame)
+            return
+        if self._checkpoint_write is not None:
+            # One write in flight at a time; a failed write stops the run
+            self._checkpoint_write.result()
+        self._checkpoint_write = self._checkpoint_writer.submit(
+            self._write_checkpoint, path, snapshot, next_frame
+        )
+    
+    def _write_checkpoint(self, path: Path, snapshot: bytes, next_frame: int) -> int:
+        start = time.perf_counter()
+        if self.detection_cache is not None:
+            # A resumed run skips these frames, so their detections go to disk now
+            self.detection_cache.flush()
+        size = write_checkpoint(path, snapshot)
+        seconds = self.timer.record('checkpoint_write', start, next_frame - 1) - start
+        logger.info(f"   Checkpoint @ {next_frame}: {size / 1e6:.1f}MB in {seconds * 1000:.0f}ms")
+        return size
+    
+    def _finish_checkpoints(self):
+        """Wait for the last checkpoint write and stop the writer thread."""
+        if self._checkpoint_writer is None:
+            return
+        self._checkpoint_writer.shutdown(wait=True)
+        write, self._checkpoint_write = self._checkpoint_write, None
+        self._checkpoint_writer = None
+        if write is not None and write.exception() is not None:
+            logger.error(f"Checkpoint write failed: {write.exception()}")
+    
+    def restore_checkpoint(self, path: Path, video_info: Dict[str, Any] = None) -> int:
+        """
+        Restore the analysis state saved by save_checkpoint.
         
-        if self.offside_incidents:
-            with open(output_dir / "offsides.json", 'w') as f:
-                json.dump(self.offside_incidents, f, indent=2, default=str)
+        Args:
+            path: Checkpoint file
+            video_info: Expected {'name', 'frames'} of the video
+        
+        Returns:
+            First frame to process
+        
+        Raises:
+            ValueError: If the checkpoint was written for another video
+        """
+        checkpoint = load_checkpoint(path)
+        
+        if video_info and checkpoint['video'] != video_info:
+            raise ValueError(
+                f"Checkpoint {path} is for {checkpoint['video']}, not {video_info}"
+            )
+        
+        for name, value in checkpoint['state'].items():
+            setattr(self, name, value)
+        self.fps = checkpoint['fps']
+        self._connect_stages()
+        
+        return checkpoint['next_frame']
+    
+    def _add_restored_clips(self, clip_exporter: ClipExporter):
+        """Queue clips for incidents restored from a checkpoint."""
+        # Penalties are listed under both fouls and penalties
+        incidents = (
+            self.offside_incidents +
+            [i for i in self.foul_incidents if i.get('type') != 'penalty'] +
+            self.penalty_incidents
+        )
+        for incident in sorted(incidents, key=lambda i: tuple(i['clip_range'])):
+            clip_exporter.add(*incident['clip_range'], {
+                'type': incident['type'],
+                'frame': incident['frame'],
+                'players': incident['players']
+            })
+    
+    def memory_report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Size of the long-lived state held by each stage.
+        
+        Entry counts should stay flat over a long session; anything that
+        grows with the number of tracks seen is a leak.
+        
+        Returns:
+            Dictionary mapping stage name to its state sizes, plus the
+            process RSS in MB where available
+        """
+        report = {
+            'tracker': {
+                'live_tracks': len(self.tracker.tracks),
+                'tracks_created': self.tracker.next_id - 1,
+                'kalman_capacity': len(self.tracker.kalman.active)
+            },
+            'team_classifier': {
+                'vote_histories': len(self.team_classifier.assignment_history),
+                'locked_tracks': len(self.team_classifier.locked_teams),
+                'color_samples': len(self.team_classifier.samples)
+            },
+            'results': {
+                'frame_results': len(self.frame_results),
+                'trajectory_rows': len(self.trajectories) if self.trajectories is not None else 0,
+                'trajectory_mb': round(self.trajectories.nbytes / 1e6, 1)
+                if self.trajectories is not None else 0.0,
+                'track_cache_mb': round(self._track_table.nbytes / 1e6, 1)
+                if self._track_table is not None else 0.0,
+                'incidents': (
+                    len(self.offside_incidents) + len(self.foul_incidents) +
+                    len(self.penalty_incidents)
+                )
+            }
+        }
         
-        if self.foul_incidents:
-            with open(output_dir / "fouls.json", 'w') as f:
-                json.dump(self.foul_incidents, f, indent=2, default=str)
+        if self.use_var_engine:
+            foul_detector = self.var_engine.foul_detector
+            frame_buffer = self.var_engine.frame_buffer
+            buffer_mb = frame_buffer.nbytes / 1e6
+            report['var_engine'] = {
+                'player_heights': len(foul_detector.player_heights),
+                'player_velocities': len(foul_detector.player_velocities),
+                'contact_pairs': len(foul_detector.contact_tracking),
+                'buffered_frames': len(frame_buffer),
+                'frame_buffer_mb': round(buffer_mb, 1),
+                'incidents': len(self.var_engine.incidents)
+            }
         
-        if self.penalty_incidents:
-            with open(output_dir / "penalties.json", 'w') as f:
-                json.dump(self.penalty_incidents, f, indent=2, default=str)
+        rss_mb = _current_rss_mb()
+        if rss_mb is not None:
+            report['process'] = {'rss_mb': round(rss_mb, 1)}
         
-        logger.info(f"Results saved to {output_dir}")
+        return report
+    
+    def _format_memory_report(self) -> str:
+        return " | ".join(
+            f"{stage} " + ", ".join(f"{key}={value}" for key, value in sizes.items())
+            for stage, sizes in self.memory_report().items()
+        )
     
     def reset(self):
         self.tracker.reset()
         self.ball_tracker.reset()
         self.team_classifier.reset()
+        self.homography_scheduler.reset()
         if self.use_var_engine:
             self.var_engine.reset()
         self.frame_results.clear()
+        if self.trajectories is not None:
+            self.trajectories.clear()
+        self.timer.reset()
         self.offside_incidents.clear()
         self.foul_incidents.clear()
         self.penalty_incidents.clear()
 
 
+def _current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+
 def main():
     """Command line interface."""
     parser = argparse.ArgumentParser(
@@ -525,30 +1516,123 @@ def main():
     )
     parser.add_argument('--video', required=True, help='Path to input video')
     parser.add_argument('--output', default='output/', help='Output directory')
+    parser.add_argument('--config', metavar='YAML',
+                        help='Settings file laid out like configs/config.yaml (flags override it)')
     parser.add_argument('--use-roboflow', action='store_true', help='Use Roboflow API')
-    parser.add_argument('--device', default='cpu', help='Device: cuda, mps, or cpu')
+    parser.add_argument('--device', help='Device: cuda, mps, cpu or auto (default: cpu)')
     parser.add_argument('--max-frames', type=int, help='Maximum frames to process')
     parser.add_argument('--no-video', action='store_true', help='Skip video output')
     parser.add_argument('--no-pitch-view', action='store_true', help='Skip pitch view')
+    parser.add_argument('--pipelined', action='store_true', default=None,
+                        help='Run decode/inference/analytics/encode on separate threads')
+    parser.add_argument('--batch-size', type=int,
+                        help='Frames per detector micro-batch')
+    parser.add_argument('--max-batch-latency', type=float,
+                        help='Maximum wait (ms) to fill a detector batch')
+    parser.add_argument('--no-clips', action='store_true', help='Skip incident clip export')
+    parser.add_argument('--keyframe-interval', type=int,
+                        help='Run the detector at most every N frames and propagate tracks in between')
+    parser.add_argument('--detection-imgsz', type=int,
+                        help='Detector input size for the full frame')
+    parser.add_argument('--ball-crop', action='store_true', default=None,
+                        help='Search for the ball on full-resolution crops around its prediction')
+    parser.add_argument('--trace-interval', type=int,
+                        help='Write a Chrome trace of every N-th frame to trace.json (0 = off)')
+    parser.add_argument('--export-trajectories', choices=['npz', 'parquet'],
+                        help='Write per-frame player and ball trajectories in this format')
+    parser.add_argument('--detection-cache', metavar='DIR',
+                        help='Reuse detections (and tracks) cached in DIR from earlier runs')
+    parser.add_argument('--from-cache', action='store_true', default=None,
+                        help='With --detection-cache, re-run only the VAR decisions on cached tracks')
+    parser.add_argument('--offside-tolerance', type=float,
+                        help='Offside tolerance in cm')
+    parser.add_argument('--contact-threshold', type=float,
+                        help='Player distance (m) that counts as contact')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Process time chunks on this many worker processes')
+    parser.add_argument('--chunk-seconds', type=float,
+                        help='Video time per chunk with --workers (default: even split)')
+    parser.add_argument('--overlap-seconds', type=float,
+                        help='Warm-up processed before each chunk with --workers')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint in the output directory')
+    parser.add_argument('--checkpoint-interval', type=int,
+                        help='Frames between checkpoints (0 = off)')
     
     args = parser.parse_args()
+    if args.workers > 1:
+        # Chunk workers neither stage their frames nor checkpoint
+        for flag, value in (('--resume', args.resume), ('--pipelined', args.pipelined)):
+            if value:
+                parser.error(f"{flag} cannot be combined with --workers")
     
     print("\n" + "=" * 60)
     print("VAR ANALYSIS SYSTEM")
     print("=" * 60)
     
-    pipeline = VARPipeline(
-        use_roboflow=args.use_roboflow,
-        device=args.device
-    )
+    config = load_config(args.config) if args.config else {}
+    device = args.device or config.pop('device', None) or 'cpu'
+    if device == 'auto':
+        device = None
+    max_frames = args.max_frames if args.max_frames is not None else config.pop('max_frames', None)
+    save_video = config.pop('save_video', True) and not args.no_video
+    save_pitch_view = config.pop('save_pitch_view', True) and not args.no_pitch_view
     
-    result = pipeline.process_video(
-        video_path=args.video,
-        output_dir=args.output,
-        save_video=not args.no_video,
-        save_pitch_view=not args.no_pitch_view,
-        max_frames=args.max_frames
-    )
+    # Flags given on the command line override the file
+    overrides = {
+        'detection_batch_size': args.batch_size,
+        'max_batch_latency_ms': args.max_batch_latency,
+        'checkpoint_interval': args.checkpoint_interval,
+        'keyframe_interval': args.keyframe_interval,
+        'detection_imgsz': args.detection_imgsz,
+        'ball_crop_search': args.ball_crop,
+        'trace_interval': args.trace_interval,
+        'trajectory_export': args.export_trajectories,
+        'detection_cache_dir': args.detection_cache,
+        'reanalyze_from_cache': args.from_cache,
+        'offside_tolerance_cm': args.offside_tolerance,
+        'contact_threshold': args.contact_threshold
+    }
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    
+    if args.workers > 1:
+        from .parallel import process_video_parallel
+        
+        if save_video or save_pitch_view:
+            logger.warning(
+                "Chunked runs write no annotated video or pitch view "
+                "(pass --no-video --no-pitch-view to silence this)"
+            )
+        
+        result = process_video_parallel(
+            video_path=args.video,
+            output_dir=args.output,
+            config=config,
+            use_roboflow=args.use_roboflow,
+            device=device,
+            workers=args.workers,
+            chunk_seconds=args.chunk_seconds,
+            overlap_seconds=args.overlap_seconds,
+            max_frames=max_frames,
+            export_clips=False if args.no_clips else None
+        )
+    else:
+        pipeline = VARPipeline(
+            config=config,
+            use_roboflow=args.use_roboflow,
+            device=device
+        )
+        
+        result = pipeline.process_video(
+            video_path=args.video,
+            output_dir=args.output,
+            save_video=save_video,
+            save_pitch_view=save_pitch_view,
+            max_frames=max_frames,
+            pipelined=args.pipelined,
+            export_clips=False if args.no_clips else None,
+            resume=args.resume
+        )
     
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -0,0 +1,114 @@
+"""
+Spatial Query Module
+
+Vectorized neighbour search over player positions, used to generate
+contact candidates without visiting every player pair in Python.
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, Set, Tuple
+from scipy.spatial import cKDTree
+
+
+# Team labels that never take part in a contact
+NON_PLAYER_TEAMS = ("unknown", "referee")
+
+
+def pairs_within(
+    points: np.ndarray,
+    max_distance: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find all point pairs closer than a distance using a KD-tree.
+
+    Args:
+        points: (N, 2) array of positions
+        max_distance: Strict upper bound on pair distance
+
+    Returns:
+        (K, 2) index pairs with i < j in row-major order (the order a
+        nested i/j loop would visit them) and their (K,) distances
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+
+    if n < 2:
+        return np.zeros((0, 2), dtype=np.intp), np.zeros(0)
+
+    # query_pairs is inclusive and unordered; match the strict, row-major
+    # semantics of a nested loop
+    pairs = cKDTree(points).query_pairs(max_distance, output_type='ndarray')
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    distances = np.linalg.norm(points[pairs[:, 0]] - points[pairs[:, 1]], axis=1)
+
+    close = distances < max_distance
+    return pairs[close], distances[close]
+
+
+def is_opposing(team1: str, team2: str) -> bool:
+    """True if two team labels belong to opposing outfield teams."""
+    return (
+        team1 != team2
+        and team1 not in NON_PLAYER_TEAMS
+        and team2 not in NON_PLAYER_TEAMS
+    )
+
+
+def contact_candidates(
+    player_positions: Dict[int, Tuple[float, float]],
+    team_assignments: Dict[int, str],
+    max_distance: float
+) -> Tuple[List[int], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find opposing players closer than a distance.
+
+    Args:
+        player_positions: Player positions in pitch coordinates
+        team_assignments: Team per player (missing = unknown)
+        max_distance: Contact distance threshold (meters)
+
+    Returns:
+        Tuple of (player_ids, positions, pairs, distances) where
+        positions is (N, 2) in player_ids order and pairs indexes into
+        it, ordered as a nested loop over player_positions would be
+    """
+    player_ids = [
+        pid for pid in player_positions
+        if team_assignments.get(pid, "unknown") not in NON_PLAYER_TEAMS
+    ]
+
+    positions = np.array(
+        [player_positions[pid] for pid in player_ids], dtype=np.float64
+    ).reshape(-1, 2)
+
+    pairs, distances = pairs_within(positions, max_distance)
+
+    if len(pairs):
+        teams = np.array([team_assignments[pid] for pid in player_ids])
+        opposing = teams[pairs[:, 0]] != teams[pairs[:, 1]]
+        pairs, distances = pairs[opposing], distances[opposing]
+
+    return player_ids, positions, pairs, distances
+
+
+def broken_contacts(
+    pair_keys: Iterable[Tuple[int, int]],
+    in_contact: Set[Tuple[int, int]],
+    player_positions: Dict[int, Tuple[float, float]],
+    team_assignments: Dict[int, str]
+) -> List[Tuple[int, int]]:
+    """
+    Tracked pairs that were checked this frame and are no longer touching.
+
+    Pairs with a player missing from the frame, or that are not opposing
+    this frame, were not checked and keep their contact count.
+    """
+    return [
+        (p1, p2) for p1, p2 in pair_keys
+        if (p1, p2) not in in_contact
+        and p1 in player_positions and p2 in player_positions
+        and is_opposing(
+            team_assignments.get(p1, "unknown"),
+            team_assignments.get(p2, "unknown")
+        )
+    ]
@@ -0,0 +1,246 @@
+"""
+Staged Execution Module
+
+Runs a chain of processing stages on separate worker threads connected
+by bounded queues. Each stage handles items strictly in arrival order,
+so a single source produces outputs in the same order it was read.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from loguru import logger
+
+
+# Marks the end of the stream; forwarded through every queue
+_END = object()
+
+
+@dataclass
+class StageSpec:
+    """
+    Description of one pipeline stage.
+
+    Without a ``batch_size`` the stage calls ``fn`` once per item. With
+    one, it collects up to that many items (waiting at most
+    ``max_latency`` seconds after the first), calls ``fn`` once with the
+    list and expects a list of outputs back.
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    batch_size: Optional[int] = None
+    max_latency: float = 0.0
+
+
+class PipelineStage(threading.Thread):
+    """
+    A single worker in a staged pipeline.
+
+    Pulls items from ``inbox``, applies ``fn`` and pushes the result to
+    ``outbox`` (if any). A stage whose ``fn`` returns None acts as a sink.
+    """
+
+    def __init__(
+        self,
+        spec: StageSpec,
+        inbox: "queue.Queue",
+        outbox: Optional["queue.Queue"],
+        stop_event: threading.Event
+    ):
+        """
+        Initialize stage.
+
+        Args:
+            spec: Stage name, function and batching settings
+            inbox: Queue to read items from
+            outbox: Queue to write results to (None for a sink)
+            stop_event: Shared event set when any stage fails
+        """
+        super().__init__(name=f"var-{spec.name}", daemon=True)
+        self.stage_name = spec.name
+        self.fn = spec.fn
+        self.batch_size = spec.batch_size
+        self.max_latency = spec.max_latency
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = stop_event
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        finished = False
+        while not finished:
+            if self.batch_size is not None:
+                items, finished = self._get_batch()
+                if not items:
+                    break
+            else:
+                item = _get(self.inbox, self.stop_event)
+                if item is _END:
+                    break
+                items = item
+
+            try:
+                output = self.fn(items)
+            except BaseException as e:
+                logger.error(f"Stage '{self.stage_name}' failed: {e}")
+                self.error = e
+                self.stop_event.set()
+                break
+
+            if self.outbox is None or output is None:
+                continue
+
+            outputs = output if self.batch_size is not None else [output]
+            if not all(_put(self.outbox, o, self.stop_event) for o in outputs):
+                break
+
+        if self.outbox is not None:
+            _put(self.outbox, _END, self.stop_event)
+
+    def _get_batch(self):
+        """Collect up to batch_size items; returns (items, end_of_stream)."""
+        first = _get(self.inbox, self.stop_event)
+        if first is _END:
+            return [], True
+
+        items = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.inbox.get(timeout=remaining) if remaining > 0 \
+                    else self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                return items, True
+            items.append(item)
+
+        return items, False
+
+
+class StagedRunner:
+    """
+    Connects a source iterable and a list of stages with bounded queues.
+
+    The source is consumed on its own thread, every stage runs on its own
+    thread, and the first error raised anywhere is re-raised by ``run``.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        stages: List[StageSpec],
+        queue_size: int = 8
+    ):
+        """
+        Initialize runner.
+
+        Args:
+            source: Iterable producing the input items
+            stages: Ordered list of stage specs
+            queue_size: Capacity of each inter-stage queue
+        """
+        self.source = source
+        self.stage_specs = stages
+        self.queue_size = max(1, queue_size)
+
+        self.stop_event = threading.Event()
+        self.source_error: Optional[BaseException] = None
+
+    def run(self):
+        """Run all stages to completion."""
+        queues = [
+            queue.Queue(maxsize=self.queue_size)
+            for _ in range(len(self.stage_specs))
+        ]
+
+        stages = []
+        for i, spec in enumerate(self.stage_specs):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            stages.append(
+                PipelineStage(spec, queues[i], outbox, self.stop_event)
+            )
+
+        feeder = threading.Thread(
+            target=self._feed, args=(queues[0],),
+            name="var-source", daemon=True
+        )
+
+        for stage in stages:
+            stage.start()
+        feeder.start()
+
+        feeder.join()
+        for stage in stages:
+            stage.join()
+
+        if self.source_error is not None:
+            raise self.source_error
+        for stage in stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def _feed(self, outbox: "queue.Queue"):
+        try:
+            for item in self.source:
+                if not _put(outbox, item, self.stop_event):
+                    return
+        except BaseException as e:
+            logger.error(f"Pipeline source failed: {e}")
+            self.source_error = e
+            self.stop_event.set()
+            return
+        _put(outbox, _END, self.stop_event)
+
+
+def _get(inbox: "queue.Queue", stop_event: threading.Event) -> Any:
+    """Blocking get that gives up once the pipeline is stopped."""
+    while True:
+        try:
+            return inbox.get(timeout=0.1)
+        except queue.Empty:
+            if stop_event.is_set():
+                return _END
+
+
+def _put(outbox: "queue.Queue", item: Any, stop_event: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is stopped."""
+    while not stop_event.is_set():
+        try:
+            outbox.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def batched(
+    items: Iterable[Any],
+    batch_size: int,
+    max_latency: float = 0.0
+) -> Iterator[List[Any]]:
+    """
+    Group an iterable into lists of up to ``batch_size`` items.
+
+    A batch is also closed early once ``max_latency`` seconds have passed
+    since its first item arrived (0 disables the deadline).
+    """
+    batch = []
+    started = 0.0
+    for item in items:
+        if not batch:
+            started = time.monotonic()
+        batch.append(item)
+
+        if len(batch) >= batch_size or (
+            max_latency > 0 and time.monotonic() - started >= max_latency
+        ):
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
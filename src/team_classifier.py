@@ -8,19 +8,32 @@ Uses color histogram clustering and temporal smoothing.
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 from collections import defaultdict, deque
+from functools import partial
 import cv2
 from sklearn.cluster import KMeans
+from scipy.optimize import linear_sum_assignment
 from scipy.spatial.distance import cdist
 
 from loguru import logger
 
+from .tracking import box_iou_matrix
+
 
 class TeamClassifier:
     """
     Classifies players into teams based on jersey color.
     
     Uses K-means clustering on color histograms with
-    temporal smoothing for consistent assignments.
+    temporal smoothing for consistent assignments. The color model is
+    fitted once during a warm-up phase; afterwards players are assigned
+    to the nearest centroid, centroids adapt slowly to lighting changes
+    and a full refit happens only when the colors drift away from the
+    model.
+    
+    With temporal smoothing, a track whose vote history is unanimous is
+    locked to its team and skipped by feature extraction; locked tracks
+    are re-checked every ``reverify_interval`` frames or while they
+    overlap another player.
     """
     
     def __init__(
@@ -29,7 +42,13 @@ class TeamClassifier:
         method: str = "clustering",
         temporal_smoothing: bool = True,
         smoothing_window: int = 10,
-        color_space: str = "hsv"
+        color_space: str = "hsv",
+        warmup_frames: int = 30,
+        adapt_rate: float = 0.05,
+        drift_threshold: float = 2.0,
+        sample_buffer_size: int = 1000,
+        cache_tracks: bool = True,
+        reverify_interval: int = 30
     ):
         """
         Initialize classifier.
@@ -40,20 +59,52 @@ class TeamClassifier:
             temporal_smoothing: Whether to smooth assignments over time
             smoothing_window: Number of frames for smoothing
             color_space: Color space for features (hsv/lab/rgb)
+            warmup_frames: Frames of samples collected before the final
+                           color model is fitted
+            adapt_rate: Step size of the incremental centroid update
+                        (0 disables adaptation)
+            drift_threshold: Refit when the mean distance to the nearest
+                             centroid exceeds this multiple of the fit-time
+                             distance
+            sample_buffer_size: Recent feature samples kept for (re)fitting
+            cache_tracks: Lock tracks with unanimous votes and skip them
+            reverify_interval: Frames between re-checks of a locked track
         """
         self.n_teams = n_teams
         self.method = method
         self.temporal_smoothing = temporal_smoothing
         self.smoothing_window = smoothing_window
         self.color_space = color_space
+        self.warmup_frames = warmup_frames
+        self.adapt_rate = adapt_rate
+        self.drift_threshold = drift_threshold
         
         # Color model
         self.kmeans: Optional[KMeans] = None
+        self.centroids: Optional[np.ndarray] = None
         self.team_colors: Dict[str, np.ndarray] = {}
         
+        # Warm-up and drift state
+        self.samples: deque = deque(maxlen=sample_buffer_size)
+        self.frames_seen = 0
+        self.warmed_up = False
+        self.baseline_distance = 0.0
+        self.drift_distance = 0.0
+        self.refits = 0
+        
+        # Per-track team cache
+        self.cache_tracks = cache_tracks and temporal_smoothing
+        self.reverify_interval = max(1, reverify_interval)
+        self.locked_teams: Dict[int, str] = {}
+        self.verified_at: Dict[int, int] = {}
+        self.frame_index = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        
         # Temporal smoothing
+        # (partial rather than a lambda so the classifier can be pickled)
         self.assignment_history: Dict[int, deque] = defaultdict(
-            lambda: deque(maxlen=smoothing_window)
+            partial(deque, maxlen=smoothing_window)
         )
         
         # Predefined colors (if using predefined method)
@@ -118,6 +169,77 @@ class TeamClassifier:
         
         return np.array(features)
     
+    def extract_color_features_batch(
+        self,
+        frame: np.ndarray,
+        bboxes: List[np.ndarray]
+    ) -> np.ndarray:
+        """
+        Extract color features for all players in one pass.
+        
+        Produces the same features as extract_color_features, but
+        gathers every player's jersey pixels into a single strip image,
+        converts it with one cv2.cvtColor call and builds all histograms
+        with one np.bincount per channel.
+        
+        Args:
+            frame: BGR image
+            bboxes: List of bounding boxes [x1, y1, x2, y2]
+        
+        Returns:
+            Nx12 feature matrix (all-zero rows for empty regions)
+        """
+        n = len(bboxes)
+        if n == 0:
+            return np.zeros((0, 12))
+        
+        frame_h, frame_w = frame.shape[:2]
+        boxes = np.asarray(bboxes).reshape(-1, 4).astype(int)
+        x1 = np.maximum(boxes[:, 0], 0)
+        y1 = np.maximum(boxes[:, 1], 0)
+        x2 = np.minimum(boxes[:, 2], frame_w)
+        y2 = np.minimum(boxes[:, 3], frame_h)
+        
+        # Gather jersey (upper body) pixels of every player
+        pixels = []
+        counts = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            if x2[i] <= x1[i] or y2[i] <= y1[i]:
+                continue
+            
+            h = y2[i] - y1[i]
+            top = y1[i] + int(h * 0.1)
+            bottom = y1[i] + int(h * 0.5)
+            if bottom <= top:
+                top, bottom = y1[i], y2[i]
+            
+            region = frame[top:bottom, x1[i]:x2[i]].reshape(-1, 3)
+            pixels.append(region)
+            counts[i] = len(region)
+        
+        if not pixels:
+            return np.zeros((n, 12))
+        
+        strip = np.concatenate(pixels)[np.newaxis, :, :]
+        
+        # Convert color space once for all players
+        if self.color_space == "hsv":
+            strip = cv2.cvtColor(strip, cv2.COLOR_BGR2HSV)
+        elif self.color_space == "lab":
+            strip = cv2.cvtColor(strip, cv2.COLOR_BGR2LAB)
+        planes = strip.reshape(-1, 3).T >> 5
+        
+        # 8 bins over [0, 256) per channel, offset by owning player
+        offsets = np.repeat(np.arange(0, n * 8, 8, dtype=np.intp), counts)
+        hist = np.stack([
+            np.bincount(offsets + planes[c], minlength=n * 8).reshape(n, 8)
+            for c in range(3)
+        ], axis=1)
+        
+        # Normalize and keep the first 4 bins of each channel
+        hist = hist / (counts[:, np.newaxis, np.newaxis] + 1e-6)
+        return hist[:, :, :4].reshape(n, 12)
+    
     def classify(
         self,
         frame: np.ndarray,
@@ -142,29 +264,47 @@ class TeamClassifier:
         if track_ids is None:
             track_ids = list(range(len(bboxes)))
         
-        # Extract features
-        features = []
-        valid_indices = []
+        self.frame_index += 1
+        result = {}
         
-        for i, bbox in enumerate(bboxes):
-            feat = self.extract_color_features(frame, bbox)
-            if feat is not None and not np.all(feat == 0):
-                features.append(feat)
-                valid_indices.append(i)
+        # Boxes that intersect another player mix two kits
+        overlapping = self._overlapping(bboxes)
         
-        if len(features) < self.n_teams:
-            return {}
+        # Serve locked tracks from the cache
+        pending = list(range(len(bboxes)))
+        if self.cache_tracks and self.locked_teams:
+            pending = []
+            for i, track_id in enumerate(track_ids):
+                team = self.locked_teams.get(track_id)
+                due = self.frame_index - self.verified_at.get(track_id, 0) >= self.reverify_interval
+                if team is None or due or overlapping[i]:
+                    pending.append(i)
+                else:
+                    result[track_id] = team
+            
+            self.cache_hits += len(bboxes) - len(pending)
+        self.cache_lookups += len(bboxes)
+        
+        if not pending:
+            return result
+        
+        # Extract features for new, contested and re-checked tracks
+        features = self.extract_color_features_batch(frame, [bboxes[i] for i in pending])
+        valid = np.flatnonzero(np.any(features != 0, axis=1))
         
-        features = np.array(features)
+        if len(valid) == 0 or (not result and len(valid) < self.n_teams):
+            return result
         
-        # Cluster
+        features = features[valid]
+        valid_indices = [pending[i] for i in valid]
+        
+        # Cluster; after warm-up, overlapping boxes are classified but not learned from
         if self.method == "clustering":
-            assignments = self._cluster_classify(features)
+            assignments = self._cluster_classify(features, ~overlapping[valid_indices])
         else:
             assignments = self._predefined_classify(features)
         
         # Build result
-        result = {}
         for i, idx in enumerate(valid_indices):
             track_id = track_ids[idx]
             team = assignments[i]
@@ -174,29 +314,136 @@ class TeamClassifier:
                 self.assignment_history[track_id].append(team)
                 team = self._smooth_assignment(track_id)
             
+            if self.cache_tracks:
+                self._update_lock(track_id, assignments[i])
+            
             result[track_id] = team
         
         return result
     
-    def _cluster_classify(self, features: np.ndarray) -> List[str]:
-        """Classify using K-means clustering."""
-        n_clusters = min(self.n_teams + 1, len(features))  # +1 for referee
-        
-        # Fit or update K-means
-        if self.kmeans is None or len(features) > 10:
-            self.kmeans = KMeans(
-                n_clusters=n_clusters,
-                random_state=42,
-                n_init=10
+    def _overlapping(self, bboxes: List[np.ndarray]) -> np.ndarray:
+        """Flag boxes that intersect any other player's box."""
+        iou = box_iou_matrix(bboxes, bboxes)
+        np.fill_diagonal(iou, 0.0)
+        return iou.max(axis=1) > 0 if len(iou) > 1 else np.zeros(len(iou), dtype=bool)
+    
+    def _update_lock(self, track_id: int, vote: str):
+        """Lock, confirm or release a track's cached team after a new vote."""
+        locked = self.locked_teams.get(track_id)
+        
+        if locked is not None:
+            if vote == locked:
+                self.verified_at[track_id] = self.frame_index
+            else:
+                # Contested: classify every frame until votes agree again
+                del self.locked_teams[track_id]
+                self.verified_at.pop(track_id, None)
+            return
+        
+        # Only lock against the final color model
+        if self.method == "clustering" and not self.warmed_up:
+            return
+        
+        history = self.assignment_history[track_id]
+        if (
+            len(history) == history.maxlen
+            and vote != "unknown"
+            and all(team == vote for team in history)
+        ):
+            self.locked_teams[track_id] = vote
+            # Stagger re-checks so tracks locked together aren't all due at once
+            self.verified_at[track_id] = self.frame_index - track_id % self.reverify_interval
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of player classifications served from the track cache."""
+        if self.cache_lookups == 0:
+            return 0.0
+        return self.cache_hits / self.cache_lookups
+    
+    def _cluster_classify(self, features: np.ndarray, learn: np.ndarray = None) -> List[str]:
+        """
+        Classify using a K-means color model fitted once and reused.
+        
+        Args:
+            features: (N, D) color features
+            learn: (N,) mask of features the fitted model may learn
+                   from (samples, centroid updates, drift); warm-up
+                   always keeps every sample, default all
+        
+        Returns:
+            Team name per feature row
+        """
+        if learn is None or not self.warmed_up:
+            learn = np.ones(len(features), dtype=bool)
+        
+        self.frames_seen += 1
+        self.samples.extend(features[learn])
+        
+        if self.centroids is None:
+            # Provisional model from the first frames
+            if len(self.samples) < self.n_teams + 1:
+                return ["unknown"] * len(features)
+            self._fit(np.array(self.samples))
+        elif not self.warmed_up and self.frames_seen >= self.warmup_frames:
+            # Final model from all warm-up samples
+            self._fit(np.array(self.samples))
+            self.warmed_up = True
+        
+        distances = cdist(features, self.centroids)
+        labels = distances.argmin(axis=1)
+        
+        if self.warmed_up and learn.any():
+            self._adapt(
+                features[learn], labels[learn],
+                distances[np.arange(len(labels)), labels][learn]
             )
-            labels = self.kmeans.fit_predict(features)
-        else:
-            labels = self.kmeans.predict(features)
         
         # Map cluster labels to team names
         team_names = ["team_a", "team_b", "referee"]
         return [team_names[min(label, len(team_names) - 1)] for label in labels]
     
+    def _fit(self, samples: np.ndarray):
+        """Fit K-means on samples, keeping existing cluster order."""
+        n_clusters = self.n_teams + 1  # +1 for referee
+        
+        self.kmeans = KMeans(
+            n_clusters=n_clusters,
+            random_state=42,
+            n_init=10
+        )
+        labels = self.kmeans.fit_predict(samples)
+        centroids = self.kmeans.cluster_centers_
+        
+        if self.centroids is None:
+            # Largest clusters are the teams, the smallest the referee
+            sizes = np.bincount(labels, minlength=n_clusters)
+            centroids = centroids[np.argsort(-sizes, kind="stable")]
+        else:
+            # Match new clusters to old ones so team names don't swap
+            rows, cols = linear_sum_assignment(cdist(self.centroids, centroids))
+            centroids = centroids[cols[np.argsort(rows)]]
+        
+        self.centroids = centroids
+        self.baseline_distance = max(
+            float(cdist(samples, centroids).min(axis=1).mean()), 1e-6
+        )
+        self.drift_distance = self.baseline_distance
+    
+    def _adapt(self, features: np.ndarray, labels: np.ndarray, distances: np.ndarray):
+        """Incremental centroid update and drift-triggered refit."""
+        if self.adapt_rate > 0:
+            for k in np.unique(labels):
+                target = features[labels == k].mean(axis=0)
+                self.centroids[k] += self.adapt_rate * (target - self.centroids[k])
+        
+        self.drift_distance = 0.9 * self.drift_distance + 0.1 * float(distances.mean())
+        
+        if self.drift_distance > self.drift_threshold * self.baseline_distance:
+            logger.info("Team colors drifted, refitting color model")
+            self._fit(np.array(self.samples))
+            self.refits += 1
+    
     def _predefined_classify(self, features: np.ndarray) -> List[str]:
         """Classify based on predefined team colors."""
         assignments = []
@@ -244,9 +491,36 @@ class TeamClassifier:
             "referee": np.array(referee_color)
         }
     
+    def last_team(self, track_id: int) -> Optional[str]:
+        """Locked or smoothed team of a track, None if it was never classified."""
+        locked = self.locked_teams.get(track_id)
+        if locked is not None:
+            return locked
+        if self.assignment_history.get(track_id):
+            return self._smooth_assignment(track_id)
+        return None
+    
+    def forget(self, track_id: int):
+        """Drop vote history and cached team for a track that has ended."""
+        self.assignment_history.pop(track_id, None)
+        self.locked_teams.pop(track_id, None)
+        self.verified_at.pop(track_id, None)
+    
     def reset(self):
         """Reset classifier state."""
         self.kmeans = None
+        self.centroids = None
+        self.samples.clear()
+        self.frames_seen = 0
+        self.warmed_up = False
+        self.baseline_distance = 0.0
+        self.drift_distance = 0.0
+        self.refits = 0
+        self.locked_teams.clear()
+        self.verified_at.clear()
+        self.frame_index = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
         self.assignment_history.clear()
 
 
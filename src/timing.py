@@ -0,0 +1,224 @@
+"""
+Stage Timing Module
+
+Low-overhead per-stage timers for the pipeline. Every sample goes into a
+fixed log-bucket histogram (about 9% resolution from 1us to 100s), so
+percentiles cost nothing per frame and histograms from several runs or
+worker processes can be added together. A sampled subset of frames can
+also be recorded as a Chrome trace (chrome://tracing, ui.perfetto.dev).
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+class LatencyHistogram:
+    """Histogram of durations with logarithmic buckets."""
+
+    # Buckets per doubling and the smallest bucketed duration (seconds)
+    BUCKETS_PER_OCTAVE = 8
+    MIN_SECONDS = 1e-6
+    NUM_BUCKETS = 8 * 27  # up to ~134s
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float, count: int = 1):
+        """Add count samples of the given duration."""
+        if seconds > self.MIN_SECONDS:
+            bucket = min(
+                int(math.log2(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_OCTAVE),
+                self.NUM_BUCKETS - 1
+            )
+        else:
+            bucket = 0
+        self.counts[bucket] += count
+        self.count += count
+        self.total += seconds * count
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the samples of another histogram."""
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """
+        Approximate q-th percentile in seconds.
+
+        Args:
+            q: Percentile in [0, 100]
+
+        Returns:
+            Geometric centre of the bucket holding the percentile
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bucket, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                break
+
+        value = self.MIN_SECONDS * 2 ** ((bucket + 0.5) / self.BUCKETS_PER_OCTAVE)
+        return min(value, self.max)
+
+    def summary(self) -> Dict[str, float]:
+        """Count, total and mean/p50/p95/p99/max in milliseconds."""
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class StageTimer:
+    """
+    Per-stage latency histograms with optional trace sampling.
+
+    Stages record from whichever thread runs them; each stage is expected
+    to be recorded by one thread at a time, which holds for both the
+    sequential and the pipelined loop.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_interval: int = 0,
+        trace_max_events: int = 100000
+    ):
+        """
+        Initialize timer.
+
+        Args:
+            enabled: Record anything at all
+            trace_interval: Trace every N-th frame (0 = no trace)
+            trace_max_events: Stop tracing after this many events
+        """
+        self.enabled = enabled
+        self.trace_interval = trace_interval
+        self.trace_max_events = trace_max_events
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.trace_events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+
+    def record(
+        self,
+        stage: str,
+        start: float,
+        frame_number: Optional[int] = None,
+        count: int = 1
+    ) -> float:
+        """
+        Record a stage that started at ``start`` and ends now.
+
+        Args:
+            stage: Stage name
+            start: time.perf_counter() at the start of the stage
+            frame_number: First frame the work belongs to
+            count: Frames covered (a batch is split evenly among them)
+
+        Returns:
+            The end time, to chain into the next stage
+        """
+        end = time.perf_counter()
+        self.add(stage, end - start, start, frame_number, count)
+        return end
+
+    def add(
+        self,
+        stage: str,
+        seconds: float,
+        start: Optional[float] = None,
+        frame_number: Optional[int] = None,
+        count: int = 1
+    ):
+        """
+        Record a measured duration.
+
+        Args:
+            stage: Stage name
+            seconds: Duration of the stage
+            start: time.perf_counter() at the start (for the trace)
+            frame_number: First frame the work belongs to
+            count: Frames covered (a batch is split evenly among them)
+        """
+        if not self.enabled:
+            return
+
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        histogram.add(seconds / count, count)
+
+        if (
+            self.trace_interval and start is not None and frame_number is not None and
+            len(self.trace_events) < self.trace_max_events and
+            (frame_number + count - 1) // self.trace_interval * self.trace_interval >= frame_number
+        ):
+            thread = threading.current_thread()
+            self._threads.setdefault(thread.ident, thread.name)
+            self.trace_events.append({
+                'name': stage,
+                'ph': 'X',
+                'ts': round((start - self._origin) * 1e6, 1),
+                'dur': round(seconds * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': thread.ident,
+                'args': {'frame': frame_number, 'frames': count}
+            })
+
+    def merge(self, histograms: Dict[str, LatencyHistogram]):
+        """Add histograms recorded elsewhere (e.g. by a worker process)."""
+        for stage, histogram in histograms.items():
+            self.histograms.setdefault(stage, LatencyHistogram()).merge(histogram)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage statistics (see LatencyHistogram.summary)."""
+        return {stage: h.summary() for stage, h in self.histograms.items()}
+
+    def write_trace(self, path: Union[str, Path]):
+        """Write the sampled events as Chrome trace JSON."""
+        pid = os.getpid()
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in self._threads.items()
+        ]
+        with open(path, 'w') as f:
+            json.dump(
+                {'traceEvents': metadata + self.trace_events, 'displayTimeUnit': 'ms'}, f
+            )
+
+    def reset(self):
+        """Drop all samples and trace events."""
+        self.histograms = {}
+        self.trace_events = []
+        self._threads = {}
+        self._origin = time.perf_counter()
+
+
+def format_timings(summary: Dict[str, Dict[str, float]]) -> str:
+    """One-line p50/p95 per stage for logging."""
+    return ", ".join(
+        f"{stage} {s['p50_ms']:.1f}/{s['p95_ms']:.1f}ms" for stage, s in summary.items()
+    )
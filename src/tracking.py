@@ -6,18 +6,254 @@ Maintains consistent IDs across frames.
 """
 
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass, field
 from collections import deque
 import cv2
 from scipy.optimize import linear_sum_assignment
 from scipy.spatial.distance import cdist
 
-from .detection import Detection
+from .detection import Detection, DetectionArrays
 
 from loguru import logger
 
 
+IOU_METRICS = ("iou", "giou", "diou")
+
+
+def box_iou_matrix(
+    boxes1: np.ndarray,
+    boxes2: np.ndarray,
+    metric: str = "iou"
+) -> np.ndarray:
+    """
+    Pairwise overlap between two sets of [x1, y1, x2, y2] boxes.
+    
+    Args:
+        boxes1: (N, 4) array
+        boxes2: (M, 4) array
+        metric: "iou", "giou" (generalized IoU) or "diou" (distance IoU)
+    
+    Returns:
+        (N, M) matrix of overlap scores
+    """
+    if metric not in IOU_METRICS:
+        raise ValueError(f"Unknown IoU metric: {metric}")
+    
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    
+    if len(boxes1) == 0 or len(boxes2) == 0:
+        return np.zeros((len(boxes1), len(boxes2)))
+    
+    b1 = boxes1[:, None, :]
+    b2 = boxes2[None, :, :]
+    
+    inter_w = np.clip(np.minimum(b1[..., 2], b2[..., 2]) - np.maximum(b1[..., 0], b2[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(b1[..., 3], b2[..., 3]) - np.maximum(b1[..., 1], b2[..., 1]), 0, None)
+    intersection = inter_w * inter_h
+    
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+    
+    valid = union > 0
+    iou = np.divide(intersection, union, out=np.zeros_like(union), where=valid)
+    
+    if metric == "iou":
+        return iou
+    
+    # Smallest box enclosing both
+    enclose_w = np.maximum(b1[..., 2], b2[..., 2]) - np.minimum(b1[..., 0], b2[..., 0])
+    enclose_h = np.maximum(b1[..., 3], b2[..., 3]) - np.minimum(b1[..., 1], b2[..., 1])
+    
+    if metric == "giou":
+        enclose_area = enclose_w * enclose_h
+        penalty = np.divide(
+            enclose_area - union, enclose_area,
+            out=np.zeros_like(union), where=enclose_area > 0
+        )
+    else:
+        center_dx = (b1[..., 0] + b1[..., 2] - b2[..., 0] - b2[..., 2]) / 2
+        center_dy = (b1[..., 1] + b1[..., 3] - b2[..., 1] - b2[..., 3]) / 2
+        diagonal_sq = enclose_w ** 2 + enclose_h ** 2
+        penalty = np.divide(
+            center_dx ** 2 + center_dy ** 2, diagonal_sq,
+            out=np.zeros_like(union), where=diagonal_sq > 0
+        )
+    
+    return iou - penalty
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    """Convert (N, 4) [x1, y1, x2, y2] boxes to [cx, cy, w, h]."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    wh = boxes[:, 2:] - boxes[:, :2]
+    return np.hstack([boxes[:, :2] + wh / 2, wh])
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """Convert (N, 4) [cx, cy, w, h] boxes to [x1, y1, x2, y2]."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    half = boxes[:, 2:] / 2
+    return np.hstack([boxes[:, :2] - half, boxes[:, :2] + half])
+
+
+class BatchKalmanFilter:
+    """
+    Constant-velocity Kalman filter for many boxes at once.
+    
+    State per box is [cx, cy, w, h, vcx, vcy, vw, vh]. All boxes share
+    one state matrix and one covariance stack, indexed by slot, so
+    prediction and correction for every track are a few batched matrix
+    operations per frame. Slots are recycled through a free list.
+    """
+    
+    NDIM = 4
+    
+    def __init__(
+        self,
+        std_weight_position: float = 1.0 / 20,
+        std_weight_velocity: float = 1.0 / 160,
+        capacity: int = 64
+    ):
+        """
+        Initialize filter.
+        
+        Args:
+            std_weight_position: Position noise relative to box height
+            std_weight_velocity: Velocity noise relative to box height
+            capacity: Initial number of slots (grows as needed)
+        """
+        self.std_weight_position = std_weight_position
+        self.std_weight_velocity = std_weight_velocity
+        
+        ndim = self.NDIM
+        self._motion = np.eye(2 * ndim)
+        self._motion[:ndim, ndim:] = np.eye(ndim)
+        
+        self.mean = np.zeros((capacity, 2 * ndim))
+        self.covariance = np.zeros((capacity, 2 * ndim, 2 * ndim))
+        self.active = np.zeros(capacity, dtype=bool)
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+    
+    def add(self, bbox: np.ndarray) -> int:
+        """Start tracking a [x1, y1, x2, y2] box; returns its slot."""
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        
+        measurement = xyxy_to_cxcywh(bbox)[0]
+        h = max(measurement[3], 1.0)
+        std = np.array([
+            2 * self.std_weight_position * h,
+            2 * self.std_weight_position * h,
+            2 * self.std_weight_position * h,
+            2 * self.std_weight_position * h,
+            10 * self.std_weight_velocity * h,
+            10 * self.std_weight_velocity * h,
+            10 * self.std_weight_velocity * h,
+            10 * self.std_weight_velocity * h
+        ])
+        
+        self.mean[slot] = np.r_[measurement, np.zeros(self.NDIM)]
+        self.covariance[slot] = np.diag(std ** 2)
+        self.active[slot] = True
+        return slot
+    
+    def remove(self, slot: int):
+        """Release a slot."""
+        self.active[slot] = False
+        self._free.append(slot)
+    
+    def predict(self, coasting_slots: np.ndarray = None):
+        """
+        Advance every active box by one frame.
+        
+        Args:
+            coasting_slots: Slots that missed their last measurement; their
+                            size velocity is zeroed so boxes do not shrink
+                            or grow without bound while unobserved
+        """
+        if coasting_slots is not None and len(coasting_slots) > 0:
+            self.mean[np.asarray(coasting_slots, dtype=int), self.NDIM + 2:] = 0
+        
+        slots = np.flatnonzero(self.active)
+        if len(slots) == 0:
+            return
+        
+        mean = self.mean[slots] @ self._motion.T
+        h = np.maximum(mean[:, 3], 1.0)
+        std_pos = self.std_weight_position * h
+        std_vel = self.std_weight_velocity * h
+        noise = np.repeat(
+            np.stack([std_pos, std_vel], axis=1) ** 2, self.NDIM, axis=1
+        )
+        
+        covariance = self._motion @ self.covariance[slots] @ self._motion.T
+        covariance[:, np.arange(8), np.arange(8)] += noise
+        
+        self.mean[slots] = mean
+        self.covariance[slots] = covariance
+    
+    def update(self, slots: np.ndarray, bboxes: np.ndarray):
+        """
+        Correct the given slots with measured [x1, y1, x2, y2] boxes.
+        
+        Args:
+            slots: (K,) slot indices
+            bboxes: (K, 4) measured boxes, row-aligned with slots
+        """
+        slots = np.asarray(slots, dtype=int)
+        if len(slots) == 0:
+            return
+        
+        ndim = self.NDIM
+        measurement = xyxy_to_cxcywh(bboxes)
+        mean = self.mean[slots]
+        covariance = self.covariance[slots]
+        
+        h = np.maximum(mean[:, 3], 1.0)
+        measurement_var = (self.std_weight_position * h) ** 2
+        
+        # Project to measurement space (H selects the first ndim states)
+        innovation_cov = covariance[:, :ndim, :ndim].copy()
+        innovation_cov[:, np.arange(ndim), np.arange(ndim)] += measurement_var[:, None]
+        
+        # K = P H^T S^-1, solved as S K^T = H P
+        cross_cov = covariance[:, :, :ndim]
+        gain = np.linalg.solve(
+            innovation_cov, cross_cov.transpose(0, 2, 1)
+        ).transpose(0, 2, 1)
+        
+        innovation = measurement - mean[:, :ndim]
+        self.mean[slots] = mean + np.einsum('kij,kj->ki', gain, innovation)
+        self.covariance[slots] = covariance - gain @ innovation_cov @ gain.transpose(0, 2, 1)
+    
+    def boxes(self, slots: np.ndarray) -> np.ndarray:
+        """Current [x1, y1, x2, y2] estimates for the given slots."""
+        state = self.mean[np.asarray(slots, dtype=int), :self.NDIM].copy()
+        state[:, 2:] = np.maximum(state[:, 2:], 1.0)
+        return cxcywh_to_xyxy(state)
+    
+    def velocities(self, slots: np.ndarray) -> np.ndarray:
+        """Center velocities (pixels/frame) for the given slots."""
+        return self.mean[np.asarray(slots, dtype=int), self.NDIM:self.NDIM + 2].copy()
+    
+    def reset(self):
+        """Release all slots."""
+        self.active[:] = False
+        self._free = list(range(len(self.active) - 1, -1, -1))
+    
+    def _grow(self):
+        old = len(self.active)
+        new = old * 2
+        self.mean = np.vstack([self.mean, np.zeros_like(self.mean)])
+        self.covariance = np.concatenate([self.covariance, np.zeros_like(self.covariance)])
+        self.active = np.r_[self.active, np.zeros(old, dtype=bool)]
+        self._free.extend(range(new - 1, old - 1, -1))
+
+
 @dataclass
 class TrackedObject:
     """A tracked object with history."""
@@ -30,6 +266,7 @@ class TrackedObject:
     time_since_update: int = 0
     history: deque = field(default_factory=lambda: deque(maxlen=30))
     velocity: np.ndarray = field(default_factory=lambda: np.zeros(2))
+    kalman_slot: int = -1
     
     @property
     def center(self) -> Tuple[float, float]:
@@ -45,15 +282,32 @@ class TrackedObject:
             self.bbox[3]
         )
     
-    def update(self, detection: Detection):
-        """Update track with new detection."""
-        # Calculate velocity
-        old_center = np.array(self.center)
-        new_center = np.array(detection.center)
-        self.velocity = new_center - old_center
+    def update(
+        self,
+        detection: Detection,
+        filtered_bbox: np.ndarray = None,
+        filtered_velocity: np.ndarray = None
+    ):
+        """
+        Update track with new detection.
+        
+        Args:
+            detection: Matched detection
+            filtered_bbox: Box estimate from the tracker's Kalman filter
+                           (uses the raw detection box if None)
+            filtered_velocity: Center velocity from the Kalman filter
+        """
+        if filtered_bbox is not None:
+            self.bbox = filtered_bbox
+            self.velocity = filtered_velocity
+        else:
+            # Calculate velocity
+            old_center = np.array(self.center)
+            new_center = np.array(detection.center)
+            self.velocity = new_center - old_center
+            self.bbox = detection.bbox
         
         # Update state
-        self.bbox = detection.bbox
         self.confidence = detection.confidence
         self.hits += 1
         self.time_since_update = 0
@@ -62,31 +316,75 @@ class TrackedObject:
         # Add to history
         self.history.append(self.center)
     
-    def predict(self):
-        """Predict next position using velocity."""
-        self.bbox[0] += self.velocity[0]
-        self.bbox[2] += self.velocity[0]
-        self.bbox[1] += self.velocity[1]
-        self.bbox[3] += self.velocity[1]
+    def predict(
+        self,
+        predicted_bbox: np.ndarray = None,
+        predicted_velocity: np.ndarray = None
+    ):
+        """
+        Predict next position.
+        
+        Args:
+            predicted_bbox: Box predicted by the tracker's Kalman filter
+                            (falls back to shifting by velocity if None)
+            predicted_velocity: Center velocity from the Kalman filter
+        """
+        if predicted_bbox is not None:
+            self.bbox = predicted_bbox
+            self.velocity = predicted_velocity
+        else:
+            self.bbox[0] += self.velocity[0]
+            self.bbox[2] += self.velocity[0]
+            self.bbox[1] += self.velocity[1]
+            self.bbox[3] += self.velocity[1]
         self.time_since_update += 1
         self.age += 1
 
+    def snapshot(self) -> 'TrackedObject':
+        """Copy of the current state, safe to hand to another thread."""
+        return TrackedObject(
+            track_id=self.track_id,
+            bbox=self.bbox.copy(),
+            confidence=self.confidence,
+            class_name=self.class_name,
+            age=self.age,
+            hits=self.hits,
+            time_since_update=self.time_since_update,
+            history=deque(self.history, maxlen=self.history.maxlen),
+            velocity=self.velocity.copy(),
+            kalman_slot=self.kalman_slot
+        )
+
 
 class MultiObjectTracker:
     """
     Multi-object tracker using Hungarian algorithm.
     
-    Maintains consistent track IDs across frames using
-    IoU-based matching and Kalman filtering concepts.
+    Maintains consistent track IDs across frames using IoU-based
+    matching against constant-velocity Kalman predictions. The Kalman
+    state of all tracks is held in one BatchKalmanFilter.
+    
+    Association follows ByteTrack: high-score detections are matched
+    to all tracks first, then the tracks left over are matched to the
+    low-score detections, so briefly occluded players keep their IDs
+    instead of spawning new tracks.
+    
+    Components that keep per-track state subscribe to TRACK_CREATED /
+    TRACK_DELETED events so they can evict it when a track dies.
     """
     
+    TRACK_CREATED = "created"
+    TRACK_DELETED = "deleted"
+    
     def __init__(
         self,
         max_age: int = 30,
         min_hits: int = 3,
         iou_threshold: float = 0.3,
         track_thresh: float = 0.5,
-        match_thresh: float = 0.8
+        match_thresh: float = 0.8,
+        iou_metric: str = "iou",
+        low_thresh: float = 0.1
     ):
         """
         Initialize tracker.
@@ -94,123 +392,275 @@ class MultiObjectTracker:
         Args:
             max_age: Maximum frames to keep track without detection
             min_hits: Minimum hits before track is confirmed
-            iou_threshold: Minimum IoU for matching
-            track_thresh: Confidence threshold for new tracks
-            match_thresh: Threshold for matching score
+            iou_threshold: Minimum IoU for matching low-score detections
+            track_thresh: Confidence splitting high/low-score detections;
+                          also the minimum confidence for new tracks
+            match_thresh: Maximum matching cost (1 - IoU) for high-score
+                          detections
+            iou_metric: Overlap score used for matching (iou/giou/diou)
+            low_thresh: Detections below this confidence are ignored
         """
+        if iou_metric not in IOU_METRICS:
+            raise ValueError(f"Unknown IoU metric: {iou_metric}")
+        
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
         self.track_thresh = track_thresh
         self.match_thresh = match_thresh
+        self.iou_metric = iou_metric
+        self.low_thresh = low_thresh
         
-        self.tracks: List[TrackedObject] = []
+        # Track store keyed by track ID: O(1) insert/delete and
+        # iteration in creation order
+        self.tracks: Dict[int, TrackedObject] = {}
+        self.kalman = BatchKalmanFilter()
         self.next_id = 1
         self.frame_count = 0
+        
+        # Frames predicted since the last correction, and their boxes
+        self._steps_since_correct = 0
+        self._predicted = np.zeros((0, 4))
+        
+        # Track lifecycle subscribers
+        self._subscribers: Dict[str, List[Callable[[int], None]]] = {
+            self.TRACK_CREATED: [],
+            self.TRACK_DELETED: []
+        }
+    
+    def subscribe(self, event: str, callback: Callable[[int], None]):
+        """
+        Register a callback for track lifecycle events.
+        
+        Args:
+            event: TRACK_CREATED or TRACK_DELETED
+            callback: Called with the track ID
+        """
+        if event not in self._subscribers:
+            raise ValueError(f"Unknown track event: {event}")
+        self._subscribers[event].append(callback)
+    
+    def __getstate__(self):
+        # Callbacks belong to the subscribers; they re-subscribe after a restore
+        state = self.__dict__.copy()
+        state['_subscribers'] = {event: [] for event in self._subscribers}
+        return state
+    
+    def _emit(self, event: str, track_id: int):
+        for callback in self._subscribers[event]:
+            callback(track_id)
     
     def update(
         self,
-        detections: List[Detection],
+        detections: Union[List[Detection], DetectionArrays],
         frame: np.ndarray = None
     ) -> List[TrackedObject]:
         """
         Update tracks with new detections.
         
         Args:
-            detections: List of detections for current frame
+            detections: Detections for current frame (list or arrays)
             frame: Optional frame for appearance features
         
         Returns:
             List of active tracked objects
         """
+        self.predict()
+        return self.correct(detections, frame)
+    
+    def predict(self) -> List[TrackedObject]:
+        """
+        Advance all tracks one frame.
+        
+        On its own this propagates tracks through a frame the detector
+        skipped; follow it with correct() on frames that were detected.
+        
+        Returns:
+            Confirmed tracks at their predicted positions
+        """
         self.frame_count += 1
+        self._steps_since_correct += 1
+        
+        tracks = list(self.tracks.values())
+        slots = np.array([t.kalman_slot for t in tracks], dtype=int)
+        self._predicted = self._predict(tracks, slots, self._steps_since_correct - 1)
+        
+        return self._confirmed()
+    
+    def correct(
+        self,
+        detections: Union[List[Detection], DetectionArrays],
+        frame: np.ndarray = None
+    ) -> List[TrackedObject]:
+        """
+        Associate this frame's detections with the predicted tracks.
+        
+        Args:
+            detections: Detections for current frame (list or arrays)
+            frame: Optional frame for appearance features
+        
+        Returns:
+            List of active tracked objects
+        """
+        if self._steps_since_correct == 0:
+            self.predict()
+        steps = self._steps_since_correct
+        self._steps_since_correct = 0
+        
+        if not isinstance(detections, DetectionArrays):
+            detections = DetectionArrays.from_detections(detections)
         
         # Filter detections by class (only track players)
-        player_detections = [d for d in detections if d.class_name == "player"]
+        players = detections.select(
+            (detections.class_ids == DetectionArrays.PLAYER_CLASS_ID) &
+            (detections.scores >= self.low_thresh)
+        )
         
-        # Predict new locations for existing tracks
-        for track in self.tracks:
-            track.predict()
+        # Tracks in predict() order (the store is unchanged in between)
+        tracks = list(self.tracks.values())
+        slots = np.array([t.kalman_slot for t in tracks], dtype=int)
+        predicted = self._predicted
         
-        # Match detections to tracks
-        if len(self.tracks) > 0 and len(player_detections) > 0:
-            matched, unmatched_dets, unmatched_tracks = self._match(
-                player_detections
-            )
-        else:
-            matched = []
-            unmatched_dets = list(range(len(player_detections)))
-            unmatched_tracks = list(range(len(self.tracks)))
-        
-        # Update matched tracks
-        for track_idx, det_idx in matched:
-            self.tracks[track_idx].update(player_detections[det_idx])
-        
-        # Create new tracks for unmatched detections
-        for det_idx in unmatched_dets:
-            det = player_detections[det_idx]
-            if det.confidence >= self.track_thresh:
-                new_track = TrackedObject(
-                    track_id=self.next_id,
-                    bbox=det.bbox.copy(),
-                    confidence=det.confidence,
-                    class_name=det.class_name
+        # First association: all tracks vs high-score detections
+        high = np.flatnonzero(players.scores >= self.track_thresh)
+        low = np.flatnonzero(players.scores < self.track_thresh)
+        
+        matched_high, unmatched_high, remaining = self._match(
+            predicted, players.boxes[high], 1.0 - self.match_thresh
+        )
+        
+        # Second association: tracks seen at the last correction vs
+        # low-score detections
+        recent = remaining[[tracks[i].time_since_update <= steps for i in remaining]]
+        matched_low, _, _ = self._match(
+            predicted[recent], players.boxes[low], self.iou_threshold
+        )
+        
+        matched = np.concatenate([
+            np.stack([matched_high[:, 0], high[matched_high[:, 1]]], axis=1),
+            np.stack([recent[matched_low[:, 0]], low[matched_low[:, 1]]], axis=1)
+        ]).astype(int)
+        
+        # Correct matched tracks (one batched step)
+        if len(matched) > 0:
+            matched_slots = slots[matched[:, 0]]
+            self.kalman.update(matched_slots, players.boxes[matched[:, 1]])
+            filtered = self.kalman.boxes(matched_slots)
+            velocities = self.kalman.velocities(matched_slots)
+            
+            for i, (track_idx, det_idx) in enumerate(matched):
+                tracks[track_idx].update(
+                    Detection(
+                        bbox=players.boxes[det_idx],
+                        confidence=float(players.scores[det_idx]),
+                        class_id=DetectionArrays.PLAYER_CLASS_ID,
+                        class_name="player"
+                    ),
+                    filtered[i],
+                    velocities[i]
                 )
-                self.tracks.append(new_track)
-                self.next_id += 1
         
-        # Remove dead tracks
-        self.tracks = [
-            t for t in self.tracks
-            if t.time_since_update < self.max_age
-        ]
+        # Remove dead tracks (only unmatched tracks can have aged out)
+        track_matched = np.zeros(len(tracks), dtype=bool)
+        track_matched[matched[:, 0]] = True
+        for track_idx in np.flatnonzero(~track_matched):
+            track = tracks[track_idx]
+            if track.time_since_update >= self.max_age:
+                self.kalman.remove(track.kalman_slot)
+                del self.tracks[track.track_id]
+                self._emit(self.TRACK_DELETED, track.track_id)
+        
+        # Create new tracks for unmatched high-score detections
+        for det_idx in high[unmatched_high]:
+            bbox = players.boxes[det_idx]
+            new_track = TrackedObject(
+                track_id=self.next_id,
+                bbox=bbox.copy(),
+                confidence=float(players.scores[det_idx]),
+                class_name="player",
+                kalman_slot=self.kalman.add(bbox)
+            )
+            self.tracks[new_track.track_id] = new_track
+            self.next_id += 1
+            self._emit(self.TRACK_CREATED, new_track.track_id)
         
-        # Return confirmed tracks
+        return self._confirmed()
+    
+    def _confirmed(self) -> List[TrackedObject]:
         return [
-            t for t in self.tracks
+            t for t in self.tracks.values()
             if t.hits >= self.min_hits or self.frame_count <= self.min_hits
         ]
     
+    def _predict(
+        self,
+        tracks: List[TrackedObject],
+        slots: np.ndarray,
+        propagated: int = 0
+    ) -> np.ndarray:
+        """
+        Advance all tracks one frame; returns (N, 4) predicted boxes.
+        
+        Args:
+            tracks: Live tracks
+            slots: Their Kalman slots
+            propagated: Frames already predicted since the last correction
+        """
+        # Coasting = missed the last correction, not just skipped frames
+        coasting = np.array([t.time_since_update > propagated for t in tracks], dtype=bool)
+        self.kalman.predict(slots[coasting])
+        
+        if len(tracks) == 0:
+            return np.zeros((0, 4))
+        
+        predicted = self.kalman.boxes(slots)
+        velocities = self.kalman.velocities(slots)
+        for i, track in enumerate(tracks):
+            track.predict(predicted[i], velocities[i])
+        
+        return predicted
+    
     def _match(
         self,
-        detections: List[Detection]
-    ) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+        track_boxes: np.ndarray,
+        det_boxes: np.ndarray,
+        min_iou: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Match detections to existing tracks using IoU.
+        Match detection boxes to track boxes using IoU.
         
         Returns:
-            matched: List of (track_idx, det_idx) pairs
-            unmatched_dets: List of unmatched detection indices
-            unmatched_tracks: List of unmatched track indices
+            matched: (K, 2) array of (track_idx, det_idx) pairs
+            unmatched_dets: Array of unmatched detection indices
+            unmatched_tracks: Array of unmatched track indices
         """
-        if len(self.tracks) == 0 or len(detections) == 0:
-            return [], list(range(len(detections))), list(range(len(self.tracks)))
+        n_tracks, n_dets = len(track_boxes), len(det_boxes)
         
-        # Calculate IoU matrix
-        track_boxes = np.array([t.bbox for t in self.tracks])
-        det_boxes = np.array([d.bbox for d in detections])
+        if n_tracks == 0 or n_dets == 0:
+            return (
+                np.empty((0, 2), dtype=int),
+                np.arange(n_dets),
+                np.arange(n_tracks)
+            )
         
         iou_matrix = self._calculate_iou_matrix(track_boxes, det_boxes)
         
         # Hungarian algorithm for optimal assignment
-        if iou_matrix.size > 0:
-            row_indices, col_indices = linear_sum_assignment(-iou_matrix)
-            
-            matched = []
-            unmatched_dets = list(range(len(detections)))
-            unmatched_tracks = list(range(len(self.tracks)))
-            
-            for row, col in zip(row_indices, col_indices):
-                if iou_matrix[row, col] >= self.iou_threshold:
-                    matched.append((row, col))
-                    if col in unmatched_dets:
-                        unmatched_dets.remove(col)
-                    if row in unmatched_tracks:
-                        unmatched_tracks.remove(row)
-            
-            return matched, unmatched_dets, unmatched_tracks
+        rows, cols = linear_sum_assignment(-iou_matrix)
         
-        return [], list(range(len(detections))), list(range(len(self.tracks)))
+        keep = iou_matrix[rows, cols] >= min_iou
+        rows, cols = rows[keep], cols[keep]
+        
+        track_matched = np.zeros(n_tracks, dtype=bool)
+        det_matched = np.zeros(n_dets, dtype=bool)
+        track_matched[rows] = True
+        det_matched[cols] = True
+        
+        return (
+            np.stack([rows, cols], axis=1),
+            np.flatnonzero(~det_matched),
+            np.flatnonzero(~track_matched)
+        )
     
     def _calculate_iou_matrix(
         self,
@@ -218,36 +668,18 @@ class MultiObjectTracker:
         boxes2: np.ndarray
     ) -> np.ndarray:
         """Calculate IoU matrix between two sets of boxes."""
-        n1, n2 = len(boxes1), len(boxes2)
-        iou_matrix = np.zeros((n1, n2))
-        
-        for i in range(n1):
-            for j in range(n2):
-                iou_matrix[i, j] = self._calculate_iou(boxes1[i], boxes2[j])
-        
-        return iou_matrix
-    
-    def _calculate_iou(self, box1: np.ndarray, box2: np.ndarray) -> float:
-        """Calculate IoU between two boxes."""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
-        
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0
+        return box_iou_matrix(boxes1, boxes2, self.iou_metric)
     
     def reset(self):
-        """Reset tracker state."""
-        self.tracks.clear()
+        """Reset tracker state (live tracks are reported as deleted)."""
+        for track_id in list(self.tracks):
+            del self.tracks[track_id]
+            self._emit(self.TRACK_DELETED, track_id)
+        self.kalman.reset()
         self.next_id = 1
         self.frame_count = 0
+        self._steps_since_correct = 0
+        self._predicted = np.zeros((0, 4))
 
 
 class BallTracker:
@@ -280,6 +712,9 @@ class BallTracker:
         self.velocity: np.ndarray = np.zeros(2)
         self.missing_frames = 0
         self.history: deque = deque(maxlen=30)
+        
+        # Distance (pixels) between the last detection and its prediction
+        self.innovation: Optional[float] = None
     
     def update(self, detection: Optional[Detection]) -> Optional[Tuple[float, float]]:
         """
@@ -294,7 +729,10 @@ class BallTracker:
         if detection is not None:
             new_pos = np.array(detection.center)
             
+            self.innovation = None
             if self.position is not None:
+                self.innovation = float(np.linalg.norm(new_pos - (self.position + self.velocity)))
+                
                 # Update velocity
                 new_velocity = new_pos - self.position
                 self.velocity = (
@@ -330,12 +768,38 @@ class BallTracker:
             
             return None
     
+    def propagate(self) -> Optional[Tuple[float, float]]:
+        """
+        Advance the ball through a frame the detector skipped.
+        
+        Unlike update(None) this is not a missed detection, unless the
+        ball was already missing.
+        
+        Returns:
+            Estimated ball position or None
+        """
+        if self.missing_frames > 0 or self.position is None:
+            return self.update(None)
+        
+        self.position = self.position + self.velocity
+        self.history.append(tuple(self.position))
+        return tuple(self.position)
+    
+    def predicted_position(self) -> Optional[Tuple[float, float]]:
+        """Position propagate() would return, without changing state."""
+        if self.position is None:
+            return None
+        if self.missing_frames > 0 and self.missing_frames + 1 > self.max_missing_frames:
+            return None
+        return tuple(self.position + self.velocity)
+    
     def reset(self):
         """Reset tracker state."""
         self.position = None
         self.velocity = np.zeros(2)
         self.missing_frames = 0
         self.history.clear()
+        self.innovation = None
 
 
 def draw_tracks(
@@ -0,0 +1,368 @@
+"""
+Trajectory Store Module
+
+Columnar per-frame results. Instead of one FrameResult object per frame,
+tracked players are appended as rows of flat arrays (frame, track, box,
+pitch position, team, confidence) and the ball as one row per frame, so
+a full match costs a few dozen bytes per player-frame. Rows arrive in
+frame order, which makes frame-range queries a binary search. Optionally
+filled chunks spill to .npy files on disk and are memory-mapped back for
+queries and export.
+"""
+
+import shutil
+import tempfile
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Parquet export
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Team label <-> int8 code; anything else (e.g. "unknown") is -1
+TEAM_NAMES = ("team_a", "team_b", "referee")
+TEAM_CODES = {name: code for code, name in enumerate(TEAM_NAMES)}
+
+# Bit flags of the per-frame decision columns
+OFFSIDE_FLAG = 1
+FOUL_FLAG = 2
+PENALTY_FLAG = 4
+
+PLAYER_COLUMNS = {
+    'frame': (np.int32, ()),
+    'track_id': (np.int32, ()),
+    'bbox': (np.float32, (4,)),
+    'pitch_x': (np.float32, ()),
+    'pitch_y': (np.float32, ()),
+    'team': (np.int8, ()),
+    'confidence': (np.float32, ()),
+}
+
+FRAME_COLUMNS = {
+    'frame': (np.int32, ()),
+    'timestamp': (np.float64, ()),
+    'ball_x': (np.float32, ()),
+    'ball_y': (np.float32, ()),
+    'ball_pitch_x': (np.float32, ()),
+    'ball_pitch_y': (np.float32, ()),
+    'flags': (np.uint8, ()),
+}
+
+
+class ColumnTable:
+    """Growable set of equally long numpy columns."""
+
+    def __init__(self, schema: Dict[str, Tuple[type, tuple]], capacity: int = 1024):
+        self.schema = schema
+        self.size = 0
+        self.columns = {
+            name: np.empty((capacity,) + shape, dtype=dtype)
+            for name, (dtype, shape) in schema.items()
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.columns['frame'])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def append(self, rows: int, **values):
+        """Append rows; each value is an array (or scalar) of that many rows."""
+        end = self.size + rows
+        if end > self.capacity:
+            self._grow(end)
+        for name, column in self.columns.items():
+            column[self.size:end] = values[name]
+        self.size = end
+
+    def view(self) -> Dict[str, np.ndarray]:
+        """The filled part of every column (no copy)."""
+        return {name: column[:self.size] for name, column in self.columns.items()}
+
+    def clear(self):
+        self.size = 0
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * self.capacity)
+        for name, column in self.columns.items():
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+
+@dataclass
+class _Chunk:
+    """Player rows spilled to one directory of .npy files."""
+    path: Path
+    rows: int
+    first_frame: int
+    last_frame: int
+    min_track: int
+    max_track: int
+
+
+class TrajectoryStore:
+    """
+    Columnar storage of tracked players and the ball across a video.
+
+    Call ``add_frame`` once per processed frame, in frame order. Query
+    with ``players``, ``track`` and ``ball``; export with ``to_npz`` or
+    ``to_parquet``. Only player rows spill to disk; the per-frame table
+    is a few dozen bytes per frame.
+    """
+
+    def __init__(self, spill_rows: int = 0, spill_dir: Optional[Union[str, Path]] = None):
+        """
+        Initialize store.
+
+        Args:
+            spill_rows: Move player rows to disk in chunks of this many
+                        rows (0 = keep everything in memory)
+            spill_dir: Where to create this store's spill directory
+                       (default: the system temporary directory); it is
+                       removed by close() or when the store is collected
+        """
+        self.spill_rows = spill_rows
+        self.spill_root = Path(spill_dir) if spill_dir else None
+        self._spill_dir: Optional[Path] = None
+
+        self.player_table = ColumnTable(PLAYER_COLUMNS)
+        self.frame_table = ColumnTable(FRAME_COLUMNS)
+
+        self.chunks: List[_Chunk] = []
+
+    def add_frame(
+        self,
+        frame_number: int,
+        timestamp: float,
+        track_ids: Sequence[int],
+        bboxes: Sequence[np.ndarray],
+        confidences: Sequence[float],
+        pitch_positions: Dict[int, Tuple[float, float]],
+        team_assignments: Dict[int, str],
+        ball_position: Optional[Tuple[float, float]] = None,
+        ball_pitch_position: Optional[Tuple[float, float]] = None,
+        flags: int = 0
+    ):
+        """
+        Append one frame.
+
+        Args:
+            frame_number: Index of the frame in the video
+            timestamp: Frame time in seconds
+            track_ids: Tracked player IDs
+            bboxes: Image boxes [x1, y1, x2, y2], one per track
+            confidences: Track confidences, one per track
+            pitch_positions: Pitch coordinates by track ID (missing = NaN)
+            team_assignments: Team label by track ID (missing = -1)
+            ball_position: Ball image position, if any
+            ball_pitch_position: Ball pitch position, if any
+            flags: OFFSIDE_FLAG / FOUL_FLAG / PENALTY_FLAG bits
+        """
+        n = len(track_ids)
+        if n:
+            nan = (np.nan, np.nan)
+            pitch = np.array([pitch_positions.get(t, nan) for t in track_ids], dtype=np.float32)
+            self.player_table.append(
+                n,
+                frame=frame_number,
+                track_id=track_ids,
+                bbox=np.asarray(bboxes, dtype=np.float32).reshape(n, 4),
+                pitch_x=pitch[:, 0],
+                pitch_y=pitch[:, 1],
+                team=[TEAM_CODES.get(team_assignments.get(t), -1) for t in track_ids],
+                confidence=confidences
+            )
+
+        ball = ball_position or (np.nan, np.nan)
+        ball_pitch = ball_pitch_position or (np.nan, np.nan)
+        self.frame_table.append(
+            1,
+            frame=frame_number,
+            timestamp=timestamp,
+            ball_x=ball[0],
+            ball_y=ball[1],
+            ball_pitch_x=ball_pitch[0],
+            ball_pitch_y=ball_pitch[1],
+            flags=flags
+        )
+
+        if self.spill_rows and len(self.player_table) >= self.spill_rows:
+            self._spill()
+
+    def extend(self, players: Dict[str, np.ndarray], frames: Dict[str, np.ndarray]):
+        """
+        Append columns returned by ``players`` and ``ball`` of another store.
+
+        Args:
+            players: Player columns, frames after those already stored
+            frames: Per-frame columns for the same frames
+        """
+        if len(players['frame']):
+            self.player_table.append(len(players['frame']), **players)
+        if len(frames['frame']):
+            self.frame_table.append(len(frames['frame']), **frames)
+
+        if self.spill_rows and len(self.player_table) >= self.spill_rows:
+            self._spill()
+
+    def __len__(self) -> int:
+        """Player rows, spilled ones included."""
+        return len(self.player_table) + sum(chunk.rows for chunk in self.chunks)
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.frame_table)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory (spilled chunks excluded)."""
+        return self.player_table.nbytes + self.frame_table.nbytes
+
+    def players(self, start: int = None, end: int = None) -> Dict[str, np.ndarray]:
+        """
+        Player rows with start <= frame < end.
+
+        Args:
+            start: First frame (None = from the beginning)
+            end: One past the last frame (None = to the end)
+
+        Returns:
+            Dict of column arrays
+        """
+        parts = []
+        for chunk in self.chunks:
+            if (end is None or chunk.first_frame < end) and \
+                    (start is None or chunk.last_frame >= start):
+                parts.append(_frame_slice(_load_chunk(chunk.path), start, end))
+        parts.append(_frame_slice(self.player_table.view(), start, end))
+        return _concat(parts, PLAYER_COLUMNS)
+
+    def track(self, track_id: int) -> Dict[str, np.ndarray]:
+        """All rows of one track, in frame order."""
+        parts = []
+        for chunk in self.chunks:
+            if chunk.min_track <= track_id <= chunk.max_track:
+                columns = _load_chunk(chunk.path)
+                parts.append(_select(columns, columns['track_id'] == track_id))
+        columns = self.player_table.view()
+        parts.append(_select(columns, columns['track_id'] == track_id))
+        return _concat(parts, PLAYER_COLUMNS)
+
+    def ball(self, start: int = None, end: int = None) -> Dict[str, np.ndarray]:
+        """Per-frame rows (ball position and decision flags) with start <= frame < end."""
+        return {
+            name: column.copy()
+            for name, column in _frame_slice(self.frame_table.view(), start, end).items()
+        }
+
+    def to_npz(self, path: Union[str, Path], compressed: bool = True):
+        """
+        Write all columns to one .npz file.
+
+        Player columns are stored as ``players_<name>``, per-frame columns
+        as ``frames_<name>``.
+        """
+        arrays = {f"players_{k}": v for k, v in self.players().items()}
+        arrays.update({f"frames_{k}": v for k, v in self.ball().items()})
+        arrays['team_names'] = np.array(TEAM_NAMES)
+        (np.savez_compressed if compressed else np.savez)(path, **arrays)
+
+    def to_parquet(self, directory: Union[str, Path]):
+        """
+        Write players.parquet and frames.parquet (requires pyarrow).
+
+        Team codes are written as their labels.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        players = self.players()
+        bbox = players.pop('bbox')
+        labels = np.array(TEAM_NAMES + ("unknown",))
+        players['team'] = labels[players['team']]  # -1 indexes "unknown"
+        for i, name in enumerate(("x1", "y1", "x2", "y2")):
+            players[name] = bbox[:, i]
+
+        pq.write_table(pa.table(players), directory / "players.parquet")
+        pq.write_table(pa.table(self.ball()), directory / "frames.parquet")
+
+    def clear(self):
+        """Drop all rows, spilled chunks included."""
+        self.player_table.clear()
+        self.frame_table.clear()
+        for chunk in self.chunks:
+            shutil.rmtree(chunk.path, ignore_errors=True)
+        self.chunks = []
+
+    def close(self):
+        """Remove spilled chunks and the temporary spill directory."""
+        self.clear()
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _spill(self):
+        if self._spill_dir is None:
+            if self.spill_root is not None:
+                self.spill_root.mkdir(parents=True, exist_ok=True)
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="var-trajectories-", dir=self.spill_root))
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+        columns = self.player_table.view()
+        path = self._spill_dir / f"chunk_{len(self.chunks):05d}"
+        path.mkdir(parents=True, exist_ok=True)
+        for name, column in columns.items():
+            np.save(path / f"{name}.npy", column)
+
+        track_ids = columns['track_id']
+        self.chunks.append(_Chunk(
+            path=path,
+            rows=len(track_ids),
+            first_frame=int(columns['frame'][0]),
+            last_frame=int(columns['frame'][-1]),
+            min_track=int(track_ids.min()),
+            max_track=int(track_ids.max())
+        ))
+        self.player_table.clear()
+
+
+def _load_chunk(path: Path) -> Dict[str, np.ndarray]:
+    return {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in PLAYER_COLUMNS}
+
+
+def _frame_slice(columns: Dict[str, np.ndarray], start: Optional[int], end: Optional[int]):
+    frames = columns['frame']
+    lo = 0 if start is None else int(np.searchsorted(frames, start, side='left'))
+    hi = len(frames) if end is None else int(np.searchsorted(frames, end, side='left'))
+    return {name: column[lo:hi] for name, column in columns.items()}
+
+
+def _select(columns: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    return {name: column[mask] for name, column in columns.items()}
+
+
+def _concat(parts: List[Dict[str, np.ndarray]], schema) -> Dict[str, np.ndarray]:
+    """Concatenate column dicts into fresh in-memory arrays."""
+    return {
+        name: np.concatenate([p[name] for p in parts]) if parts else
+        np.empty((0,) + shape, dtype=dtype)
+        for name, (dtype, shape) in schema.items()
+    }
@@ -6,7 +6,7 @@ Includes VAR Declaration System for official decision announcements.
 """
 
 import numpy as np
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Sequence, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
 from collections import deque
@@ -14,6 +14,11 @@ import cv2
 
 from loguru import logger
 
+from .frame_buffer import FrameRingBuffer
+from .spatial import (
+    contact_candidates, broken_contacts, pairs_within, is_opposing, NON_PLAYER_TEAMS
+)
+
 
 class IncidentType(Enum):
     """Types of VAR incidents."""
@@ -523,6 +528,13 @@ class EnhancedFoulDetector:
 
         return incidents
     
+    def forget(self, player_id: int):
+        """Drop all state kept for a player whose track has ended."""
+        self.player_heights.pop(player_id, None)
+        self.player_velocities.pop(player_id, None)
+        for pair_key in [k for k in self.contact_tracking if player_id in k]:
+            del self.contact_tracking[pair_key]
+    
     def _update_player_tracking(
         self,
         player_bboxes: Dict[int, np.ndarray],
@@ -548,50 +560,49 @@ class EnhancedFoulDetector:
         ball_position: Optional[Tuple[float, float]]
     ) -> List[Dict]:
         contacts = []
-        player_ids = list(player_positions.keys())
+        player_ids, positions, pairs, distances = contact_candidates(
+            player_positions, team_assignments, self.contact_threshold
+        )
         
-        for i, p1_id in enumerate(player_ids):
-            for p2_id in player_ids[i + 1:]:
-                team1 = team_assignments.get(p1_id, 'unknown')
-                team2 = team_assignments.get(p2_id, 'unknown')
+        ball_distances = None
+        if ball_position:
+            ball_distances = np.linalg.norm(positions - np.array(ball_position), axis=1)
+        
+        in_contact = set()
+        for (i, j), distance in zip(pairs, distances):
+            p1_id, p2_id = player_ids[i], player_ids[j]
+            pair_key = (min(p1_id, p2_id), max(p1_id, p2_id))
+            in_contact.add(pair_key)
+            self.contact_tracking[pair_key] = \
+                self.contact_tracking.get(pair_key, 0) + 1
+            
+            if self.contact_tracking[pair_key] >= self.min_contact_frames:
+                contact_point = tuple((positions[i] + positions[j]) / 2)
                 
-                if team1 == team2 or 'unknown' in [team1, team2]:
-                    continue
-                if 'referee' in [team1, team2]:
-                    continue
+                ball_dist1 = float('inf')
+                ball_dist2 = float('inf')
+                if ball_distances is not None:
+                    ball_dist1 = ball_distances[i]
+                    ball_dist2 = ball_distances[j]
                 
-                pos1 = np.array(player_positions[p1_id])
-                pos2 = np.array(player_positions[p2_id])
-                distance = np.linalg.norm(pos1 - pos2)
+                team1 = team_assignments[p1_id]
+                team2 = team_assignments[p2_id]
+                team_with_ball = team1 if ball_dist1 < ball_dist2 else team2
                 
-                if distance < self.contact_threshold:
-                    pair_key = (min(p1_id, p2_id), max(p1_id, p2_id))
-                    self.contact_tracking[pair_key] = \
-                        self.contact_tracking.get(pair_key, 0) + 1
-                    
-                    if self.contact_tracking[pair_key] >= self.min_contact_frames:
-                        contact_point = tuple((pos1 + pos2) / 2)
-                        
-                        ball_dist1 = float('inf')
-                        ball_dist2 = float('inf')
-                        if ball_position:
-                            ball_pos = np.array(ball_position)
-                            ball_dist1 = np.linalg.norm(pos1 - ball_pos)
-                            ball_dist2 = np.linalg.norm(pos2 - ball_pos)
-                        
-                        team_with_ball = team1 if ball_dist1 < ball_dist2 else team2
-                        
-                        contacts.append({
-                            'players': [p1_id, p2_id],
-                            'position': contact_point,
-                            'distance': distance,
-                            'duration': self.contact_tracking[pair_key],
-                            'team_with_ball': team_with_ball,
-                            'ball_distance': min(ball_dist1, ball_dist2)
-                        })
-                else:
-                    pair_key = (min(p1_id, p2_id), max(p1_id, p2_id))
-                    self.contact_tracking[pair_key] = 0
+                contacts.append({
+                    'players': [p1_id, p2_id],
+                    'position': contact_point,
+                    'distance': distance,
+                    'duration': self.contact_tracking[pair_key],
+                    'team_with_ball': team_with_ball,
+                    'ball_distance': min(ball_dist1, ball_dist2)
+                })
+        
+        # Opposing pairs checked this frame but no longer touching
+        for pair_key in broken_contacts(
+            list(self.contact_tracking), in_contact, player_positions, team_assignments
+        ):
+            del self.contact_tracking[pair_key]
         
         return contacts
     
@@ -829,18 +840,37 @@ class PassDetector:
         if ball_position is None:
             return False
         
+        detected = self.check(frame_number, ball_position, fps)
+        
         self.ball_history.append({
             'frame': frame_number,
             'position': ball_position
         })
+        if detected:
+            self.last_pass_frame = frame_number
+        
+        return detected
+    
+    def check(
+        self,
+        frame_number: int,
+        ball_position: Optional[Tuple[float, float]],
+        fps: float = 30.0
+    ) -> bool:
+        """Whether update() would report a pass, without changing state."""
+        if ball_position is None:
+            return False
         
-        if len(self.ball_history) < 5:
+        if len(self.ball_history) + 1 < 5:
             return False
         
         if frame_number - self.last_pass_frame < 15:
             return False
         
-        recent = list(self.ball_history)[-5:]
+        recent = list(self.ball_history)[-4:] + [{
+            'frame': frame_number,
+            'position': ball_position
+        }]
         velocities = []
         
         for i in range(1, len(recent)):
@@ -856,11 +886,7 @@ class PassDetector:
         
         acceleration = velocities[-1] - velocities[-2]
         
-        if acceleration > self.velocity_threshold:
-            self.last_pass_frame = frame_number
-            return True
-        
-        return False
+        return acceleration > self.velocity_threshold
     
     def get_last_ball_position(self) -> Optional[Tuple[float, float]]:
         if self.ball_history:
@@ -875,34 +901,54 @@ class VARDecisionEngine:
         self,
         pitch_length: float = 105.0,
         pitch_width: float = 68.0,
-        fps: float = 30.0
+        fps: float = 30.0,
+        buffer_frames: int = 150,
+        buffer_mode: str = "raw",
+        buffer_scale: float = 1.0,
+        buffer_jpeg_quality: int = 85,
+        offside_tolerance_cm: float = 15.0,
+        contact_threshold: float = 1.5,
+        fall_threshold: float = 0.3,
+        min_contact_frames: int = 2
     ):
         self.pitch_length = pitch_length
         self.pitch_width = pitch_width
         self.fps = fps
         
-        self.offside_detector = EnhancedOffsideDetector(pitch_length, pitch_width)
-        self.foul_detector = EnhancedFoulDetector(pitch_length, pitch_width)
+        self.offside_detector = EnhancedOffsideDetector(
+            pitch_length, pitch_width, tolerance_cm=offside_tolerance_cm
+        )
+        self.foul_detector = EnhancedFoulDetector(
+            pitch_length, pitch_width,
+            contact_threshold=contact_threshold,
+            fall_threshold=fall_threshold,
+            min_contact_frames=min_contact_frames
+        )
         self.pass_detector = PassDetector()
         
         self.incidents: List[VARIncident] = []
-        self.frame_buffer: deque = deque(maxlen=150)
+        self.frame_buffer = FrameRingBuffer(
+            capacity=buffer_frames,
+            mode=buffer_mode,
+            scale=buffer_scale,
+            jpeg_quality=buffer_jpeg_quality
+        )
     
     def process_frame(
         self,
-        frame: np.ndarray,
+        frame: Optional[np.ndarray],
         frame_number: int,
         player_bboxes: Dict[int, np.ndarray],
         player_positions: Dict[int, Tuple[float, float]],
         team_assignments: Dict[int, str],
-        ball_position: Optional[Tuple[float, float]]
+        ball_position: Optional[Tuple[float, float]],
+        ball_estimated: bool = False
     ) -> List[VARIncident]:
         new_incidents = []
         
-        self.frame_buffer.append({
-            'frame_number': frame_number,
-            'frame': frame.copy()
-        })
+        # No frame when decisions are replayed from cached tracks
+        if frame is not None:
+            self.frame_buffer.append(frame_number, frame)
         
         team_positions = {'team_a': [], 'team_b': []}
         for player_id, pos in player_positions.items():
@@ -915,7 +961,9 @@ class VARDecisionEngine:
             ball_position, player_positions, team_assignments
         )
         
-        if ball_position:
+        # Passes are judged on detected ball positions only: the jump from
+        # a propagated ball back to a detection is not a kick
+        if ball_position and not ball_estimated:
             pass_detected = self.pass_detector.update(
                 frame_number, ball_position, self.fps
             )
@@ -948,12 +996,78 @@ class VARDecisionEngine:
         
         return new_incidents
     
+    def needs_detection(
+        self,
+        frame_number: int,
+        player_positions: np.ndarray,
+        ball_position: Optional[Tuple[float, float]],
+        contact_margin: float = 1.5,
+        ball_radius: float = 2.0,
+        player_teams: Optional[Sequence[Optional[str]]] = None
+    ) -> bool:
+        """
+        Whether a frame must be analyzed with real detections.
+        
+        Called with the propagated positions a skipped frame would be
+        analyzed with; any frame where they could produce a pass, a
+        contact between opponents or a change of possession is sent to
+        the detector instead.
+        
+        Args:
+            frame_number: Index of the frame in the video
+            player_positions: (N, 2) predicted player pitch positions
+            ball_position: Predicted ball pitch position
+            contact_margin: Factor on the contact threshold covering
+                            prediction error
+            ball_radius: Ball-to-player distance (meters) at which the
+                         nearest player takes possession
+            player_teams: Last known team of each player (None where the
+                          track has no team yet, which counts as either)
+        
+        Returns:
+            True if the detector should run on this frame
+        """
+        player_positions = np.asarray(player_positions, dtype=np.float64).reshape(-1, 2)
+        if player_teams is None:
+            player_teams = [None] * len(player_positions)
+        
+        if ball_position is not None:
+            if self.pass_detector.check(frame_number, ball_position, self.fps):
+                return True
+            if len(player_positions):
+                distances = np.linalg.norm(player_positions - np.asarray(ball_position), axis=1)
+                nearest = int(np.argmin(distances))
+                team = player_teams[nearest]
+                if distances[nearest] < ball_radius and (
+                    team is None or
+                    (team not in NON_PLAYER_TEAMS and team != self.offside_detector.ball_possession)
+                ):
+                    return True
+        
+        pairs, _ = pairs_within(
+            player_positions, self.foul_detector.contact_threshold * contact_margin
+        )
+        for i, j in pairs:
+            team1, team2 = player_teams[i], player_teams[j]
+            if team1 is None or team2 is None or is_opposing(team1, team2):
+                return True
+        return False
+    
     def get_all_incidents(self) -> List[VARIncident]:
         return self.incidents
     
     def get_incidents_by_type(self, incident_type: IncidentType) -> List[VARIncident]:
         return [i for i in self.incidents if i.incident_type == incident_type]
     
+    def get_incident_frames(self, incident: VARIncident) -> List[Tuple[int, np.ndarray]]:
+        """
+        Buffered (frame_number, frame) pairs within an incident's clip range.
+        
+        Frames after the current one are not available yet, and frames
+        older than the retention window have been overwritten.
+        """
+        return self.frame_buffer.get_range(*incident.video_clip_range)
+    
     def get_incident_summary(self) -> Dict[str, int]:
         summary = {}
         for incident in self.incidents:
@@ -961,6 +1075,10 @@ class VARDecisionEngine:
             summary[key] = summary.get(key, 0) + 1
         return summary
     
+    def forget(self, player_id: int):
+        """Drop per-player state for a track that has ended."""
+        self.foul_detector.forget(player_id)
+    
     def reset(self):
         self.incidents.clear()
         self.frame_buffer.clear()